@@ -0,0 +1,5 @@
+import sys
+
+from bratlib.cli import main
+
+sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Per-document indexes shared by the calculators.
+An index is built once from a BratFile and can then be compared against any number of other indexes,
+which avoids re-reading, deep copying, or re-sorting the same annotations for every comparison.
+"""
+
+import typing as t
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate
+
+from bratlib import data as bd
+
+# (tag, start, end, mention); equal keys are equal bratlib.data.extensions.annotation_types.ContigEntity instances
+EntityKey = t.Tuple[str, int, int, str]
+
+
+def entity_key(ent: bd.Entity) -> EntityKey:
+    return ent.tag, ent.spans[0][0], ent.spans[-1][-1], ent.mention
+
+
+# (tag, spans, mention); equal keys are equal bratlib.data.Entity instances, including every span of discontiguous
+# entities
+EntityIdentity = t.Tuple[str, t.Tuple[t.Tuple[int, int], ...], str]
+
+
+def entity_identity(ent: bd.Entity) -> EntityIdentity:
+    return ent.tag, tuple(ent.spans), ent.mention
+
+
+def identity_to_key(identity: EntityIdentity) -> EntityKey:
+    """The `entity_key` of the entity of an `entity_identity`."""
+    tag, spans, mention = identity
+    return tag, spans[0][0], spans[-1][-1], mention
+
+
+class _TagGroup:
+    """The entities of one tag in their original order, with lookups for lenient matching."""
+
+    def __init__(self, keys: t.List[EntityKey]):
+        self.keys = keys
+        self.starts = [k[1] for k in keys]
+        self.is_sorted = all(a <= b for a, b in zip(self.starts, self.starts[1:]))
+        # Running maximum of the end offsets; non-decreasing, so it can be bisected
+        self.max_ends = list(accumulate((k[2] for k in keys), max))
+
+    def first_overlap(self, start: int, end: int) -> t.Optional[EntityKey]:
+        """Returns the first key, in original order, whose span overlaps the span (start, end)."""
+        if self.is_sorted:
+            i = bisect_right(self.max_ends, start)
+            if i < bisect_left(self.starts, end):
+                return self.keys[i]
+            return None
+
+        for k in self.keys:
+            if k[1] < end and start < k[2]:
+                return k
+        return None
+
+
+class EntityIndex:
+    """
+    Hashable keys for the entities of one BratFile, in the file's order.
+    Lookups for lenient matching are created the first time they are needed.
+    """
+
+    def __init__(self, keys: t.List[EntityKey]):
+        self.keys = keys
+        self.key_set = set(keys)
+        self._groups = None
+
+    @classmethod
+    def from_bratfile(cls, ann: bd.BratFile) -> 'EntityIndex':
+        return cls([entity_key(e) for e in ann.entities])
+
+    @property
+    def tags(self) -> t.Set[str]:
+        return {k[0] for k in self.key_set}
+
+    @property
+    def groups(self) -> t.Dict[str, _TagGroup]:
+        return self._groups if self._groups is not None else self.build_groups()
+
+    def build_groups(self) -> t.Dict[str, _TagGroup]:
+        """Creates the lookups for lenient matching if they have not been created yet, as before sharing the index."""
+        if self._groups is None:
+            by_tag = {}
+            for k in self.keys:
+                by_tag.setdefault(k[0], []).append(k)
+            self._groups = {tag: _TagGroup(keys) for tag, keys in by_tag.items()}
+        return self._groups
+
+
+class SpanIndex:
+    """
+    The identities of the entities of one BratFile, in the file's order, with a lookup by their outer bounds.
+    Unlike an EntityIndex, entities that only differ in their inner spans are kept apart.
+    """
+
+    def __init__(self, identities: t.List[EntityIdentity]):
+        self.identities = identities
+        self.by_bounds = {}
+        for i in identities:
+            self.by_bounds.setdefault((i[1][0][0], i[1][-1][-1]), []).append(i)
+
+    @classmethod
+    def from_bratfile(cls, ann: bd.BratFile) -> 'SpanIndex':
+        return cls([entity_identity(e) for e in ann.entities])
+
+    @property
+    def tags(self) -> t.Set[str]:
+        return {i[0] for i in self.identities}
+
+
+# (relation, arg1 identity, arg2 identity); equal keys are equal bratlib.data.Relation instances
+RelationKey = t.Tuple[str, EntityIdentity, EntityIdentity]
+
+
+def relation_key(rel: bd.Relation) -> RelationKey:
+    return rel.relation, entity_identity(rel.arg1), entity_identity(rel.arg2)
+
+
+class RelationIndex:
+    """Hashable keys for the relations of one BratFile, in the file's order; see `relation_key`."""
+
+    def __init__(self, keys: t.List[RelationKey]):
+        self.keys = keys
+        self.key_set = set(keys)
+
+    @classmethod
+    def from_bratfile(cls, ann: bd.BratFile) -> 'RelationIndex':
+        return cls([relation_key(r) for r in ann.relations])
+
+    @property
+    def relations(self) -> t.Set[str]:
+        return {k[0] for k in self.key_set}
+
+
+# tp, fp, and fn counts, each by tag
+AgreementTally = t.Tuple[Counter, Counter, Counter]
+
+
+def count_strict(gold: EntityIndex, system: EntityIndex) -> AgreementTally:
+    """Counts exact matches of tag, start, end, and mention."""
+    tp = Counter(k[0] for k in gold.key_set & system.key_set)
+    fp = Counter(k[0] for k in system.key_set - gold.key_set)
+    fn = Counter(k[0] for k in gold.key_set - system.key_set)
+    return tp, fp, fn
+
+
+def count_lenient(gold: EntityIndex, system: EntityIndex) -> AgreementTally:
+    """
+    Counts overlapping entities of the same tag. Each system entity is paired with the first gold entity of the same
+    tag that it overlaps; that pair is a true positive only if the gold entity has not been paired yet.
+    """
+    unmatched_gold = set(gold.key_set)
+    unmatched_system = set(system.key_set)
+    tp = Counter()
+    groups = gold.groups
+
+    for s in system.keys:
+        if s not in unmatched_system:
+            # Don't do anything with system predictions that have already been paired
+            continue
+        group = groups.get(s[0])
+        if group is None:
+            continue
+        g = group.first_overlap(s[1], s[2])
+        if g is None:
+            continue
+        unmatched_system.remove(s)
+        if g in unmatched_gold:
+            # Each gold entity can only count towards the true positive score once
+            unmatched_gold.remove(g)
+            tp[s[0]] += 1
+
+    fp = Counter(k[0] for k in unmatched_system)
+    fn = Counter(k[0] for k in unmatched_gold)
+    return tp, fp, fn
+
+
+COUNTERS = {'strict': count_strict, 'lenient': count_lenient}
@@ -1,20 +1,25 @@
 import typing as t
+from collections import Counter
 from functools import reduce
-
-import pandas as pd
+from operator import iadd
 
 from bratlib import data as bd
-from bratlib.tools.iteration import zip_datasets
+from bratlib.tools.iteration import parallel_map, zip_datasets
+
+if t.TYPE_CHECKING:
+    import pandas as pd
 
 NONE = 'NONE'
 
 MODES = ('strict', 'lenient')
 
+R = t.TypeVar('R')
+
 
 def merge_dataset_dataframes(
     gold: bd.BratDataset,
     system: bd.BratDataset,
-    function: t.Callable[[bd.BratFile, bd.BratFile], pd.DataFrame],
+    function: t.Callable[[bd.BratFile, bd.BratFile], 'pd.DataFrame'],
     *args, **kwargs
 ):
     """
@@ -28,7 +33,30 @@ def merge_dataset_dataframes(
     )
 
 
-def calculate_scores(counts: pd.DataFrame, *, macro=False, micro=False) -> pd.DataFrame:
+def _compare_files(task):
+    function, gold, system, args, kwargs = task
+    return function(gold, system, *args, **kwargs)
+
+
+def merge_dataset_results(
+    gold: bd.BratDataset,
+    system: bd.BratDataset,
+    function: t.Callable[[bd.BratFile, bd.BratFile], R],
+    *args,
+    start: R,
+    jobs=1,
+    **kwargs
+) -> R:
+    """
+    Like `merge_dataset_dataframes`, but for file-level functions that return a result type from
+    `bratlib.calculators.results`. Results are added to `start`, which is returned.
+    If `jobs` is greater than one, file pairs are compared in that many processes.
+    """
+    tasks = ((function, g, s, args, kwargs) for g, s in zip_datasets(gold, system))
+    return reduce(iadd, parallel_map(_compare_files, tasks, jobs), start)
+
+
+def calculate_scores(counts: 'pd.DataFrame', *, macro=False, micro=False) -> 'pd.DataFrame':
     """
     Given a DataFrame of 'tag' -> ('tp', 'fp', 'tn', 'fn'),
     return a new DataFrame of 'tag' -> ('precision', 'recall', 'f1').
@@ -37,6 +65,8 @@ def calculate_scores(counts: pd.DataFrame, *, macro=False, micro=False) -> pd.Da
     :param macro: bool to include system macro scores at index `(macro)`, defaults to False
     :param micro: bool to include system micro scores at index `(micro)`, defaults to False
     """
+    import pandas as pd
+
     tp, fp, fn = counts['tp'], counts['fp'], counts['fn']
     precision = tp / (tp + fp)
     recall = tp / (tp + fn)
@@ -61,9 +91,24 @@ def calculate_scores(counts: pd.DataFrame, *, macro=False, micro=False) -> pd.Da
     return df
 
 
-def matrix_dataframe(labels: t.Iterable[str]) -> pd.DataFrame:
+def matrix_dataframe(labels: t.Iterable[str]) -> 'pd.DataFrame':
+    import pandas as pd
+
     index = pd.Index(labels).drop_duplicates().sort_values()
     return pd.DataFrame(
         index=index.rename('actual'),
         columns=index.rename('predicted')
     ).fillna(0)
+
+
+def count_pairs(pairs: t.Iterable[t.Tuple[str, str]], *, include_none=False) -> Counter:
+    """
+    Counts the (gold, system) label pairs generated by a confusion matrix calculator.
+    Unless `include_none` is True, counting stops at the first pair that contains NONE.
+    """
+    counts = Counter()
+    for pair in pairs:
+        if not include_none and NONE in pair:
+            break
+        counts[pair] += 1
+    return counts
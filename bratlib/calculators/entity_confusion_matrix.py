@@ -1,49 +1,72 @@
 import argparse
 import typing as t
-from itertools import product
-
-import pandas as pd
 
 from bratlib import data as bd
-from bratlib.calculators import _utils
+from bratlib.calculators import _indexes, _utils
+from bratlib.calculators.results import ConfusionMatrix, SparseConfusionMatrix
 
+if t.TYPE_CHECKING:
+    import pandas as pd
 
 
-def _generate_entity_pairs(gold: bd.BratFile, system: bd.BratFile) -> t.Iterable[t.Tuple[str, str]]:
+def _generate_entity_pairs(gold: _indexes.SpanIndex, system: _indexes.SpanIndex) -> t.Iterable[t.Tuple[str, str]]:
     """
     Generates tuples of tags for which entities of those tags were found to overlap.
     When these pairs are exhausted, it generates tuples for all unmatched entities with 'NONE'.
     The first element of the tuple is gold, the second is system.
     """
-    gold_match = {g: False for g in gold.entities}
-    sys_match = {s: False for s in system.entities}
+    gold_match = dict.fromkeys(gold.identities, False)
+    sys_match = dict.fromkeys(system.identities, False)
 
-    for g, s in product(gold.entities, system.entities):
-        if (g.spans[0][0], g.spans[-1][-1]) == (s.spans[0][0], s.spans[-1][-1]):
+    for g in gold.identities:
+        for s in system.by_bounds.get((g[1][0][0], g[1][-1][-1]), ()):
             gold_match[g] = sys_match[s] = True
-            yield (g.tag, s.tag)
+            yield (g[0], s[0])
 
-    yield from ((_utils.NONE, s.tag) for s, b in sys_match.items() if not b)
-    yield from ((g.tag, _utils.NONE) for g, b in gold_match.items() if not b)
+    yield from ((_utils.NONE, s[0]) for s, b in sys_match.items() if not b)
+    yield from ((g[0], _utils.NONE) for g, b in gold_match.items() if not b)
 
 
-def count_file(gold: bd.BratFile, system: bd.BratFile, *, include_none=False) -> pd.DataFrame:
-    """Creates an entity confusion matrix DataFrame for one document, with gold indices and system columns."""
-    entities = {e.tag for e in gold.entities} | {e.tag for e in system.entities}
+def tabulate_indexes(gold: _indexes.SpanIndex, system: _indexes.SpanIndex, *, include_none=False,
+                     sparse=False) -> t.Union[ConfusionMatrix, SparseConfusionMatrix]:
+    """Creates an entity ConfusionMatrix from the span indexes of two parallel ann files; see `tabulate_file`."""
+    entities = gold.tags | system.tags
     if include_none:
         entities.add(_utils.NONE)
 
-    table = _utils.matrix_dataframe(entities)
+    pairs = _utils.count_pairs(_generate_entity_pairs(gold, system), include_none=include_none)
+    return (SparseConfusionMatrix if sparse else ConfusionMatrix).from_pairs(entities, pairs)
+
+
+def tabulate_file(gold: bd.BratFile, system: bd.BratFile, *, include_none=False, sparse=False) \
+        -> t.Union[ConfusionMatrix, SparseConfusionMatrix]:
+    """
+    Creates an entity ConfusionMatrix for one document without creating a DataFrame,
+    or a SparseConfusionMatrix if `sparse`.
+    """
+    return tabulate_indexes(_indexes.SpanIndex.from_bratfile(gold), _indexes.SpanIndex.from_bratfile(system),
+                            include_none=include_none, sparse=sparse)
 
-    for g, s in _generate_entity_pairs(gold, system):
-        if not include_none and _utils.NONE in {g, s}:
-            break
-        table.loc[g, s] += 1
 
-    return table
+def count_file(gold: bd.BratFile, system: bd.BratFile, *, include_none=False) -> 'pd.DataFrame':
+    """Creates an entity confusion matrix DataFrame for one document, with gold indices and system columns."""
+    return tabulate_file(gold, system, include_none=include_none).to_dataframe()
+
+
+def tabulate_dataset(gold: bd.BratDataset, system: bd.BratDataset, *, include_none=False, sparse=False, jobs=1) \
+        -> t.Union[ConfusionMatrix, SparseConfusionMatrix]:
+    """
+    Creates an entity ConfusionMatrix for a dataset without creating a DataFrame for each file.
+    If `sparse`, a SparseConfusionMatrix is created instead, which only stores the pairs of labels that occur;
+    this uses much less memory when there are many labels.
+    """
+    start = SparseConfusionMatrix() if sparse else ConfusionMatrix([])
+    return _utils.merge_dataset_results(
+        gold, system, tabulate_file, include_none=include_none, sparse=sparse, start=start, jobs=jobs
+    )
 
 
-def count_dataset(gold: bd.BratDataset, system: bd.BratDataset) -> pd.DataFrame:
+def count_dataset(gold: bd.BratDataset, system: bd.BratDataset) -> 'pd.DataFrame':
     """Creates an entity confusion matrix DataFrame for a dataset with gold indices and system columns."""
     return _utils.merge_dataset_dataframes(gold, system, count_file)
 
@@ -53,12 +76,22 @@ def main():
     parser.add_argument('gold_directory', help='Directory containing the gold ann files')
     parser.add_argument('system_directory', help='Directory containing the system ann files')
     parser.add_argument('-r', '--red', action='store_true', help='Flag to print the results in red')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    parser.add_argument('-s', '--sparse', action='store_true',
+                        help='count only the pairs of labels that occur, which uses less memory for many labels')
+    parser.add_argument('-k', '--top-k', type=int,
+                        help='print the k most common confusions between different labels instead of the full matrix')
     args = parser.parse_args()
 
     gold_dataset = bd.BratDataset.from_directory(args.gold_directory)
     system_dataset = bd.BratDataset.from_directory(args.system_directory)
 
-    result = count_dataset(gold_dataset, system_dataset).to_csv()
+    sparse = args.sparse or args.top_k is not None
+    matrix = tabulate_dataset(gold_dataset, system_dataset, sparse=sparse, jobs=args.jobs)
+    if args.top_k is not None:
+        result = matrix.confusions_dataframe(args.top_k).to_csv()
+    else:
+        result = matrix.to_dataframe().to_csv()
 
     if args.red:
         result = f'\033[1;31;40m{result}\033[m'
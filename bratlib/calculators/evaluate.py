@@ -0,0 +1,243 @@
+"""
+Runs several calculators over the same pair of datasets in one pass.
+Each pair of parallel files is parsed once, and each file's entity, span, and relation indexes are built once and
+shared by every metric that uses them, so evaluating everything costs little more than the slowest metric alone.
+Files that had not been loaded before are released once they have been evaluated, so memory use does not grow with the
+size of the datasets.
+
+The metrics are:
+
+- entity_strict, entity_lenient: see `bratlib.calculators.entity_agreement`
+- entity_confusion: see `bratlib.calculators.entity_confusion_matrix`
+- relation: see `bratlib.calculators.relation_agreement`
+- relation_confusion: see `bratlib.calculators.relation_confusion_matrix`
+- normalization: see `bratlib.calculators.normalization_agreement`
+"""
+
+import argparse
+import typing as t
+from pathlib import Path
+
+from bratlib.calculators import (
+    _indexes, _utils, entity_confusion_matrix, normalization_agreement, relation_agreement, relation_confusion_matrix
+)
+from bratlib.calculators.results import AgreementCounts, ConfusionMatrix
+from bratlib.data import BratDataset, BratFile
+from bratlib.tools.iteration import parallel_map, zip_datasets
+
+Result = t.Union[AgreementCounts, ConfusionMatrix]
+
+
+class FileIndexes:
+    """The indexes of one BratFile, which are created the first time a metric needs them unless `build` is called."""
+
+    def __init__(self, ann: BratFile):
+        self.ann = ann
+        self._entities = None
+        self._spans = None
+        self._relations = None
+
+    @property
+    def entities(self) -> _indexes.EntityIndex:
+        if self._entities is None:
+            self._entities = _indexes.EntityIndex.from_bratfile(self.ann)
+        return self._entities
+
+    @property
+    def spans(self) -> _indexes.SpanIndex:
+        if self._spans is None:
+            self._spans = _indexes.SpanIndex.from_bratfile(self.ann)
+        return self._spans
+
+    @property
+    def relations(self) -> _indexes.RelationIndex:
+        if self._relations is None:
+            self._relations = _indexes.RelationIndex.from_bratfile(self.ann)
+        return self._relations
+
+    def build(self, lenient=False) -> 'FileIndexes':
+        """
+        Creates the entity, span, and relation indexes now, and the lookups for lenient matching if `lenient`; this is
+        needed before the indexes are shared between threads.
+        """
+        if self._entities is None:
+            self._entities = _indexes.EntityIndex.from_bratfile(self.ann)
+        if self._spans is None:
+            self._spans = _indexes.SpanIndex.from_bratfile(self.ann)
+        if self._relations is None:
+            self._relations = _indexes.RelationIndex.from_bratfile(self.ann)
+        if lenient:
+            self._entities.build_groups()
+        return self
+
+
+class DocumentPair:
+    """
+    A gold and a system file, with indexes that are created the first time a metric needs them.
+    `gold_indexes` can be given to reuse the FileIndexes of a gold file for several system files.
+    """
+
+    def __init__(self, gold: BratFile, system: BratFile, gold_indexes: t.Optional[FileIndexes] = None):
+        self.gold = gold
+        self.system = system
+        self.gold_indexes = gold_indexes if gold_indexes is not None else FileIndexes(gold)
+        self.system_indexes = FileIndexes(system)
+
+    @property
+    def gold_entities(self) -> _indexes.EntityIndex:
+        return self.gold_indexes.entities
+
+    @property
+    def system_entities(self) -> _indexes.EntityIndex:
+        return self.system_indexes.entities
+
+    @property
+    def gold_spans(self) -> _indexes.SpanIndex:
+        return self.gold_indexes.spans
+
+    @property
+    def system_spans(self) -> _indexes.SpanIndex:
+        return self.system_indexes.spans
+
+    @property
+    def gold_relations(self) -> _indexes.RelationIndex:
+        return self.gold_indexes.relations
+
+    @property
+    def system_relations(self) -> _indexes.RelationIndex:
+        return self.system_indexes.relations
+
+
+def _entity_strict(pair: DocumentPair) -> AgreementCounts:
+    return AgreementCounts.from_tally(*_indexes.count_strict(pair.gold_entities, pair.system_entities))
+
+
+def _entity_lenient(pair: DocumentPair) -> AgreementCounts:
+    return AgreementCounts.from_tally(*_indexes.count_lenient(pair.gold_entities, pair.system_entities))
+
+
+def _entity_confusion(pair: DocumentPair) -> ConfusionMatrix:
+    return entity_confusion_matrix.tabulate_indexes(pair.gold_spans, pair.system_spans)
+
+
+def _relation(pair: DocumentPair) -> AgreementCounts:
+    return relation_agreement.count_indexes(pair.gold_relations, pair.system_relations)
+
+
+def _relation_confusion(pair: DocumentPair) -> ConfusionMatrix:
+    return relation_confusion_matrix.tabulate_indexes(pair.gold_relations, pair.system_relations)
+
+
+def _normalization(pair: DocumentPair) -> AgreementCounts:
+    return normalization_agreement.count_ann_file(pair.gold, pair.system)
+
+
+class Metric(t.NamedTuple):
+    """A function of a DocumentPair, and a function that creates the empty result its results are added to."""
+    function: t.Callable[[DocumentPair], Result]
+    start: t.Callable[[], Result]
+
+
+METRICS = {
+    'entity_strict': Metric(_entity_strict, AgreementCounts),
+    'entity_lenient': Metric(_entity_lenient, AgreementCounts),
+    'entity_confusion': Metric(_entity_confusion, lambda: ConfusionMatrix([])),
+    'relation': Metric(_relation, AgreementCounts),
+    'relation_confusion': Metric(_relation_confusion, lambda: ConfusionMatrix([])),
+    'normalization': Metric(_normalization, AgreementCounts),
+}
+
+
+def _release(ann: BratFile):
+    """Drops the parsed data of a BratFile, which will be read again if it is accessed."""
+    ann.__dict__.pop('_data_dict', None)
+    ann.__dict__.pop('adjacency', None)
+    ann._mapping.clear()
+
+
+def evaluate_files(gold: BratFile, system: BratFile, metrics: t.Iterable[str] = tuple(METRICS)) \
+        -> t.Dict[str, Result]:
+    """Calculates each of the given metrics for one pair of files."""
+    pair = DocumentPair(gold, system)
+    return {name: METRICS[name].function(pair) for name in metrics}
+
+
+def _evaluate_task(task: t.Tuple[BratFile, BratFile, t.Tuple[str, ...], bool]) -> t.Dict[str, Result]:
+    gold, system, metrics, release = task
+    unloaded = [a for a in (gold, system) if '_data_dict' not in a.__dict__ and not hasattr(a, '_entities')]
+    results = evaluate_files(gold, system, metrics)
+    if release:
+        for ann in unloaded:
+            _release(ann)
+    return results
+
+
+def evaluate(gold_dataset: BratDataset, system_dataset: BratDataset, metrics: t.Iterable[str] = tuple(METRICS), *,
+             jobs=1, release=True) -> t.Dict[str, Result]:
+    """
+    Calculates several metrics with one pass over a pair of datasets
+    :param gold_dataset: The gold version of the predicted dataset
+    :param system_dataset: The predicted dataset
+    :param metrics: names of metrics from METRICS
+    :param jobs: number of processes to compare files in
+    :param release: whether to drop the parsed data of files that had not been loaded before once they have been
+        evaluated; set it to False to keep the datasets parsed for later calculations. Files are parsed in the worker
+        processes if `jobs` is more than one, so in that case they are instead parsed in this process before they
+        are sent to the workers, which only parallelizes the metrics
+    :return: dict of metric name -> AgreementCounts or ConfusionMatrix
+    """
+    metrics = tuple(metrics)
+    unknown = set(metrics) - METRICS.keys()
+    if unknown:
+        raise ValueError(f'unknown metrics: {", ".join(sorted(unknown))}')
+
+    results = {name: METRICS[name].start() for name in metrics}
+    pairs = zip_datasets(gold_dataset, system_dataset)
+    if not release and jobs is not None and jobs > 1:
+        # Workers parse copies of the files, which would be lost with them
+        pairs = ((g.load(), s.load()) for g, s in pairs)
+    tasks = ((g, s, metrics, release) for g, s in pairs)
+    for file_results in parallel_map(_evaluate_task, tasks, jobs):
+        for name, result in file_results.items():
+            results[name] += result
+    return results
+
+
+def report(result: Result, decimal=3) -> str:
+    """Creates the CSV report of a result: scores for AgreementCounts, or the matrix for a ConfusionMatrix."""
+    if isinstance(result, AgreementCounts):
+        scores = _utils.calculate_scores(result.to_dataframe(), macro=True, micro=True)
+        return scores.to_csv(float_format=f'%.{decimal}f')
+    return result.to_dataframe().to_csv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calculates several metrics between two datasets in one pass')
+    parser.add_argument('gold_directory', help='First data folder path (gold)')
+    parser.add_argument('system_directory', help='Second data folder path (system)')
+    parser.add_argument('-m', '--metrics', nargs='+', choices=list(METRICS), default=list(METRICS),
+                        help='metrics to calculate (defaults to all of them)')
+    parser.add_argument('-o', '--output', help='directory to write one CSV file per metric to, '
+                                               'instead of printing every report')
+    parser.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    gold_dataset = BratDataset.from_directory(args.gold_directory)
+    system_dataset = BratDataset.from_directory(args.system_directory)
+
+    results = evaluate(gold_dataset, system_dataset, args.metrics, jobs=args.jobs)
+
+    if args.output is not None:
+        output = Path(args.output)
+        output.mkdir(parents=True, exist_ok=True)
+        for name, result in results.items():
+            (output / f'{name}.csv').write_text(report(result, args.decimal))
+    else:
+        for name, result in results.items():
+            print(f'# {name}')
+            print(report(result, args.decimal))
+
+
+if __name__ == '__main__':
+    main()
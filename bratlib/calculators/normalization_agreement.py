@@ -0,0 +1,98 @@
+"""
+Inter-dataset agreement calculator for normalization annotations, such as the results of entity linking.
+A system normalization is a true positive if the gold dataset has a normalization to the same ontology and ID for an
+entity with the same span. Counts are given per ontology, or per ontology and entity tag, in which case the entity
+tags must match as well. Normalizations are joined on their keys, so comparing two files takes linear time in the
+number of normalizations.
+"""
+
+import argparse
+import typing as t
+from collections import Counter
+
+from bratlib.calculators import _indexes, _utils
+from bratlib.calculators.results import AgreementCounts
+from bratlib.data import BratDataset, BratFile, Normalization
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+
+def _label(norm: Normalization, by_tag: bool) -> str:
+    return f'{norm.ontology}/{norm.entity.tag}' if by_tag else norm.ontology
+
+
+def _match_key(norm: Normalization, by_tag: bool) -> tuple:
+    """Normalizations match if their entities have the same span, and tag if `by_tag`, and they have the same ID."""
+    tag, start, end, _ = _indexes.entity_key(norm.entity)
+    return (start, end, norm.ontology, norm.ont_id) + ((tag,) if by_tag else ())
+
+
+def _index(ann: BratFile, by_tag: bool) -> t.Dict[tuple, str]:
+    """Creates a mapping of match key -> label for the normalizations of one file."""
+    return {_match_key(n, by_tag): _label(n, by_tag) for n in ann.normalizations}
+
+
+def count_ann_file(ann_1: BratFile, ann_2: BratFile, *, by_tag=False) -> AgreementCounts:
+    """
+    Calculates ontology level measurements for two parallel ann files without creating a DataFrame
+    :param ann_1: the gold ann file
+    :param ann_2: the system ann file
+    :param by_tag: if counts should be given per ontology and entity tag, as 'ontology/tag'
+    :return: AgreementCounts of ontology -> Counts
+    """
+    gold = _index(ann_1, by_tag)
+    system = _index(ann_2, by_tag)
+
+    tp = Counter(label for key, label in gold.items() if key in system)
+    fn = Counter(label for key, label in gold.items() if key not in system)
+    fp = Counter(label for key, label in system.items() if key not in gold)
+
+    return AgreementCounts.from_tally(tp, fp, fn)
+
+
+def measure_ann_file(ann_1: BratFile, ann_2: BratFile, *, by_tag=False) -> 'pd.DataFrame':
+    """
+    Calculates ontology level measurements for two parallel ann files; it does not score them
+    :param ann_1: the gold ann file
+    :param ann_2: the system ann file
+    :param by_tag: if counts should be given per ontology and entity tag, as 'ontology/tag'
+    :return: a DataFrame of 'tag' -> ('tp', 'fp', 'tn', 'fn'), where the index holds the ontologies
+    """
+    return count_ann_file(ann_1, ann_2, by_tag=by_tag).to_dataframe()
+
+
+def count_dataset(gold_dataset: BratDataset, system_dataset: BratDataset, *, by_tag=False, jobs=1) \
+        -> AgreementCounts:
+    """
+    Measures the true positive, false positive, and false negative counts for a directory of predictions
+    :param gold_dataset: The gold version of the predicted dataset
+    :param system_dataset: The predicted dataset
+    :param by_tag: if counts should be given per ontology and entity tag, as 'ontology/tag'
+    :param jobs: number of processes to compare files in
+    :return: AgreementCounts of ontology -> Counts
+    """
+    return _utils.merge_dataset_results(
+        gold_dataset, system_dataset, count_ann_file, by_tag=by_tag, start=AgreementCounts(), jobs=jobs
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inter-dataset agreement calculator for normalizations')
+    parser.add_argument('gold_directory', help='First data folder path (gold)')
+    parser.add_argument('system_directory', help='Second data folder path (system)')
+    parser.add_argument('-t', '--by-tag', action='store_true', help='give scores per ontology and entity tag')
+    parser.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    gold_dataset = BratDataset.from_directory(args.gold_directory)
+    system_dataset = BratDataset.from_directory(args.system_directory)
+
+    measures = count_dataset(gold_dataset, system_dataset, by_tag=args.by_tag, jobs=args.jobs).to_dataframe()
+    scores = _utils.calculate_scores(measures, macro=True, micro=True)
+    print(scores.to_csv(float_format=f'%.{args.decimal}f'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Inter-dataset agreement calculator for entity annotations with partial matching by overlap ratio.
+The overlap ratio of two spans is the length of their intersection divided by the length of their union
+(intersection over union, or IoU), where each entity spans from its first start offset to its last end offset.
+A system entity can be matched to a gold entity of the same tag if their overlap ratio is at least a given threshold;
+mentions are not compared. Each entity is matched at most once.
+
+With greedy assignment, the pairs with the highest overlap ratios are matched first. With optimal assignment,
+as many pairs as possible are matched. Because the overlap ratios are calculated once per document and tag,
+counts for several thresholds can be calculated in one pass to create a score curve.
+"""
+
+import argparse
+import typing as t
+from collections import Counter, deque
+
+from bratlib.calculators import _indexes, _utils
+from bratlib.calculators.results import AgreementCounts, AgreementCurve
+from bratlib.data import BratDataset, BratFile
+
+if t.TYPE_CHECKING:
+    import numpy as np
+
+ASSIGNMENTS = ('greedy', 'optimal')
+
+DEFAULT_THRESHOLDS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+# Upper bound on the size of the blocks of the overlap ratio matrix that are held in memory at once
+_BLOCK_SIZE = 1 << 20
+
+
+def overlap_ratios(gold_spans: 'np.ndarray', system_spans: 'np.ndarray') -> 'np.ndarray':
+    """
+    Calculates the overlap ratio of every pair of spans.
+    :param gold_spans: array of shape (n, 2) of start and end offsets
+    :param system_spans: array of shape (m, 2) of start and end offsets
+    :return: array of shape (n, m) where [i, j] is the overlap ratio of gold_spans[i] and system_spans[j]
+    """
+    import numpy as np
+
+    gold_starts, gold_ends = gold_spans[:, :1], gold_spans[:, 1:]
+    system_starts, system_ends = system_spans[:, 0], system_spans[:, 1]
+
+    intersection = np.minimum(gold_ends, system_ends) - np.maximum(gold_starts, system_starts)
+    np.maximum(intersection, 0, out=intersection)
+    union = (gold_ends - gold_starts) + (system_ends - system_starts) - intersection
+
+    ratios = np.zeros(intersection.shape)
+    np.divide(intersection, union, out=ratios, where=union > 0)
+    # Identical empty spans have no union, but are still a perfect match
+    ratios[(union == 0) & (gold_starts == system_starts)] = 1.0
+    return ratios
+
+
+def overlapping_pairs(gold_spans: 'np.ndarray', system_spans: 'np.ndarray', min_ratio: float) \
+        -> t.Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """
+    Finds every pair of spans that overlap with a ratio of at least `min_ratio`.
+    :return: the gold positions, system positions, and overlap ratios of the pairs, sorted from the highest ratio
+    to the lowest, then by position
+    """
+    import numpy as np
+
+    rows = max(1, _BLOCK_SIZE // max(1, len(system_spans)))
+    gold_positions, system_positions, ratios = [], [], []
+
+    for first_row in range(0, len(gold_spans), rows):
+        block = overlap_ratios(gold_spans[first_row:first_row + rows], system_spans)
+        g, s = np.nonzero((block >= min_ratio) & (block > 0))
+        gold_positions.append(g + first_row)
+        system_positions.append(s)
+        ratios.append(block[g, s])
+
+    if not ratios:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, np.zeros(0)
+
+    g, s, r = np.concatenate(gold_positions), np.concatenate(system_positions), np.concatenate(ratios)
+    order = np.lexsort((s, g, -r))
+    return g[order], s[order], r[order]
+
+
+def _greedy_matches(gold_positions: 'np.ndarray', system_positions: 'np.ndarray', ratios: 'np.ndarray',
+                    thresholds: t.Sequence[float]) -> t.List[int]:
+    """
+    Matches pairs from the highest overlap ratio to the lowest, skipping pairs where either entity has already been
+    matched. The matches at a threshold are those made before the ratios fall below it, so every threshold is counted
+    from one pass.
+    """
+    import numpy as np
+
+    matched_gold, matched_system = set(), set()
+    matched_ratios = []
+    for g, s, r in zip(gold_positions.tolist(), system_positions.tolist(), ratios.tolist()):
+        if g in matched_gold or s in matched_system:
+            continue
+        matched_gold.add(g)
+        matched_system.add(s)
+        matched_ratios.append(r)
+
+    # matched_ratios is in descending order
+    ascending = matched_ratios[::-1]
+    return [len(ascending) - int(np.searchsorted(ascending, th, side='left')) for th in thresholds]
+
+
+def _maximum_matching(gold_positions: t.List[int], system_positions: t.List[int]) -> int:
+    """Finds the size of a maximum matching of a bipartite graph with augmenting paths."""
+    edges = {}
+    for g, s in zip(gold_positions, system_positions):
+        edges.setdefault(g, []).append(s)
+
+    system_match = {}  # system position -> gold position
+    size = 0
+    for root in edges:
+        # Breadth first search for an alternating path from this gold entity to an unmatched system entity
+        parents = {}  # system position -> gold position it was reached from
+        queue = deque([root])
+        end = None
+        while queue and end is None:
+            g = queue.popleft()
+            for s in edges[g]:
+                if s in parents:
+                    continue
+                parents[s] = g
+                if s not in system_match:
+                    end = s
+                    break
+                queue.append(system_match[s])
+
+        if end is None:
+            continue
+
+        # Flip the path
+        size += 1
+        gold_match = {v: k for k, v in system_match.items()}
+        s = end
+        while s is not None:
+            g = parents[s]
+            previous = gold_match.get(g)
+            system_match[s] = g
+            s = previous
+
+    return size
+
+
+def _optimal_matches(gold_positions: 'np.ndarray', system_positions: 'np.ndarray', ratios: 'np.ndarray',
+                     thresholds: t.Sequence[float]) -> t.List[int]:
+    """Finds the largest number of pairs that can be matched at each threshold."""
+    counts = []
+    for th in thresholds:
+        keep = ratios >= th
+        counts.append(_maximum_matching(gold_positions[keep].tolist(), system_positions[keep].tolist()))
+    return counts
+
+
+_ASSIGNERS = {'greedy': _greedy_matches, 'optimal': _optimal_matches}
+
+
+def _spans_by_tag(index: _indexes.EntityIndex) -> t.Dict[str, 'np.ndarray']:
+    import numpy as np
+
+    by_tag = {}
+    for tag, start, end, _ in sorted(index.key_set, key=lambda k: k[1:]):
+        by_tag.setdefault(tag, []).append((start, end))
+    return {tag: np.array(spans, dtype=np.int64) for tag, spans in by_tag.items()}
+
+
+def _check_arguments(thresholds: t.Sequence[float], assignment: str):
+    if assignment not in ASSIGNMENTS:
+        raise ValueError("assignment must be 'greedy' or 'optimal'")
+    if not thresholds or not all(0 <= th <= 1 for th in thresholds):
+        raise ValueError('thresholds must be between 0 and 1')
+
+
+def count_curve_ann_file(ann_1: BratFile, ann_2: BratFile, thresholds: t.Sequence[float] = DEFAULT_THRESHOLDS,
+                         assignment='greedy') -> AgreementCurve:
+    """
+    Calculates tag level measurements for two parallel ann files at several overlap ratio thresholds
+    :param ann_1: the gold ann file
+    :param ann_2: the system ann file
+    :param thresholds: the minimum overlap ratios for a match
+    :param assignment: 'greedy' or 'optimal'
+    :return: AgreementCurve of threshold -> tag -> Counts
+    """
+    thresholds = sorted(set(thresholds))
+    _check_arguments(thresholds, assignment)
+
+    gold = _spans_by_tag(_indexes.EntityIndex.from_bratfile(ann_1))
+    system = _spans_by_tag(_indexes.EntityIndex.from_bratfile(ann_2))
+    tps = [Counter() for _ in thresholds]
+
+    for tag in gold.keys() & system.keys():
+        pairs = overlapping_pairs(gold[tag], system[tag], thresholds[0])
+        for tp, count in zip(tps, _ASSIGNERS[assignment](*pairs, thresholds)):
+            tp[tag] = count
+
+    gold_sizes = Counter({tag: len(spans) for tag, spans in gold.items()})
+    system_sizes = Counter({tag: len(spans) for tag, spans in system.items()})
+    return AgreementCurve({
+        th: AgreementCounts.from_tally(tp, system_sizes - tp, gold_sizes - tp)
+        for th, tp in zip(thresholds, tps)
+    })
+
+
+def count_ann_file(ann_1: BratFile, ann_2: BratFile, threshold=0.5, assignment='greedy') -> AgreementCounts:
+    """
+    Calculates tag level measurements for two parallel ann files at one overlap ratio threshold
+    :param ann_1: the gold ann file
+    :param ann_2: the system ann file
+    :param threshold: the minimum overlap ratio for a match
+    :param assignment: 'greedy' or 'optimal'
+    :return: AgreementCounts of tag -> Counts
+    """
+    return count_curve_ann_file(ann_1, ann_2, [threshold], assignment)[threshold]
+
+
+def count_curve_dataset(gold_dataset: BratDataset, system_dataset: BratDataset,
+                        thresholds: t.Sequence[float] = DEFAULT_THRESHOLDS, assignment='greedy', *, jobs=1) \
+        -> AgreementCurve:
+    """
+    Measures the true positive, false positive, and false negative counts for a directory of predictions
+    at several overlap ratio thresholds
+    :param gold_dataset: The gold version of the predicted dataset
+    :param system_dataset: The predicted dataset
+    :param thresholds: the minimum overlap ratios for a match
+    :param assignment: 'greedy' or 'optimal'
+    :param jobs: number of processes to compare files in
+    :return: AgreementCurve of threshold -> tag -> Counts
+    """
+    thresholds = sorted(set(thresholds))
+    _check_arguments(thresholds, assignment)
+
+    return _utils.merge_dataset_results(
+        gold_dataset, system_dataset, count_curve_ann_file, thresholds, assignment, start=AgreementCurve(), jobs=jobs
+    )
+
+
+def count_dataset(gold_dataset: BratDataset, system_dataset: BratDataset, threshold=0.5, assignment='greedy', *,
+                  jobs=1) -> AgreementCounts:
+    """
+    Measures the true positive, false positive, and false negative counts for a directory of predictions
+    at one overlap ratio threshold
+    :param gold_dataset: The gold version of the predicted dataset
+    :param system_dataset: The predicted dataset
+    :param threshold: the minimum overlap ratio for a match
+    :param assignment: 'greedy' or 'optimal'
+    :param jobs: number of processes to compare files in
+    :return: AgreementCounts of tag -> Counts
+    """
+    curve = count_curve_dataset(gold_dataset, system_dataset, [threshold], assignment, jobs=jobs)
+    return curve.get(threshold, AgreementCounts())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inter-dataset agreement calculator for entities by overlap ratio')
+    parser.add_argument('gold_directory', help='First data folder path (gold)')
+    parser.add_argument('system_directory', help='Second data folder path (system)')
+    parser.add_argument('-t', '--thresholds', type=float, nargs='+', default=[0.5],
+                        help='minimum overlap ratio(s) for a match (defaults to 0.5); '
+                             'with more than one, micro scores are printed for each')
+    parser.add_argument('-a', '--assignment', default='greedy', help='greedy or optimal (defaults to greedy)')
+    parser.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    gold_dataset = BratDataset.from_directory(args.gold_directory)
+    system_dataset = BratDataset.from_directory(args.system_directory)
+
+    curve = count_curve_dataset(gold_dataset, system_dataset, args.thresholds, args.assignment, jobs=args.jobs)
+
+    if len(curve) == 1:
+        counts, = curve.values()
+        table = _utils.calculate_scores(counts.to_dataframe(), macro=True, micro=True)
+    else:
+        table = curve.to_dataframe()
+    print(table.to_csv(float_format=f'%.{args.decimal}f'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Inter-annotator agreement calculator for entity annotations across more than two annotators
+Every annotator's dataset is read and indexed once, and the indexes are then compared for every pair of annotators,
+using the same strict and lenient settings as `bratlib.calculators.entity_agreement`. For any pair, the first
+annotator is treated as gold and the second as system; strict counts for the reverse pair are obtained by swapping
+the false positive and false negative counts rather than comparing the documents again.
+"""
+
+import argparse
+import typing as t
+from collections import Counter
+from itertools import combinations, permutations
+
+from bratlib.calculators import _indexes, _utils
+from bratlib.calculators.results import AgreementCounts
+from bratlib.data import BratDataset
+from bratlib.tools.iteration import parallel_map
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+# Set in each worker process by _init_worker, so that the indexes are not sent once per pair
+_dataset_indexes: t.List[t.Dict[str, _indexes.EntityIndex]] = []
+
+
+def index_dataset(dataset: BratDataset) -> t.Dict[str, _indexes.EntityIndex]:
+    """Creates a mapping of BratFile name -> EntityIndex for every BratFile in the dataset."""
+    return {ann.name: _indexes.EntityIndex.from_bratfile(ann) for ann in dataset}
+
+
+def _init_worker(dataset_indexes):
+    global _dataset_indexes
+    _dataset_indexes = dataset_indexes
+
+
+def _tally_pair(task: t.Tuple[int, int, str]) -> _indexes.AgreementTally:
+    i, j, mode = task
+    gold, system = _dataset_indexes[i], _dataset_indexes[j]
+    counter = _indexes.COUNTERS[mode]
+    tp, fp, fn = Counter(), Counter(), Counter()
+
+    for name in sorted(gold.keys() & system.keys()):
+        file_tp, file_fp, file_fn = counter(gold[name], system[name])
+        tp.update(file_tp)
+        fp.update(file_fp)
+        fn.update(file_fn)
+
+    return tp, fp, fn
+
+
+def _default_names(datasets: t.Sequence[BratDataset]) -> t.List[str]:
+    names = [ds.directory.name for ds in datasets]
+    if len(set(names)) == len(names):
+        return names
+    return [str(ds.directory) for ds in datasets]
+
+
+def count_pairwise(datasets: t.Sequence[BratDataset], mode='strict', *,
+                   names: t.Optional[t.Sequence[str]] = None, jobs=1) -> t.Dict[t.Tuple[str, str], AgreementCounts]:
+    """
+    Measures the true positive, false positive, and false negative counts between every ordered pair of datasets.
+    Only the documents that appear in both datasets of a pair are compared.
+    :param datasets: BratDatasets of the same documents, one per annotator
+    :param mode: 'strict' or 'lenient'
+    :param names: names for the annotators, defaults to the names of the dataset directories
+    :param jobs: number of processes to compare pairs in
+    :return: a dict of (gold name, system name) -> AgreementCounts
+    """
+    if mode not in _utils.MODES:
+        raise ValueError("mode must be 'strict' or 'lenient'")
+
+    names = list(names) if names is not None else _default_names(datasets)
+    if len(names) != len(datasets):
+        raise ValueError('There must be exactly one name for each dataset')
+
+    dataset_indexes = [index_dataset(ds) for ds in datasets]
+
+    if mode == 'strict':
+        tasks = [(i, j, mode) for i, j in combinations(range(len(datasets)), 2)]
+    else:
+        tasks = [(i, j, mode) for i, j in permutations(range(len(datasets)), 2)]
+
+    results = {}
+    tallies = parallel_map(_tally_pair, tasks, jobs, initializer=_init_worker, initargs=(dataset_indexes,))
+
+    for (i, j, _), (tp, fp, fn) in zip(tasks, tallies):
+        results[names[i], names[j]] = AgreementCounts.from_tally(tp, fp, fn)
+        if mode == 'strict':
+            results[names[j], names[i]] = AgreementCounts.from_tally(tp, fn, fp)
+
+    return results
+
+
+def measure_pairwise(datasets: t.Sequence[BratDataset], mode='strict', *,
+                     names: t.Optional[t.Sequence[str]] = None, jobs=1) -> t.Dict[t.Tuple[str, str], 'pd.DataFrame']:
+    """
+    Like `count_pairwise`, but returns a dict of (gold name, system name) -> DataFrame of
+    'tag' -> ('tp', 'fp', 'tn', 'fn').
+    """
+    pairwise = count_pairwise(datasets, mode, names=names, jobs=jobs)
+    return {pair: counts.to_dataframe() for pair, counts in pairwise.items()}
+
+
+def agreement_matrix(pairwise: t.Mapping[t.Tuple[str, str], AgreementCounts]) -> 'pd.DataFrame':
+    """
+    Given the output of `count_pairwise`, creates a DataFrame of micro F1 scores with the annotator treated as gold
+    in the index and the annotator treated as system in the columns.
+    """
+    import pandas as pd
+
+    names = list(dict.fromkeys(name for pair in pairwise for name in pair))
+    matrix = pd.DataFrame(1.0, index=pd.Index(names, name='gold'), columns=pd.Index(names, name='system'))
+
+    for (gold, system), counts in pairwise.items():
+        total = counts.total()
+        matrix.loc[gold, system] = total.f1 if total.tp + total.fp + total.fn else 1.0
+
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pairwise inter-annotator agreement calculator for entities')
+    parser.add_argument('directories', nargs='+', help='Data folder paths, one per annotator')
+    parser.add_argument('-m', '--mode', default='strict', help='strict or lenient (defaults to strict)')
+    parser.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    if len(args.directories) < 2:
+        parser.error('at least two directories are required')
+
+    datasets = [BratDataset.from_directory(d) for d in args.directories]
+    pairwise = count_pairwise(datasets, args.mode, jobs=args.jobs)
+    print(agreement_matrix(pairwise).to_csv(float_format=f'%.{args.decimal}f'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+The calculators that can be run by name on a gold and a system dataset, such as by `bratlib batch` and
+`bratlib shard`. Calculator modules are only imported when they are looked up.
+"""
+
+import importlib
+import json
+import typing as t
+
+# Calculators by name, as (module, function of a gold and a system dataset)
+CALCULATORS = {
+    'entity-agreement': ('bratlib.calculators.entity_agreement', 'count_dataset'),
+    'entity-confusion-matrix': ('bratlib.calculators.entity_confusion_matrix', 'tabulate_dataset'),
+    'evaluate': ('bratlib.calculators.evaluate', 'evaluate'),
+    'normalization-agreement': ('bratlib.calculators.normalization_agreement', 'count_dataset'),
+    'overlap-agreement': ('bratlib.calculators.overlap_agreement', 'count_dataset'),
+    'relation-agreement': ('bratlib.calculators.relation_agreement', 'count_dataset'),
+    'relation-confusion-matrix': ('bratlib.calculators.relation_confusion_matrix', 'tabulate_dataset'),
+}
+
+
+def get_calculator(name: str) -> t.Callable:
+    """The dataset level function of a calculator in CALCULATORS; raises ValueError for an unknown name."""
+    if name not in CALCULATORS:
+        raise ValueError(f'unknown calculator {name!r}')
+    module, function = CALCULATORS[name]
+    return getattr(importlib.import_module(module), function)
+
+
+def option_value(value: str) -> t.Any:
+    """Reads the value of an option as JSON, or as a string if it isn't valid JSON."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
@@ -1,63 +1,84 @@
 import argparse
-from copy import deepcopy
-from itertools import product
+import typing as t
+from collections import Counter
 
-import pandas as pd
-
-from bratlib.calculators import _utils
+from bratlib.calculators import _indexes, _utils
+from bratlib.calculators.results import AgreementCounts
 from bratlib.data import BratDataset, BratFile
-from bratlib.data.extensions.annotation_types import ContigEntity
 
+if t.TYPE_CHECKING:
+    import pandas as pd
 
-def _ent_equals(a: ContigEntity, b: ContigEntity):
-    return (a.tag, a.start, a.end) == (b.tag, b.start, b.end)
 
+def _agreement_key(key: _indexes.RelationKey) -> tuple:
+    """Relations are counted once for each relation tag and pair of arguments, as keyed by `entity_key`."""
+    relation, arg1, arg2 = key
+    return relation, _indexes.identity_to_key(arg1), _indexes.identity_to_key(arg2)
 
-def measure_ann_file(ann_1: BratFile, ann_2: BratFile) -> pd.DataFrame:
-    """
-    Calculates tag level measurements for two parallel ann files; it does not score them
-    :param ann_1: path to the gold ann file
-    :param ann_2: path to the system ann file
-    :return: a DataFrame of 'tag' -> ('tp', 'fp', 'tn', 'fn')
-    """
-    gold_rels = list(deepcopy(ann_1.relations))
-    system_rels = list(deepcopy(ann_2.relations))
 
-    for r in (gold_rels + system_rels):
-        r.arg1.__class__ = ContigEntity
-        r.arg2.__class__ = ContigEntity
+def _match_key(key: tuple) -> tuple:
+    """Relations match if they have the same tag and their arguments have the same tags and spans."""
+    relation, arg1, arg2 = key
+    return relation, arg1[:3], arg2[:3]
 
-    table = pd.DataFrame(
-        columns=['tp', 'fp', 'tn', 'fn'],
-        index=pd.Index({r.relation for r in gold_rels} | {r.relation for r in system_rels}, name='tag').sort_values()
-    ).fillna(0)
 
-    gold_are_matched = {r: False for r in gold_rels}
-    sys_are_matched = {r: False for r in system_rels}
+def count_indexes(gold: _indexes.RelationIndex, system: _indexes.RelationIndex) -> AgreementCounts:
+    """Calculates tag level measurements from the relation indexes of two parallel ann files; see `count_ann_file`."""
+    gold_rels = {_agreement_key(k) for k in gold.key_set}
+    system_rels = {_agreement_key(k) for k in system.key_set}
 
-    for g, s in product(gold_rels, system_rels):
+    gold_matches = {_match_key(k) for k in gold_rels}
+    system_matches = {_match_key(k) for k in system_rels}
 
-        if not (_ent_equals(g.arg1, s.arg1) and _ent_equals(g.arg2, s.arg2)):
-            continue
+    tp, fn = Counter(), Counter()
+    for k in gold_rels:
+        if _match_key(k) in system_matches:
+            tp[k[0]] += 1
+        else:
+            # Every gold relationship that doesn't have a match means there's a missing match--a false negative
+            fn[k[0]] += 1
 
-        if g.relation != s.relation:
-            continue
+    # Every system relationship that doesn't have a match was incorrect--a false positive
+    fp = Counter(k[0] for k in system_rels if _match_key(k) not in gold_matches)
 
-        if not gold_are_matched[g]:
-            table.loc[g.relation, 'tp'] += 1
+    return AgreementCounts.from_tally(tp, fp, fn)
 
-        gold_are_matched[g] = sys_are_matched[s] = True
 
-    # Every gold relationship that doesn't have a match means there's a missing match--a false negative
-    table['fn'] += pd.Series(r.relation for r, b in gold_are_matched.items() if not b).value_counts()
+def count_ann_file(ann_1: BratFile, ann_2: BratFile) -> AgreementCounts:
+    """
+    Calculates tag level measurements for two parallel ann files without creating a DataFrame
+    :param ann_1: path to the gold ann file
+    :param ann_2: path to the system ann file
+    :return: AgreementCounts of tag -> Counts
+    """
+    return count_indexes(_indexes.RelationIndex.from_bratfile(ann_1), _indexes.RelationIndex.from_bratfile(ann_2))
 
-    # Every system relationship that doesn't have a match was incorrect--a false positive
-    table['fp'] += pd.Series(r.relation for r, b in sys_are_matched.items() if not b).value_counts()
 
-    return table.fillna(0).astype(int)
+def measure_ann_file(ann_1: BratFile, ann_2: BratFile) -> 'pd.DataFrame':
+    """
+    Calculates tag level measurements for two parallel ann files; it does not score them
+    :param ann_1: path to the gold ann file
+    :param ann_2: path to the system ann file
+    :return: a DataFrame of 'tag' -> ('tp', 'fp', 'tn', 'fn')
+    """
+    return count_ann_file(ann_1, ann_2).to_dataframe()
+
+
+def count_dataset(gold_dataset: BratDataset, system_dataset: BratDataset, *, jobs=1) -> AgreementCounts:
+    """
+    Measures the true positive, false positive, and false negative counts for a directory of predictions
+    without creating a DataFrame for each file
+    :param gold_dataset: The gold version of the predicted dataset
+    :param system_dataset: The predicted dataset
+    :param jobs: number of processes to compare files in
+    :return: AgreementCounts of tag -> Counts
+    """
+    return _utils.merge_dataset_results(
+        gold_dataset, system_dataset, count_ann_file, start=AgreementCounts(), jobs=jobs
+    )
 
 
-def measure_dataset(gold_dataset: BratDataset, system_dataset: BratDataset) -> pd.DataFrame:
+def measure_dataset(gold_dataset: BratDataset, system_dataset: BratDataset) -> 'pd.DataFrame':
     """
     Measures the true positive, false positive, and false negative counts for a directory of predictions
     :param gold_dataset: The gold version of the predicted dataset
@@ -72,12 +93,13 @@ def main():
     parser.add_argument('gold_directory', help='First data folder path (gold)')
     parser.add_argument('system_directory', help='Second data folder path (system)')
     parser.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
     args = parser.parse_args()
 
     gold_dataset = BratDataset.from_directory(args.gold_directory)
     system_dataset = BratDataset.from_directory(args.system_directory)
 
-    measures = measure_dataset(gold_dataset, system_dataset)
+    measures = count_dataset(gold_dataset, system_dataset, jobs=args.jobs).to_dataframe()
     scores = _utils.calculate_scores(measures, macro=True, micro=True)
     print(scores.to_csv(float_format=f'%.{args.decimal}f'))
 
@@ -1,48 +1,77 @@
 import argparse
 import typing as t
-from itertools import product
-
-import pandas as pd
 
 from bratlib import data as bd
-from bratlib.calculators import _utils
+from bratlib.calculators import _indexes, _utils
+from bratlib.calculators.results import ConfusionMatrix, SparseConfusionMatrix
+
+if t.TYPE_CHECKING:
+    import pandas as pd
 
 
-def _generate_relationship_pairs(gold: bd.BratFile, system: bd.BratFile) -> t.Iterable[t.Tuple[str, str]]:
+def _generate_relationship_pairs(gold: _indexes.RelationIndex, system: _indexes.RelationIndex) \
+        -> t.Iterable[t.Tuple[str, str]]:
     """
     Generates tuples of relationship tags for which the entities are the same.
     When these pairs are exhausted, it generates tuples for all unmatched entities with 'NONE'.
     The first element of the tuple is gold, the second is system.
     """
-    gold_match = {g: False for g in gold.relations}
-    sys_match = {s: False for s in system.relations}
+    gold_match = dict.fromkeys(gold.keys, False)
+    sys_match = dict.fromkeys(system.keys, False)
 
-    for g, s in product(gold.relations, system.relations):
-        if (g.arg1, g.arg2) == (s.arg1, s.arg2):
+    sys_by_args = {}
+    for s in system.keys:
+        sys_by_args.setdefault(s[1:], []).append(s)
+
+    for g in gold.keys:
+        for s in sys_by_args.get(g[1:], ()):
             gold_match[g] = sys_match[s] = True
-            yield (g.relation, s.relation)
+            yield (g[0], s[0])
 
-    yield from ((_utils.NONE, s.relation) for s, b in sys_match.items() if not b)
-    yield from ((g.relation, _utils.NONE) for g, b in gold_match.items() if not b)
+    yield from ((_utils.NONE, s[0]) for s, b in sys_match.items() if not b)
+    yield from ((g[0], _utils.NONE) for g, b in gold_match.items() if not b)
 
 
-def count_file(gold: bd.BratFile, system: bd.BratFile, *, include_none=False) -> pd.DataFrame:
-    """Creates a relation confusion matrix DataFrame for one document, with gold indices and system columns."""
-    relations = {r.relation for r in gold.relations} | {r.relation for r in system.relations}
+def tabulate_indexes(gold: _indexes.RelationIndex, system: _indexes.RelationIndex, *, include_none=False,
+                     sparse=False) -> t.Union[ConfusionMatrix, SparseConfusionMatrix]:
+    """Creates a relation ConfusionMatrix from the relation indexes of two parallel ann files; see `tabulate_file`."""
+    relations = gold.relations | system.relations
     if include_none:
         relations.add(_utils.NONE)
 
-    table = _utils.matrix_dataframe(relations)
+    pairs = _utils.count_pairs(_generate_relationship_pairs(gold, system), include_none=include_none)
+    return (SparseConfusionMatrix if sparse else ConfusionMatrix).from_pairs(relations, pairs)
 
-    for g, s in _generate_relationship_pairs(gold, system):
-        if not include_none and _utils.NONE in {g, s}:
-            break
-        table.loc[g, s] += 1
 
-    return table
+def tabulate_file(gold: bd.BratFile, system: bd.BratFile, *, include_none=False, sparse=False) \
+        -> t.Union[ConfusionMatrix, SparseConfusionMatrix]:
+    """
+    Creates a relation ConfusionMatrix for one document without creating a DataFrame,
+    or a SparseConfusionMatrix if `sparse`.
+    """
+    return tabulate_indexes(_indexes.RelationIndex.from_bratfile(gold), _indexes.RelationIndex.from_bratfile(system),
+                            include_none=include_none, sparse=sparse)
+
+
+def count_file(gold: bd.BratFile, system: bd.BratFile, *, include_none=False) -> 'pd.DataFrame':
+    """Creates a relation confusion matrix DataFrame for one document, with gold indices and system columns."""
+    return tabulate_file(gold, system, include_none=include_none).to_dataframe()
+
+
+def tabulate_dataset(gold: bd.BratDataset, system: bd.BratDataset, *, include_none=False, sparse=False, jobs=1) \
+        -> t.Union[ConfusionMatrix, SparseConfusionMatrix]:
+    """
+    Creates a relation ConfusionMatrix for a dataset without creating a DataFrame for each file.
+    If `sparse`, a SparseConfusionMatrix is created instead, which only stores the pairs of labels that occur;
+    this uses much less memory when there are many labels.
+    """
+    start = SparseConfusionMatrix() if sparse else ConfusionMatrix([])
+    return _utils.merge_dataset_results(
+        gold, system, tabulate_file, include_none=include_none, sparse=sparse, start=start, jobs=jobs
+    )
 
 
-def count_dataset(gold: bd.BratDataset, system: bd.BratDataset) -> pd.DataFrame:
+def count_dataset(gold: bd.BratDataset, system: bd.BratDataset) -> 'pd.DataFrame':
     """Creates a relation confusion matrix DataFrame for a dataset with gold indices and system columns."""
     return _utils.merge_dataset_dataframes(gold, system, count_file)
 
@@ -51,12 +80,22 @@ def main():
     parser = argparse.ArgumentParser(description='Creates a confusion matrix for relations between two datasets')
     parser.add_argument('gold_directory', help='Directory containing the gold ann files')
     parser.add_argument('system_directory', help='Directory containing the system ann files')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    parser.add_argument('-s', '--sparse', action='store_true',
+                        help='count only the pairs of labels that occur, which uses less memory for many labels')
+    parser.add_argument('-k', '--top-k', type=int,
+                        help='print the k most common confusions between different labels instead of the full matrix')
     args = parser.parse_args()
 
     gold_dataset = bd.BratDataset.from_directory(args.gold_directory)
     system_dataset = bd.BratDataset.from_directory(args.system_directory)
 
-    print(count_dataset(gold_dataset, system_dataset).to_csv())
+    sparse = args.sparse or args.top_k is not None
+    matrix = tabulate_dataset(gold_dataset, system_dataset, sparse=sparse, jobs=args.jobs)
+    if args.top_k is not None:
+        print(matrix.confusions_dataframe(args.top_k).to_csv())
+    else:
+        print(matrix.to_dataframe().to_csv())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,384 @@
+"""
+Lightweight result types for the calculators.
+These hold plain integer counts, can be added together to merge the results of several documents,
+and only import pandas when they are converted to DataFrames.
+"""
+
+import heapq
+import typing as t
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+COLUMNS = ('tp', 'fp', 'tn', 'fn')
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return numerator / denominator if denominator else float('nan')
+
+
+@dataclass
+class Counts:
+    """Binary classification counts for one tag."""
+    tp: int = 0
+    fp: int = 0
+    tn: int = 0
+    fn: int = 0
+
+    def __add__(self, other: 'Counts') -> 'Counts':
+        return Counts(self.tp + other.tp, self.fp + other.fp, self.tn + other.tn, self.fn + other.fn)
+
+    def __iadd__(self, other: 'Counts') -> 'Counts':
+        self.tp += other.tp
+        self.fp += other.fp
+        self.tn += other.tn
+        self.fn += other.fn
+        return self
+
+    @property
+    def precision(self) -> float:
+        return _ratio(self.tp, self.tp + self.fp)
+
+    @property
+    def recall(self) -> float:
+        return _ratio(self.tp, self.tp + self.fn)
+
+    @property
+    def f1(self) -> float:
+        return _ratio(2 * self.tp, 2 * self.tp + self.fp + self.fn)
+
+
+class AgreementCounts(Mapping):
+    """
+    A mapping of tag -> Counts. Adding two instances adds the counts of tags they share;
+    `to_dataframe` creates the DataFrame of 'tag' -> ('tp', 'fp', 'tn', 'fn') used elsewhere in bratlib.
+    """
+
+    def __init__(self, counts: t.Optional[t.Mapping[str, Counts]] = None):
+        self._counts = dict(counts) if counts is not None else {}
+
+    @classmethod
+    def from_tally(cls, tp: t.Mapping[str, int], fp: t.Mapping[str, int], fn: t.Mapping[str, int]) \
+            -> 'AgreementCounts':
+        """Creates an instance from mappings of tag -> count for true positives, false positives, and negatives."""
+        tags = set(tp) | set(fp) | set(fn)
+        return cls({tag: Counts(tp.get(tag, 0), fp.get(tag, 0), 0, fn.get(tag, 0)) for tag in tags})
+
+    def __getitem__(self, tag: str) -> Counts:
+        return self._counts[tag]
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._counts)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._counts!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, AgreementCounts):
+            return NotImplemented
+        return self._counts == other._counts
+
+    def __add__(self, other: 'AgreementCounts') -> 'AgreementCounts':
+        new = AgreementCounts({tag: Counts() + c for tag, c in self._counts.items()})
+        new += other
+        return new
+
+    def __iadd__(self, other: 'AgreementCounts') -> 'AgreementCounts':
+        for tag, c in other.items():
+            if tag in self._counts:
+                self._counts[tag] += c
+            else:
+                self._counts[tag] = Counts() + c
+        return self
+
+    def to_dict(self) -> t.Dict[str, t.List[int]]:
+        """Creates a dict of tag -> [tp, fp, tn, fn] that can be written as JSON."""
+        return {tag: [getattr(self._counts[tag], c) for c in COLUMNS] for tag in sorted(self._counts)}
+
+    @classmethod
+    def from_dict(cls, data: t.Mapping[str, t.Sequence[int]]) -> 'AgreementCounts':
+        return cls({tag: Counts(*counts) for tag, counts in data.items()})
+
+    def total(self) -> Counts:
+        """Returns the sum of the counts for all tags, from which micro scores can be calculated."""
+        total = Counts()
+        for c in self._counts.values():
+            total += c
+        return total
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Creates a DataFrame of 'tag' -> ('tp', 'fp', 'tn', 'fn'), sorted by tag."""
+        import pandas as pd
+
+        tags = sorted(self._counts)
+        return pd.DataFrame(
+            [[getattr(self._counts[tag], c) for c in COLUMNS] for tag in tags],
+            index=pd.Index(tags, name='tag', dtype=object), columns=list(COLUMNS)
+        )
+
+
+class ConfusionMatrix:
+    """
+    A square matrix of integer counts, with gold labels as rows and system labels as columns.
+
+    :ivar labels: the sorted label vocabulary, which gives the order of both the rows and the columns
+    :ivar matrix: List[List[int]] of counts, where `matrix[i][j]` counts gold `labels[i]` against system `labels[j]`
+    """
+
+    def __init__(self, labels: t.Iterable[str], matrix: t.Optional[t.List[t.List[int]]] = None):
+        self.labels = sorted(set(labels))
+        size = len(self.labels)
+        self.matrix = matrix if matrix is not None else [[0] * size for _ in range(size)]
+        self._positions = {label: i for i, label in enumerate(self.labels)}
+
+    @classmethod
+    def from_pairs(cls, labels: t.Iterable[str], pairs: t.Mapping[t.Tuple[str, str], int]) -> 'ConfusionMatrix':
+        """Creates an instance from a mapping of (gold label, system label) -> count."""
+        new = cls(labels)
+        for (actual, predicted), count in pairs.items():
+            new.matrix[new._positions[actual]][new._positions[predicted]] += count
+        return new
+
+    def __getitem__(self, pair: t.Tuple[str, str]) -> int:
+        actual, predicted = pair
+        return self.matrix[self._positions[actual]][self._positions[predicted]]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(labels={self.labels!r}, matrix={self.matrix!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfusionMatrix):
+            return NotImplemented
+        return (self.labels, self.matrix) == (other.labels, other.matrix)
+
+    def pairs(self) -> t.Iterator[t.Tuple[t.Tuple[str, str], int]]:
+        """Generates ((gold label, system label), count) for every non-zero cell."""
+        for actual, row in zip(self.labels, self.matrix):
+            for predicted, count in zip(self.labels, row):
+                if count:
+                    yield (actual, predicted), count
+
+    def to_dict(self) -> t.Dict[str, list]:
+        """Creates a dict of 'labels' and 'matrix' that can be written as JSON."""
+        return {'labels': list(self.labels), 'matrix': [list(row) for row in self.matrix]}
+
+    @classmethod
+    def from_dict(cls, data: t.Mapping[str, list]) -> 'ConfusionMatrix':
+        return cls(data['labels'], [list(row) for row in data['matrix']])
+
+    def __add__(self, other: 'ConfusionMatrix') -> 'ConfusionMatrix':
+        new = ConfusionMatrix.from_pairs(self.labels + other.labels, dict(self.pairs()))
+        new += other
+        return new
+
+    def __iadd__(self, other: 'ConfusionMatrix') -> 'ConfusionMatrix':
+        if not set(other.labels) <= self._positions.keys():
+            return self + other
+        for (actual, predicted), count in other.pairs():
+            self.matrix[self._positions[actual]][self._positions[predicted]] += count
+        return self
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Creates a DataFrame with gold labels in the 'actual' index and system labels in the 'predicted' columns."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.matrix,
+            index=pd.Index(self.labels, name='actual', dtype=object),
+            columns=pd.Index(self.labels, name='predicted', dtype=object)
+        )
+
+
+class SparseConfusionMatrix:
+    """
+    A confusion matrix that only stores the cells that are not zero, so that its size grows with the number of
+    (gold label, system label) pairs observed rather than with the square of the number of labels.
+
+    :ivar labels: Set[str] of every label that has been seen, whether or not it appears in a pair
+    :ivar counts: Counter of (gold label, system label) -> count
+    """
+
+    def __init__(self, labels: t.Iterable[str] = (), counts: t.Optional[t.Mapping[t.Tuple[str, str], int]] = None):
+        self.labels = set(labels)
+        self.counts = Counter()
+        if counts is not None:
+            for pair, count in counts.items():
+                if count:
+                    self.counts[pair] += count
+                    self.labels.update(pair)
+
+    @classmethod
+    def from_pairs(cls, labels: t.Iterable[str], pairs: t.Mapping[t.Tuple[str, str], int]) \
+            -> 'SparseConfusionMatrix':
+        """Creates an instance from a mapping of (gold label, system label) -> count."""
+        return cls(labels, pairs)
+
+    def __getitem__(self, pair: t.Tuple[str, str]) -> int:
+        return self.counts.get(pair, 0)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(labels={len(self.labels)}, pairs={len(self.counts)})'
+
+    def __eq__(self, other):
+        if not isinstance(other, SparseConfusionMatrix):
+            return NotImplemented
+        return (self.labels, self.counts) == (other.labels, other.counts)
+
+    def pairs(self) -> t.Iterator[t.Tuple[t.Tuple[str, str], int]]:
+        """Generates ((gold label, system label), count) for every non-zero cell, sorted by label."""
+        for pair in sorted(self.counts):
+            yield pair, self.counts[pair]
+
+    def to_dict(self) -> t.Dict[str, list]:
+        """Creates a dict of 'labels' and 'counts', a list of [gold label, system label, count], for JSON."""
+        return {'labels': sorted(self.labels), 'counts': [[a, p, n] for (a, p), n in self.pairs()]}
+
+    @classmethod
+    def from_dict(cls, data: t.Mapping[str, list]) -> 'SparseConfusionMatrix':
+        return cls(data['labels'], {(a, p): n for a, p, n in data['counts']})
+
+    def __add__(self, other: 'SparseConfusionMatrix') -> 'SparseConfusionMatrix':
+        new = SparseConfusionMatrix(self.labels, self.counts)
+        new += other
+        return new
+
+    def __iadd__(self, other: 'SparseConfusionMatrix') -> 'SparseConfusionMatrix':
+        self.labels |= other.labels
+        self.counts.update(other.counts)
+        return self
+
+    def top_confusions(self, k: t.Optional[int] = 10, *, include_diagonal=False) \
+            -> t.List[t.Tuple[t.Tuple[str, str], int]]:
+        """
+        Returns the `k` most common ((gold label, system label), count), from most to least common;
+        if `k` is None, all of them are returned. Pairs of the same label are left out unless `include_diagonal`.
+        """
+        cells = ((pair, count) for pair, count in self.counts.items() if include_diagonal or pair[0] != pair[1])
+        if k is None:
+            return sorted(cells, key=lambda c: (-c[1], c[0]))
+        return heapq.nsmallest(k, cells, key=lambda c: (-c[1], c[0]))
+
+    def to_coo(self) -> t.Tuple[t.List[str], t.List[int], t.List[int], t.List[int]]:
+        """
+        Returns the matrix in coordinate format as (sorted labels, row positions, column positions, counts),
+        which can be passed to `scipy.sparse.coo_matrix((counts, (rows, columns)))`.
+        """
+        labels = sorted(self.labels)
+        positions = {label: i for i, label in enumerate(labels)}
+        rows, columns, counts = [], [], []
+        for (actual, predicted), count in self.pairs():
+            rows.append(positions[actual])
+            columns.append(positions[predicted])
+            counts.append(count)
+        return labels, rows, columns, counts
+
+    def to_dense(self) -> ConfusionMatrix:
+        return ConfusionMatrix.from_pairs(self.labels, self.counts)
+
+    def confusions_dataframe(self, k: t.Optional[int] = 10, *, include_diagonal=False) -> 'pd.DataFrame':
+        """Creates a DataFrame of ('actual', 'predicted') -> 'count' for the `k` most common pairs."""
+        import pandas as pd
+
+        cells = self.top_confusions(k, include_diagonal=include_diagonal)
+        return pd.DataFrame(
+            [count for _, count in cells],
+            index=pd.MultiIndex.from_tuples([pair for pair, _ in cells], names=['actual', 'predicted']),
+            columns=['count']
+        )
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Creates the same dense DataFrame as `ConfusionMatrix.to_dataframe`."""
+        return self.to_dense().to_dataframe()
+
+
+class AgreementCurve(Mapping):
+    """
+    A mapping of threshold -> AgreementCounts, for calculators that count agreement at several thresholds at once.
+    Adding two instances adds the counts at each threshold.
+    """
+
+    def __init__(self, counts: t.Optional[t.Mapping[float, AgreementCounts]] = None):
+        self._counts = dict(sorted(counts.items())) if counts is not None else {}
+
+    def __getitem__(self, threshold: float) -> AgreementCounts:
+        return self._counts[threshold]
+
+    def __iter__(self) -> t.Iterator[float]:
+        return iter(self._counts)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._counts!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, AgreementCurve):
+            return NotImplemented
+        return self._counts == other._counts
+
+    def to_dict(self) -> t.Dict[str, list]:
+        """Creates a dict of 'thresholds', a list of [threshold, AgreementCounts.to_dict()], for JSON."""
+        return {'thresholds': [[threshold, c.to_dict()] for threshold, c in self._counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data: t.Mapping[str, list]) -> 'AgreementCurve':
+        return cls({threshold: AgreementCounts.from_dict(c) for threshold, c in data['thresholds']})
+
+    def __add__(self, other: 'AgreementCurve') -> 'AgreementCurve':
+        new = AgreementCurve({threshold: AgreementCounts() + c for threshold, c in self._counts.items()})
+        new += other
+        return new
+
+    def __iadd__(self, other: 'AgreementCurve') -> 'AgreementCurve':
+        for threshold, c in other.items():
+            if threshold in self._counts:
+                self._counts[threshold] += c
+            else:
+                self._counts[threshold] = AgreementCounts() + c
+        self._counts = dict(sorted(self._counts.items()))
+        return self
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """
+        Creates a DataFrame of 'threshold' -> ('tp', 'fp', 'fn', 'precision', 'recall', 'f1'),
+        where the scores are micro scores over all tags.
+        """
+        import pandas as pd
+
+        totals = [c.total() for c in self._counts.values()]
+        return pd.DataFrame(
+            [[c.tp, c.fp, c.fn, c.precision, c.recall, c.f1] for c in totals],
+            index=pd.Index(list(self._counts), name='threshold', dtype=float),
+            columns=['tp', 'fp', 'fn', 'precision', 'recall', 'f1']
+        )
+
+
+def _nan_to_none(value: float) -> t.Optional[float]:
+    return None if value != value else value
+
+
+def result_to_json(result) -> t.Any:
+    """
+    Converts a result, or a dict of them, to values that can be written as JSON, adding the micro scores of
+    AgreementCounts; unlike `to_dict`, this is for reporting and can't be converted back.
+    """
+    if isinstance(result, AgreementCounts):
+        total = result.total()
+        return {
+            'counts': result.to_dict(),
+            'micro': {m: _nan_to_none(getattr(total, m)) for m in ('precision', 'recall', 'f1')},
+        }
+    if isinstance(result, AgreementCurve):
+        return {str(threshold): result_to_json(counts) for threshold, counts in result.items()}
+    if isinstance(result, (ConfusionMatrix, SparseConfusionMatrix)):
+        return result.to_dict()
+    if isinstance(result, dict):
+        return {k: result_to_json(v) for k, v in result.items()}
+    raise TypeError(f'cannot convert {type(result).__name__} to JSON')
@@ -0,0 +1,211 @@
+"""
+Approximate agreement scores from a random sample of the file pairs of two datasets.
+Only the sampled files are parsed, so an estimate for a large dataset can be made in a fraction of the time of an
+exact score. Samples are drawn with a fixed seed, optionally stratified by a function of each gold file, such as the
+subdirectory it is in. Micro precision, recall, and F1 are estimated from the sampled counts, each stratum weighted
+by its share of the dataset, and confidence bounds are found by bootstrap resampling of the sampled files.
+
+A sample can have a fixed size, or files can be sampled in batches until the confidence interval of F1 is narrower
+than a target width.
+"""
+
+import argparse
+import random
+import typing as t
+
+from bratlib.calculators import entity_agreement
+from bratlib.calculators.results import AgreementCounts, Counts
+from bratlib.data import BratDataset, BratFile
+from bratlib.tools.iteration import parallel_map, zip_datasets
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+Tally = t.Tuple[int, int, int]
+
+METRICS = ('precision', 'recall', 'f1')
+
+
+class Estimate(t.NamedTuple):
+    """
+    Estimated micro scores for a dataset.
+
+    :ivar scores: dict of 'precision', 'recall', and 'f1' -> estimate
+    :ivar bounds: dict of 'precision', 'recall', and 'f1' -> (lower bound, upper bound)
+    :ivar confidence: the confidence level of the bounds
+    :ivar counts: AgreementCounts of the sampled files, without weights
+    :ivar sampled: the number of file pairs sampled
+    :ivar population: the number of file pairs in the datasets
+    """
+    scores: t.Dict[str, float]
+    bounds: t.Dict[str, t.Tuple[float, float]]
+    confidence: float
+    counts: AgreementCounts
+    sampled: int
+    population: int
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """Creates a DataFrame of 'metric' -> ('estimate', 'lower', 'upper')."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            [[self.scores[m], *self.bounds[m]] for m in METRICS],
+            index=pd.Index(METRICS, name='metric'), columns=['estimate', 'lower', 'upper']
+        )
+
+
+def _scores(tp: float, fp: float, fn: float) -> t.Tuple[float, float, float]:
+    c = Counts(tp, fp, 0, fn)
+    return c.precision, c.recall, c.f1
+
+
+def _weighted_scores(strata: t.List[t.Tuple[float, t.List[Tally]]]) -> t.Tuple[float, float, float]:
+    tp = fp = fn = 0.0
+    for weight, tallies in strata:
+        for a, b, c in tallies:
+            tp += weight * a
+            fp += weight * b
+            fn += weight * c
+    return _scores(tp, fp, fn)
+
+
+def _estimate(strata: t.List[t.Tuple[float, t.List[Tally]]], confidence: float, resamples: int,
+              rng: random.Random) -> t.Tuple[t.Dict[str, float], t.Dict[str, t.Tuple[float, float]]]:
+    """Estimates the scores from (weight, tallies of the sampled files) for each stratum, with bootstrap bounds."""
+    import numpy as np
+
+    scores = dict(zip(METRICS, _weighted_scores(strata)))
+
+    # Each row of draws is one resample of the sampled files of a stratum, with replacement
+    state = np.random.RandomState(rng.getrandbits(32))
+    tp, fp, fn = np.zeros(resamples), np.zeros(resamples), np.zeros(resamples)
+    for weight, tallies in strata:
+        if tallies:
+            draws = state.randint(0, len(tallies), (resamples, len(tallies)))
+            for total, column in zip((tp, fp, fn), np.array(tallies, dtype=float).T):
+                total += weight * column[draws].sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resampled = dict(zip(METRICS, (tp / (tp + fp), tp / (tp + fn), 2 * tp / (2 * tp + fp + fn))))
+
+    alpha = (1 - confidence) / 2
+    bounds = {}
+    for m, values in resampled.items():
+        values = values[~np.isnan(values)]
+        bounds[m] = tuple(np.percentile(values, [100 * alpha, 100 * (1 - alpha)]).tolist()) if len(values) \
+            else (float('nan'),) * 2
+    return scores, bounds
+
+
+def _allocate(sizes: t.List[int], n: int) -> t.List[int]:
+    """Divides a sample of n among strata of the given sizes in proportion to their sizes, by largest remainder."""
+    total = sum(sizes)
+    if not total:
+        return [0] * len(sizes)
+    n = min(n, total)
+    exact = [n * s / total for s in sizes]
+    allocation = [int(e) for e in exact]
+    by_remainder = sorted(range(len(sizes)), key=lambda i: allocation[i] - exact[i])
+    for i in by_remainder[:n - sum(allocation)]:
+        allocation[i] += 1
+    return allocation
+
+
+def _counts_task(task: tuple) -> AgreementCounts:
+    function, gold, system, args, kwargs = task
+    return function(gold, system, *args, **kwargs)
+
+
+def estimate_dataset(gold_dataset: BratDataset, system_dataset: BratDataset,
+                     function: t.Callable[..., AgreementCounts] = entity_agreement.count_ann_file, *args,
+                     size: t.Optional[int] = None, target_width: t.Optional[float] = None, batch_size=100,
+                     strata: t.Optional[t.Callable[[BratFile], t.Hashable]] = None, confidence=0.95,
+                     resamples=1000, seed=0, jobs=1, **kwargs) -> Estimate:
+    """
+    Estimates micro precision, recall, and F1 from a sample of the file pairs of two datasets.
+    :param gold_dataset: The gold version of the predicted dataset
+    :param system_dataset: The predicted dataset
+    :param function: a file level function that returns AgreementCounts, such as `entity_agreement.count_ann_file`;
+    `args` and `kwargs` are passed to it
+    :param size: the number of file pairs to sample, or the most to sample if `target_width` is given
+    :param target_width: if given, file pairs are added to the sample in batches until the confidence interval of F1
+    is at most this wide
+    :param batch_size: the size of the first batch when there is a `target_width`; later batches are a quarter of the
+    sample so far if that is larger, so that the bounds are not recalculated too often for large samples
+    :param strata: a function of each gold BratFile that gives its stratum; it should not need to parse the file
+    :param confidence: the confidence level of the bounds
+    :param resamples: the number of bootstrap resamples to find the bounds from
+    :param seed: the seed of the random sample and of the bootstrap resampling
+    :param jobs: number of processes to compare files in
+    :return: an Estimate
+    """
+    if size is None and target_width is None:
+        raise ValueError('either size or target_width must be given')
+
+    rng = random.Random(seed)
+
+    # Only names are needed to pair up the files, so nothing is parsed here
+    groups = {}
+    for pair in zip_datasets(gold_dataset, system_dataset):
+        groups.setdefault(strata(pair[0]) if strata is not None else None, []).append(pair)
+    keys = sorted(groups, key=repr)
+    shuffled = [rng.sample(groups[k], len(groups[k])) for k in keys]
+    sizes = [len(s) for s in shuffled]
+    population = sum(sizes)
+
+    limit = population if size is None else min(size, population)
+
+    tallies = [[] for _ in keys]
+    counts = AgreementCounts()
+    n = 0
+    while True:
+        n = limit if target_width is None else min(n + max(batch_size, n // 4), limit)
+        allocation = _allocate(sizes, n)
+        tasks = []
+        for stratum, (pairs, taken, wanted) in enumerate(zip(shuffled, tallies, allocation)):
+            tasks.extend((stratum, pair) for pair in pairs[len(taken):wanted])
+
+        results = parallel_map(_counts_task, ((function, g, s, args, kwargs) for _, (g, s) in tasks), jobs)
+        for (stratum, _), result in zip(tasks, results):
+            counts += result
+            total = result.total()
+            tallies[stratum].append((total.tp, total.fp, total.fn))
+
+        weighted = [(size_h / len(t_h) if t_h else 0.0, t_h) for size_h, t_h in zip(sizes, tallies)]
+        scores, bounds = _estimate(weighted, confidence, resamples, rng)
+
+        low, high = bounds['f1']
+        if n >= limit or (target_width is not None and high - low <= target_width):
+            return Estimate(scores, bounds, confidence, counts, sum(map(len, tallies)), population)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimates entity agreement from a sample of the files')
+    parser.add_argument('gold_directory', help='First data folder path (gold)')
+    parser.add_argument('system_directory', help='Second data folder path (system)')
+    parser.add_argument('-m', '--mode', default='strict', help='strict or lenient (defaults to strict)')
+    parser.add_argument('-n', '--size', type=int, help='number of files to sample, or the most to sample with -w')
+    parser.add_argument('-w', '--target-width', type=float,
+                        help='sample until the confidence interval of F1 is at most this wide')
+    parser.add_argument('-c', '--confidence', type=float, default=0.95, help='confidence level (defaults to 0.95)')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='random seed (defaults to 0)')
+    parser.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    if args.size is None and args.target_width is None:
+        parser.error('one of --size or --target-width is required')
+
+    gold_dataset = BratDataset.from_directory(args.gold_directory)
+    system_dataset = BratDataset.from_directory(args.system_directory)
+
+    estimate = estimate_dataset(
+        gold_dataset, system_dataset, entity_agreement.count_ann_file, args.mode, size=args.size,
+        target_width=args.target_width, confidence=args.confidence, seed=args.seed, jobs=args.jobs
+    )
+    print(f'# {estimate.sampled} of {estimate.population} files, {estimate.confidence:.0%} confidence')
+    print(estimate.to_dataframe().to_csv(float_format=f'%.{args.decimal}f'))
+
+
+if __name__ == '__main__':
+    main()
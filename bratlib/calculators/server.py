@@ -0,0 +1,247 @@
+"""
+A local HTTP server that scores submissions against gold datasets kept in memory.
+Each gold dataset is parsed and indexed once when the server starts, so scoring a submission only costs parsing the
+submission and comparing it. Submissions are directories or tar/zip archives on the same machine as the server.
+
+Requests:
+
+- GET /status: the gold datasets and the number of requests running and waiting
+- POST /score with a JSON body {"gold": name, "system": path, "metrics": [...]}; "gold" can be left out if there is
+  only one gold dataset, and "metrics" defaults to all of `bratlib.calculators.evaluate.METRICS`
+
+A score response is {"gold": name, "system": path, "files": number of files compared, "results": {metric: result},
+"timing": {"queued": seconds, "parse": seconds, "score": seconds}}, where results are in the format of `bratlib batch`.
+At most `max_concurrent` submissions are scored at once; up to `max_queued` more wait for their turn, and any more
+than that are refused with 503.
+
+The server can listen on a TCP port or on a Unix socket.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+import typing as t
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from bratlib.calculators import evaluate
+from bratlib.calculators.results import result_to_json
+from bratlib.data import BratDataset, BratFile
+from bratlib.data.archives import iter_archive
+
+
+class RequestError(Exception):
+    """An error in a request, and the HTTP status to respond with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ResidentGold:
+    """A gold dataset that has been parsed and indexed, to pair with any number of submissions."""
+
+    def __init__(self, dataset: BratDataset):
+        # Every index is created now, since they are shared by the threads scoring submissions
+        self.files = {ann.name: evaluate.FileIndexes(ann).build(lenient=True) for ann in dataset}
+
+    def __len__(self):
+        return len(self.files)
+
+    def pair(self, system: BratFile) -> t.Optional[evaluate.DocumentPair]:
+        """The DocumentPair of a system file and the gold file of the same name, or None if there isn't one."""
+        try:
+            indexes = self.files[system.name]
+        except KeyError:
+            return None
+        # Reuse the indexes of the gold file rather than creating them again for each submission
+        return evaluate.DocumentPair(indexes.ann, system, indexes)
+
+
+def _read_submission(path: Path) -> t.Iterator[BratFile]:
+    if path.is_dir():
+        return iter(BratDataset.from_directory(path))
+    if path.is_file():
+        return iter_archive(path)
+    raise RequestError(404, f'{path} does not exist')
+
+
+class EvaluationServer:
+    """
+    Scores submissions against resident gold datasets, independently of how requests are received.
+    :param golds: dict of name -> gold BratDataset, which are parsed and indexed immediately
+    :param max_concurrent: the most submissions to score at once
+    :param max_queued: the most submissions to hold while others are scored
+    """
+
+    def __init__(self, golds: t.Mapping[str, BratDataset], *, max_concurrent=2, max_queued=16):
+        self.golds = {name: ResidentGold(dataset) for name, dataset in golds.items()}
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+
+    def status(self) -> t.Dict[str, t.Any]:
+        with self._lock:
+            return {
+                'gold': {name: len(gold) for name, gold in self.golds.items()},
+                'running': self._running,
+                'waiting': self._waiting,
+            }
+
+    def _gold(self, request: t.Mapping[str, t.Any]) -> t.Tuple[str, ResidentGold]:
+        name = request.get('gold')
+        if name is None:
+            if len(self.golds) != 1:
+                raise RequestError(400, 'a gold dataset must be named')
+            name, = self.golds
+        if name not in self.golds:
+            raise RequestError(404, f'unknown gold dataset {name!r}')
+        return name, self.golds[name]
+
+    def score(self, request: t.Mapping[str, t.Any]) -> t.Dict[str, t.Any]:
+        """Scores a submission; see the module docstring for the request and the response."""
+        if not isinstance(request, dict) or 'system' not in request:
+            raise RequestError(400, 'the request must be a JSON object with a "system" path')
+        name, gold = self._gold(request)
+        metrics = tuple(request.get('metrics', evaluate.METRICS))
+        unknown = set(metrics) - evaluate.METRICS.keys()
+        if unknown:
+            raise RequestError(400, f'unknown metrics: {", ".join(sorted(unknown))}')
+
+        with self._lock:
+            if self._running + self._waiting >= self.max_concurrent + self.max_queued:
+                raise RequestError(503, 'too many requests are waiting')
+            self._waiting += 1
+
+        queued = time.perf_counter()
+        self._slots.acquire()
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+
+        try:
+            pairs = []
+            for system in _read_submission(Path(request['system'])):
+                pair = gold.pair(system)
+                if pair is not None:
+                    pair.system_indexes.build()
+                    pairs.append(pair)
+            parsed = time.perf_counter()
+
+            results = {m: evaluate.METRICS[m].start() for m in metrics}
+            for pair in pairs:
+                for m in metrics:
+                    results[m] += evaluate.METRICS[m].function(pair)
+            scored = time.perf_counter()
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._slots.release()
+
+        return {
+            'gold': name,
+            'system': request['system'],
+            'files': len(pairs),
+            'results': result_to_json(results),
+            'timing': {'queued': start - queued, 'parse': parsed - start, 'score': scored - parsed},
+        }
+
+    def handler(self) -> t.Type[BaseHTTPRequestHandler]:
+        """Creates a request handler class that passes requests to this server."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def address_string(self):
+                # Unix socket clients have no address
+                return self.client_address[0] if self.client_address else 'local'
+
+            def _respond(self, status: int, body: t.Dict[str, t.Any]):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/status':
+                    self._respond(200, server.status())
+                else:
+                    self._respond(404, {'error': f'no such path {self.path}'})
+
+            def do_POST(self):
+                if self.path != '/score':
+                    self._respond(404, {'error': f'no such path {self.path}'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    try:
+                        request = json.loads(self.rfile.read(length))
+                    except ValueError:
+                        raise RequestError(400, 'the request body is not valid JSON') from None
+                    self._respond(200, server.score(request))
+                except RequestError as e:
+                    self._respond(e.status, {'error': str(e)})
+                except Exception as e:
+                    self._respond(500, {'error': f'{type(e).__name__}: {e}'})
+
+        return Handler
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(server: EvaluationServer, host='127.0.0.1', port=8000, socket_path: t.Optional[str] = None) \
+        -> socketserver.BaseServer:
+    """Creates a socketserver for an EvaluationServer on a TCP port, or on a Unix socket if a path is given."""
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return _ThreadingUnixHTTPServer(socket_path, server.handler())
+    return _ThreadingHTTPServer((host, port), server.handler())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves scores of submissions against gold datasets held in memory')
+    parser.add_argument('gold', nargs='+', help='gold directories, as NAME=DIRECTORY or DIRECTORY to name them '
+                                                'after the directory')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (defaults to 127.0.0.1)')
+    parser.add_argument('-p', '--port', type=int, default=8000, help='port to listen on (defaults to 8000)')
+    parser.add_argument('-s', '--socket', help='Unix socket to listen on instead of a port')
+    parser.add_argument('-c', '--max-concurrent', type=int, default=2,
+                        help='most submissions to score at once (defaults to 2)')
+    parser.add_argument('-q', '--max-queued', type=int, default=16,
+                        help='most submissions to hold while others are scored (defaults to 16)')
+    args = parser.parse_args()
+
+    golds = {}
+    for gold in args.gold:
+        name, _, directory = gold.rpartition('=')
+        golds[name or Path(directory).name] = BratDataset.from_directory(directory)
+
+    server = EvaluationServer(golds, max_concurrent=args.max_concurrent, max_queued=args.max_queued)
+    with make_server(server, args.host, args.port, args.socket) as httpd:
+        address = args.socket or f'http://{args.host}:{httpd.server_address[1]}'
+        print(f'Serving {", ".join(golds)} on {address}', flush=True)
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Splitting one evaluation into shards that can be run separately, such as on several machines, and merging them.
+Each file pair belongs to one of `count` shards, chosen by a CRC-32 of its name, so every run assigns the same files
+to the same shard. Running a shard writes a partial result file of JSON, and merging the partial files of every
+shard gives the same result as evaluating the whole dataset at once.
+
+The calculators are those of `bratlib batch`; see `bratlib.calculators.registry.CALCULATORS`.
+
+    bratlib shard run entity-agreement gold/ system/ -i 0 -n 4 -o part0.json -O mode=lenient
+    bratlib shard merge part0.json part1.json part2.json part3.json
+"""
+
+import argparse
+import json
+import typing as t
+import zlib
+from pathlib import Path
+
+from bratlib.calculators.results import AgreementCounts, AgreementCurve, ConfusionMatrix, SparseConfusionMatrix
+from bratlib.calculators.registry import CALCULATORS, get_calculator, option_value
+from bratlib.data import BratDataset, BratFile
+
+_RESULT_TYPES = {
+    cls.__name__: cls for cls in (AgreementCounts, AgreementCurve, ConfusionMatrix, SparseConfusionMatrix)
+}
+
+
+def shard_of(name: str, count: int) -> int:
+    """The shard of a file name, out of `count` shards."""
+    return zlib.crc32(name.encode()) % count
+
+
+def shard_files(dataset: t.Iterable[BratFile], index: int, count: int) -> t.List[BratFile]:
+    """The BratFiles of a dataset in shard `index` of `count` shards."""
+    if not 0 <= index < count:
+        raise ValueError(f'shard index must be at least 0 and less than {count}')
+    return [ann for ann in dataset if shard_of(ann.name, count) == index]
+
+
+def encode_result(result) -> t.Dict[str, t.Any]:
+    """Converts a calculator result, or a dict of them, to a dict that can be written as JSON."""
+    if isinstance(result, dict):
+        return {'type': 'dict', 'items': {k: encode_result(v) for k, v in result.items()}}
+    return {'type': type(result).__name__, 'data': result.to_dict()}
+
+
+def decode_result(data: t.Mapping[str, t.Any]):
+    """Recreates a result from `encode_result`."""
+    if data['type'] == 'dict':
+        return {k: decode_result(v) for k, v in data['items'].items()}
+    return _RESULT_TYPES[data['type']].from_dict(data['data'])
+
+
+def _merge(first, second):
+    if isinstance(first, dict):
+        return {k: _merge(first[k], second[k]) for k in first}
+    return first + second
+
+
+def run_shard(calculator: str, gold: BratDataset, system: BratDataset, index: int, count: int,
+              **options) -> t.Dict[str, t.Any]:
+    """
+    Runs a calculator on one shard of a pair of datasets.
+    :param calculator: a name from `bratlib.calculators.registry.CALCULATORS`
+    :param options: keyword arguments for the calculator
+    :return: the contents of a partial result file
+    """
+    calculate = get_calculator(calculator)
+
+    gold_files = shard_files(gold, index, count)
+    system_files = shard_files(system, index, count)
+    result = calculate(gold_files, system_files, **options)
+    return {
+        'calculator': calculator,
+        'options': options,
+        'shard': [index, count],
+        'files': len({a.name for a in gold_files} & {a.name for a in system_files}),
+        'result': encode_result(result),
+    }
+
+
+def merge_partials(partials: t.Iterable[t.Mapping[str, t.Any]]):
+    """
+    Merges the partial results of every shard of a calculation.
+    Raises ValueError if they are not from the same calculation, or if any shard is missing or repeated.
+    """
+    partials = list(partials)
+    if not partials:
+        raise ValueError('there are no partial results to merge')
+
+    first = partials[0]
+    count = first['shard'][1]
+    for partial in partials:
+        if (partial['calculator'], partial['options'], partial['shard'][1]) != \
+                (first['calculator'], first['options'], count):
+            raise ValueError('the partial results are not all from the same calculation')
+
+    indexes = sorted(p['shard'][0] for p in partials)
+    if indexes != list(range(count)):
+        missing = sorted(set(range(count)) - set(indexes))
+        raise ValueError(f'expected one result for each of {count} shards; '
+                         f'missing {missing}, given {indexes}')
+
+    result = decode_result(partials[0]['result'])
+    for partial in partials[1:]:
+        result = _merge(result, decode_result(partial['result']))
+    return result
+
+
+def _run(args: argparse.Namespace):
+    options = {}
+    for option in args.option:
+        key, sep, value = option.partition('=')
+        if not sep:
+            raise SystemExit(f'options must be KEY=VALUE, not {option!r}')
+        options[key] = option_value(value)
+
+    partial = run_shard(args.calculator, BratDataset.from_directory(args.gold_directory),
+                        BratDataset.from_directory(args.system_directory), args.index, args.count, **options)
+    Path(args.output).write_text(json.dumps(partial, separators=(',', ':')))
+
+
+def _merge_files(args: argparse.Namespace):
+    from bratlib.calculators.evaluate import report
+
+    try:
+        result = merge_partials(json.loads(Path(p).read_text()) for p in args.partials)
+    except ValueError as e:
+        raise SystemExit(f'error: {e}') from None
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(encode_result(result), separators=(',', ':')))
+        return
+
+    for name, single in (result.items() if isinstance(result, dict) else [(None, result)]):
+        if name is not None:
+            print(f'# {name}')
+        print(report(single, args.decimal))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs one shard of an evaluation, or merges the shards')
+    subparsers = parser.add_subparsers(dest='action')
+    subparsers.required = True
+
+    run = subparsers.add_parser('run', help='run one shard and write its partial result')
+    run.add_argument('calculator', choices=list(CALCULATORS), help='calculator to run')
+    run.add_argument('gold_directory', help='First data folder path (gold)')
+    run.add_argument('system_directory', help='Second data folder path (system)')
+    run.add_argument('-i', '--index', type=int, required=True, help='index of the shard, from 0')
+    run.add_argument('-n', '--count', type=int, required=True, help='number of shards')
+    run.add_argument('-o', '--output', required=True, help='file to write the partial result to')
+    run.add_argument('-O', '--option', action='append', default=[],
+                     help='KEY=VALUE option of the calculator, where the value is read as JSON if it can be')
+    run.set_defaults(function=_run)
+
+    merge = subparsers.add_parser('merge', help='merge the partial results of every shard')
+    merge.add_argument('partials', nargs='+', help='partial result files')
+    merge.add_argument('-o', '--output', help='file to write the merged result to as JSON, instead of printing it')
+    merge.add_argument('-d', '--decimal', type=int, default=3, help='number of decimal places to round to')
+    merge.set_defaults(function=_merge_files)
+
+    args = parser.parse_args()
+    args.function(args)
+
+
+if __name__ == '__main__':
+    main()
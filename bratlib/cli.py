@@ -0,0 +1,159 @@
+"""
+The `bratlib` command, which runs the command line tool of any bratlib module as a subcommand, such as
+`bratlib entity-agreement gold/ system/`. Modules are only imported when their subcommand is run.
+
+`bratlib batch manifest.jsonl` runs many calculations in one process. Each line of a JSONL manifest is a job like
+{"calculator": "entity-agreement", "gold": "gold/", "system": "system/", "options": {"mode": "lenient"}};
+a CSV manifest has 'calculator', 'gold', and 'system' columns, and any other non-empty column is an option, whose
+value is read as JSON if it can be. Options are keyword arguments of the calculator's dataset level function.
+Datasets are loaded once and shared by every job that uses them, so files parsed for one job are not parsed again
+for the next. Each job's result, or its error, is written as a line of JSON.
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import sys
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+from bratlib.calculators.registry import get_calculator, option_value
+
+COMMANDS = {
+    'entity-agreement': 'bratlib.calculators.entity_agreement',
+    'entity-confusion-matrix': 'bratlib.calculators.entity_confusion_matrix',
+    'evaluate': 'bratlib.calculators.evaluate',
+    'normalization-agreement': 'bratlib.calculators.normalization_agreement',
+    'overlap-agreement': 'bratlib.calculators.overlap_agreement',
+    'pairwise-agreement': 'bratlib.calculators.pairwise_agreement',
+    'relation-agreement': 'bratlib.calculators.relation_agreement',
+    'relation-confusion-matrix': 'bratlib.calculators.relation_confusion_matrix',
+    'sampling': 'bratlib.calculators.sampling',
+    'serve': 'bratlib.calculators.server',
+    'shard': 'bratlib.calculators.sharding',
+    'bio': 'bratlib.tools.bio',
+    'diff': 'bratlib.tools.diff',
+    'overlaps': 'bratlib.tools.overlaps',
+    'validate': 'bratlib.tools.validation',
+}
+
+# Options that batch mode passes to calculators unless a job sets them, so that they keep the shared datasets parsed;
+# with more than one job, evaluate then parses the files in this process rather than in its workers
+_BATCH_OPTIONS = {
+    'evaluate': {'release': False},
+}
+
+
+class Job(t.NamedTuple):
+    """One calculation of a batch."""
+    calculator: str
+    gold: str
+    system: str
+    options: t.Optional[t.Dict[str, t.Any]] = None
+
+
+def read_manifest(path: t.Union[str, Path]) -> t.Iterator[Job]:
+    """Reads the jobs of a JSONL or CSV manifest; see the module docstring."""
+    path = Path(path)
+    with path.open(newline='') as f:
+        if path.suffix.lower() == '.csv':
+            for row in csv.DictReader(f):
+                options = {k: option_value(v) for k, v in row.items()
+                           if k not in Job._fields and v not in (None, '')}
+                yield Job(row['calculator'], row['gold'], row['system'], options)
+        else:
+            for line in f:
+                if line.strip():
+                    job = json.loads(line)
+                    yield Job(job['calculator'], job['gold'], job['system'], job.get('options') or {})
+
+
+class _DatasetCache:
+    """The most recently used datasets, by directory."""
+
+    def __init__(self, max_datasets: t.Optional[int]):
+        self.max_datasets = max_datasets
+        self._datasets = OrderedDict()
+
+    def __getitem__(self, directory: str):
+        from bratlib.data import BratDataset
+
+        key = str(Path(directory).resolve())
+        try:
+            self._datasets.move_to_end(key)
+        except KeyError:
+            self._datasets[key] = BratDataset.from_directory(key)
+            if self.max_datasets is not None and len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+        return self._datasets[key]
+
+
+def run_jobs(jobs: t.Iterable[Job], *, max_datasets: t.Optional[int] = 16) -> t.Iterator[t.Dict[str, t.Any]]:
+    """
+    Runs each job, generating a dict of the job and its 'result' or 'error'.
+    :param jobs: Jobs, such as from `read_manifest`
+    :param max_datasets: the most datasets to keep loaded at once, or None for no limit
+    """
+    from bratlib.calculators.results import result_to_json
+
+    datasets = _DatasetCache(max_datasets)
+    for job in jobs:
+        options = job.options or {}
+        record = {'calculator': job.calculator, 'gold': job.gold, 'system': job.system, 'options': options}
+        try:
+            calculate = get_calculator(job.calculator)
+            kwargs = {**_BATCH_OPTIONS.get(job.calculator, {}), **options}
+            record['result'] = result_to_json(calculate(datasets[job.gold], datasets[job.system], **kwargs))
+        except Exception as e:
+            record['error'] = f'{type(e).__name__}: {e}'
+        yield record
+
+
+def batch(argv: t.Optional[t.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='bratlib batch', description='Runs the jobs of a manifest in one process')
+    parser.add_argument('manifest', help='JSONL or CSV file of jobs')
+    parser.add_argument('-o', '--output', help='JSONL file to write results to (defaults to stdout)')
+    parser.add_argument('-m', '--max-datasets', type=int, default=16,
+                        help='most datasets to keep loaded at once (defaults to 16)')
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w') if args.output is not None else sys.stdout
+    failed = 0
+    try:
+        for number, record in enumerate(run_jobs(read_manifest(args.manifest), max_datasets=args.max_datasets)):
+            failed += 'error' in record
+            output.write(json.dumps({'job': number, **record}) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    commands = ', '.join(['batch', *COMMANDS])
+    parser = argparse.ArgumentParser(
+        prog='bratlib', description='Runs a bratlib command line tool',
+        epilog=f'commands: {commands}. Run "bratlib <command> -h" for the options of each.'
+    )
+    parser.add_argument('command', choices=['batch', *COMMANDS], metavar='command', help='the tool to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='arguments of the tool')
+    args = parser.parse_args(argv)
+
+    if args.command == 'batch':
+        return batch(args.args)
+
+    module = importlib.import_module(COMMANDS[args.command])
+    old_argv = sys.argv
+    sys.argv = [f'bratlib {args.command}', *args.args]
+    try:
+        module.main()
+    finally:
+        sys.argv = old_argv
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
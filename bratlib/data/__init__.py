@@ -1,3 +1,4 @@
 from bratlib.data.annotation_types import AnnData, Attribute, Entity, Event, Equivalence, Normalization, Relation
 from bratlib.data.directory_types import BratDataset
 from bratlib.data.file_types import BratFile, BratParseError, NoTxtError
+from bratlib.data.vocabulary import Vocabulary
@@ -0,0 +1,64 @@
+"""
+Indexes of the annotations that refer to each entity or event of a BratFile, such as the relations an entity takes
+part in or the attributes of an event. Finding these in the flat lists of a BratFile takes a scan of the list for each
+lookup; an AdjacencyIndex is built with one pass over each list, after which each lookup takes constant time.
+
+Annotations are indexed by identity rather than by value. Every annotation of a BratFile refers to the same instance
+of each entity and event, so lookups should use the instances in the BratFile, and duplicate entities in a file are
+kept apart.
+"""
+
+import typing as t
+
+from bratlib.data.annotation_types import AnnData, Attribute, Entity, Equivalence, Event, Normalization, Relation
+
+if t.TYPE_CHECKING:
+    from bratlib.data.file_types import BratFile
+
+
+def _group(pairs: t.Iterable[t.Tuple[AnnData, t.Any]]) -> t.Dict[int, list]:
+    grouped = {}
+    for key, value in pairs:
+        grouped.setdefault(id(key), []).append(value)
+    return grouped
+
+
+class AdjacencyIndex:
+    """
+    The annotations that refer to each entity and event of a BratFile. Each method returns a list in the order of
+    the BratFile's own lists, which is empty if nothing refers to the given annotation; the lists should not be
+    mutated. The index reflects the data of the BratFile when it was created.
+    """
+
+    def __init__(self, ann: 'BratFile'):
+        self._relations_from = _group((rel.arg1, rel) for rel in ann.relations)
+        self._relations_to = _group((rel.arg2, rel) for rel in ann.relations)
+        self._triggered = _group((ev.trigger, ev) for ev in ann.events)
+        self._arguments = _group((ent, (role, ev)) for ev in ann.events for role, ent in ev.arguments.items())
+        self._equivalences = _group((ent, eq) for eq in ann.equivalences for ent in eq.items)
+        self._attributes = _group((item, attr) for attr in ann.attributes for item in attr.items)
+        self._normalizations = _group((norm.entity, norm) for norm in ann.normalizations)
+
+    def relations_from(self, ent: Entity) -> t.List[Relation]:
+        """Relations where the entity is Arg1."""
+        return self._relations_from.get(id(ent), [])
+
+    def relations_to(self, ent: Entity) -> t.List[Relation]:
+        """Relations where the entity is Arg2."""
+        return self._relations_to.get(id(ent), [])
+
+    def events_triggered_by(self, ent: Entity) -> t.List[Event]:
+        return self._triggered.get(id(ent), [])
+
+    def event_arguments(self, ent: Entity) -> t.List[t.Tuple[str, Event]]:
+        """(role, Event) for each event argument the entity fills."""
+        return self._arguments.get(id(ent), [])
+
+    def equivalences_of(self, ent: Entity) -> t.List[Equivalence]:
+        return self._equivalences.get(id(ent), [])
+
+    def attributes_of(self, item: t.Union[Entity, Event]) -> t.List[Attribute]:
+        return self._attributes.get(id(item), [])
+
+    def normalizations_of(self, ent: Entity) -> t.List[Normalization]:
+        return self._normalizations.get(id(ent), [])
@@ -1,4 +1,5 @@
 import re
+import sys
 import typing as t
 from dataclasses import dataclass, field
 
@@ -16,8 +17,8 @@ class Entity(AnnData):
     mention: str = field(compare=False)
 
     @classmethod
-    def _from_re(cls, match: t.Match):
-        tag = match[2]
+    def _from_re(cls, match: t.Match, intern: t.Callable[[str], str] = sys.intern):
+        tag = intern(match[2])
 
         # Create list of tuples for every pair of spans
         spans = [int(m[0]) for m in re.finditer(r'\d+', match[3])]
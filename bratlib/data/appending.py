@@ -0,0 +1,150 @@
+"""
+Appending annotations to existing ann files without rewriting them.
+Writing a BratFile with `str` renumbers every annotation, which breaks anything that refers to the old IDs.
+Instead, new annotations are given the next free ID for their prefix, found by scanning the IDs at the start of
+each line, and are written to the end of the file.
+"""
+
+import re
+import sys
+import typing as t
+from bisect import insort
+
+from bratlib.data import _patterns
+from bratlib.data.annotation_types import Entity, Normalization, Relation
+from bratlib.data.file_types import BratFile
+
+_id_pattern = re.compile(r'^([TRN])(\d+)\t', re.MULTILINE)
+
+
+def next_ids(text: str) -> t.Dict[str, int]:
+    """Finds the next free number for the T, R, and N prefixes in the text of an ann file."""
+    highest = {'T': 0, 'R': 0, 'N': 0}
+    for m in _id_pattern.finditer(text):
+        number = int(m[2])
+        if number > highest[m[1]]:
+            highest[m[1]] = number
+    return {prefix: number + 1 for prefix, number in highest.items()}
+
+
+class _EntityIds:
+    """Finds the IDs of entities in an ann file, by identity if the BratFile is loaded, otherwise by value."""
+
+    def __init__(self, ann: BratFile, text: str):
+        self._by_identity = {}
+        self._by_value = {}
+
+        if '_data_dict' in ann.__dict__ and ann._mapping:
+            for ent_id, value in ann._mapping.items():
+                if isinstance(value, Entity):
+                    self._by_identity[id(value)] = ent_id
+                    self._by_value.setdefault(value, ent_id)
+            return
+
+        # Only the entity lines are read, not the rest of the file
+        for m in _patterns.ent_pattern.finditer(text):
+            self._by_value.setdefault(Entity._from_re(m), m[1])
+
+        if '_data_dict' in ann.__dict__:
+            # The BratFile was loaded without the IDs of its annotations, such as from a ColumnarDataset, so its
+            # entities are given the IDs of the equal entities in the file
+            for ent in ann._data_dict['entities']:
+                ent_id = self._by_value.get(ent)
+                if ent_id is not None and ent_id not in ann._mapping:
+                    ann._mapping[ent_id] = ent
+                    self._by_identity[id(ent)] = ent_id
+
+    def add(self, ent: Entity, ent_id: str):
+        self._by_identity[id(ent)] = ent_id
+        self._by_value.setdefault(ent, ent_id)
+
+    def __getitem__(self, ent: Entity) -> str:
+        try:
+            return self._by_identity[id(ent)]
+        except KeyError:
+            pass
+        try:
+            return self._by_value[ent]
+        except KeyError:
+            raise ValueError(f'{ent} is not in the ann file or the annotations being appended') from None
+
+
+def append_annotations(ann: BratFile,
+                       entities: t.Iterable[Entity] = (),
+                       relations: t.Iterable[Relation] = (),
+                       normalizations: t.Iterable[Normalization] = ()) -> t.List[str]:
+    """
+    Appends annotations to the ann file of a BratFile, keeping the IDs of the annotations already in it.
+    Relations and normalizations can refer to entities already in the file or to entities being appended.
+    If the BratFile has already been loaded, the new annotations are added to its data as well;
+    otherwise, they will be read with the rest of the file when it is loaded.
+
+    :return: the IDs given to the new entities, relations, and normalizations, in that order
+    """
+    if hasattr(ann, '_entities'):
+        raise ValueError('BratFiles created from data do not have an ann file to append to')
+    if type(ann) is not BratFile and not ann.ann_path.is_file():
+        # Such as a file in an archive, or a ColumnarDataset that wasn't written to ann files
+        raise ValueError(f'{ann!r} does not have an ann file at {ann.ann_path} to append to')
+
+    entities, relations, normalizations = list(entities), list(relations), list(normalizations)
+    text = ann.ann_path.read_text()
+    numbers = next_ids(text)
+    entity_ids = _EntityIds(ann, text)
+
+    ids = []
+    lines = []
+
+    def new_id(prefix: str) -> str:
+        new = f'{prefix}{numbers[prefix]}'
+        numbers[prefix] += 1
+        ids.append(new)
+        return new
+
+    for ent in entities:
+        ent_id = new_id('T')
+        entity_ids.add(ent, ent_id)
+        spans = ';'.join(f'{a} {b}' for a, b in ent.spans)
+        lines.append(f'{ent_id}\t{ent.tag} {spans}\t{ent.mention}\n')
+
+    for rel in relations:
+        lines.append(f'{new_id("R")}\t{rel.relation} Arg1:{entity_ids[rel.arg1]} Arg2:{entity_ids[rel.arg2]}\n')
+
+    for norm in normalizations:
+        lines.append(f'{new_id("N")}\tReference {entity_ids[norm.entity]} {norm.ontology}:{norm.ont_id}\t'
+                     f'{norm.entity.mention}\n')
+
+    if not lines:
+        return ids
+
+    if text and not text.endswith('\n'):
+        lines.insert(0, '\n')
+    with ann.ann_path.open('a') as f:
+        f.write(''.join(lines))
+
+    if '_data_dict' in ann.__dict__:
+        _update_data(ann, entities, relations, normalizations, ids, entity_ids)
+
+    return ids
+
+
+def _update_data(ann: BratFile, entities: t.List[Entity], relations: t.List[Relation],
+                 normalizations: t.List[Normalization], ids: t.List[str], entity_ids: _EntityIds):
+    """Adds appended annotations to the parsed data of a BratFile, as if the file had been parsed again."""
+    data_dict = ann._data_dict
+    ann.__dict__.pop('adjacency', None)
+    intern = ann.vocabulary.intern if ann.vocabulary is not None else sys.intern
+
+    for ent, ent_id in zip(entities, ids):
+        new_ent = Entity(intern(ent.tag), list(ent.spans), ent.mention)
+        ann._mapping[ent_id] = new_ent
+        insort(data_dict['entities'], new_ent)
+
+    def parsed(ent: Entity) -> Entity:
+        return ann._mapping[entity_ids[ent]]
+
+    for rel in relations:
+        insort(data_dict['relations'], Relation(intern(rel.relation), parsed(rel.arg1), parsed(rel.arg2)))
+
+    for norm in normalizations:
+        insort(data_dict['normalizations'], Normalization(parsed(norm.entity), intern(norm.ontology), norm.ont_id))
@@ -0,0 +1,118 @@
+"""
+Reading BratFiles directly from tar and zip archives, without extracting them.
+Members are read in the order they are stored, and each ann member is paired with the txt member of the same name
+as soon as both have been seen, so a whole archive can be processed in one pass.
+"""
+
+import os
+import tarfile
+import typing as t
+import zipfile
+from functools import partial
+from pathlib import Path, PurePosixPath
+
+from bratlib.data.file_types import BratFile
+from bratlib.data.vocabulary import Vocabulary
+
+_PathLike = t.Union[str, os.PathLike]
+
+
+class ArchiveBratFile(BratFile):
+    """
+    A BratFile for an ann file inside an archive. `ann_path` and `txt_path` are the path of the archive joined with
+    the path of the member; they don't exist on the filesystem. The name is the path of the member without its suffix,
+    such as "train/doc1".
+
+    The text of the ann file is dropped once it has been parsed; if the parsed data is released, the member is read
+    from the archive again.
+
+    :ivar txt_text: the text of the txt file, if it was read from the archive, otherwise None
+    """
+
+    def __init__(self, archive_path: _PathLike, member: str, ann_text: t.Optional[str] = None,
+                 txt_member: t.Optional[str] = None, txt_text: t.Optional[str] = None,
+                 vocabulary: t.Optional[Vocabulary] = None, encoding='utf-8'):
+        archive_path = Path(archive_path)
+        txt_path = archive_path / txt_member if txt_member is not None else None
+        super().__init__(archive_path / member, txt_path, vocabulary)
+        self.name = str(PurePosixPath(member).with_suffix(''))
+        self.archive_path = archive_path
+        self.member = member
+        self.encoding = encoding
+        self.txt_text = txt_text
+        self._ann_text = ann_text
+
+    def _read_text(self) -> str:
+        if self._ann_text is not None:
+            text, self._ann_text = self._ann_text, None
+            return text
+        return _read_member(self.archive_path, self.member).decode(self.encoding)
+
+
+def _read_member(archive_path: Path, member: str) -> bytes:
+    """Reads one member of a tar or zip archive."""
+    if zipfile.is_zipfile(str(archive_path)):
+        with zipfile.ZipFile(str(archive_path)) as archive:
+            return archive.read(member)
+    with tarfile.open(str(archive_path)) as archive:
+        return archive.extractfile(member).read()
+
+
+def _iter_members(archive_path: Path) -> t.Iterator[t.Tuple[str, t.Callable[[], bytes]]]:
+    """Generates (member name, function to read the member) for every regular file in a tar or zip archive."""
+    if zipfile.is_zipfile(str(archive_path)):
+        with zipfile.ZipFile(str(archive_path)) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, partial(archive.read, info)
+        return
+
+    # Stream mode reads the archive sequentially, which also works for compressed tar files
+    with tarfile.open(str(archive_path), mode='r|*') as archive:
+        for member in archive:
+            if member.isfile():
+                yield member.name, archive.extractfile(member).read
+
+
+def iter_archive(archive_path: _PathLike, vocabulary: t.Optional[Vocabulary] = None, *,
+                 parse=True, read_txt=False, encoding='utf-8') -> t.Iterator[ArchiveBratFile]:
+    """
+    Generates an ArchiveBratFile for every ann file in a tar (optionally compressed) or zip archive,
+    in one pass over the archive.
+
+    An ann file is generated once the txt file of the same name has been seen as well, or at the end of the archive
+    if there is no such txt file. If archives store each ann file near its txt file, few are held at any time.
+
+    :param archive_path: path to the archive
+    :param vocabulary: the Vocabulary to intern tags through
+    :param parse: if each ann file should be parsed as soon as it is read; otherwise its text is kept until its data
+    is first accessed
+    :param read_txt: if the text of each txt file should be kept in `ArchiveBratFile.txt_text`
+    :param encoding: the encoding of the members
+    """
+    archive_path = Path(archive_path)
+    anns = {}  # member name without suffix -> (member name, text) of ann files waiting for their txt file
+    txts = {}  # member name without suffix -> (member name, text) of txt files waiting for their ann file
+
+    def new_file(ann_member, ann_text, txt_member=None, txt_text=None):
+        ann = ArchiveBratFile(archive_path, ann_member, ann_text, txt_member, txt_text, vocabulary, encoding)
+        return ann.load() if parse else ann
+
+    for name, read in _iter_members(archive_path):
+        stem, suffix = os.path.splitext(name)
+
+        if suffix == '.ann':
+            ann_text = read().decode(encoding)
+            if stem in txts:
+                yield new_file(name, ann_text, *txts.pop(stem))
+            else:
+                anns[stem] = name, ann_text
+        elif suffix == '.txt':
+            txt_text = read().decode(encoding) if read_txt else None
+            if stem in anns:
+                yield new_file(*anns.pop(stem), name, txt_text)
+            else:
+                txts[stem] = name, txt_text
+
+    for ann_member, ann_text in anns.values():
+        yield new_file(ann_member, ann_text)
@@ -0,0 +1,462 @@
+"""
+Columnar representation of a BratDataset.
+A ColumnarDataset stores every annotation of a dataset in a handful of tables of flat arrays, with tags and other
+repeated strings stored as integer codes into the dataset's Vocabulary. It can be written to Parquet files if pyarrow
+is installed or to a NumPy .npz file otherwise, and read back far faster than the ann files can be parsed.
+BratFiles are recreated from the tables lazily, only when their annotations are first accessed.
+
+Tables can also be built directly from arrays of entities and relations, such as the output of a model, and written
+as ann files without creating an object for each annotation; see `ColumnarDataset.from_arrays` and
+`ColumnarDataset.write_ann_files`.
+
+Tables and their columns (annotations refer to other annotations by row number in the referenced table):
+
+- files: name, ann_path, txt_path ('' if there is none)
+- entities: file, tag, start, end, span_offset, span_count, mention
+- spans: start, end (the fragments of every entity, in order)
+- events: file, type, trigger, argument_offset, argument_count
+- event_arguments: role, entity
+- relations: file, relation, arg1, arg2
+- equivalences: file, item_offset, item_count
+- equivalence_items: entity
+- attributes: file, tag, item_offset, item_count
+- attribute_items: kind (0 for entities, 1 for events), item
+- normalizations: file, entity, ontology, ont_id
+- vocabulary: value
+"""
+
+import json
+import os
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+from bratlib.data.annotation_types import Attribute, Entity, Equivalence, Event, Normalization, Relation
+from bratlib.data.directory_types import BratDataset
+from bratlib.data.file_types import BratFile, cached_property
+from bratlib.data.vocabulary import Vocabulary
+
+_PathLike = t.Union[str, os.PathLike]
+
+SCHEMA = {
+    'files': ('name', 'ann_path', 'txt_path'),
+    'entities': ('file', 'tag', 'start', 'end', 'span_offset', 'span_count', 'mention'),
+    'spans': ('start', 'end'),
+    'events': ('file', 'type', 'trigger', 'argument_offset', 'argument_count'),
+    'event_arguments': ('role', 'entity'),
+    'relations': ('file', 'relation', 'arg1', 'arg2'),
+    'equivalences': ('file', 'item_offset', 'item_count'),
+    'equivalence_items': ('entity',),
+    'attributes': ('file', 'tag', 'item_offset', 'item_count'),
+    'attribute_items': ('kind', 'item'),
+    'normalizations': ('file', 'entity', 'ontology', 'ont_id'),
+    'vocabulary': ('value',),
+}
+
+# Columns of str, which are kept as lists; all other columns are int64 arrays
+STRING_COLUMNS = {
+    ('files', 'name'), ('files', 'ann_path'), ('files', 'txt_path'), ('entities', 'mention'),
+    ('normalizations', 'ont_id'), ('vocabulary', 'value'),
+}
+
+# Tables with a `file` column; their rows are sorted by file
+FILE_TABLES = ('entities', 'events', 'relations', 'equivalences', 'attributes', 'normalizations')
+
+ENTITY, EVENT = 0, 1
+
+Tables = t.Dict[str, t.Dict[str, t.Union[np.ndarray, t.List[str]]]]
+Columns = t.Mapping[str, t.Sequence]
+
+
+def _encode_strings(values: t.List[str]) -> np.ndarray:
+    # Values can't contain newlines, since ann files are line based
+    return np.frombuffer('\n'.join(values).encode(), dtype=np.uint8)
+
+
+def _decode_strings(data: np.ndarray, length: int) -> t.List[str]:
+    return data.tobytes().decode().split('\n') if length else []
+
+
+class ColumnarDataset:
+    """
+    The annotations of a dataset as flat tables. See the module docstring for the tables and their columns.
+
+    :ivar tables: dict of table name -> dict of column name -> array (or list, for columns of str)
+    :ivar vocabulary: the Vocabulary that the codes in the tables refer to
+    :ivar directory: the directory of the dataset this instance was created from
+    """
+
+    def __init__(self, tables: Tables, directory: _PathLike = ''):
+        self.tables = tables
+        self.vocabulary = Vocabulary(tables['vocabulary']['value'])
+        self.directory = Path(directory)
+
+    def __len__(self):
+        return len(self.tables['files']['name'])
+
+    @classmethod
+    def from_dataset(cls, dataset: BratDataset) -> 'ColumnarDataset':
+        """Reads every BratFile of a dataset into tables."""
+        vocabulary = Vocabulary(getattr(dataset, 'vocabulary', ()))
+        code = vocabulary.code
+        columns = {table: {column: [] for column in columns} for table, columns in SCHEMA.items()}
+        rows = {}  # id() of an Entity or Event -> its row
+
+        def append(table, *values):
+            for column, value in zip(SCHEMA[table], values):
+                columns[table][column].append(value)
+
+        for i, ann in enumerate(dataset):
+            txt_path = ann._txt_path
+            append('files', ann.name, str(ann.ann_path), str(txt_path) if txt_path is not None else '')
+
+            for e in ann.entities:
+                rows[id(e)] = len(columns['entities']['file'])
+                append('entities', i, code(e.tag), e.spans[0][0], e.spans[-1][-1],
+                       len(columns['spans']['start']), len(e.spans), e.mention)
+                for a, b in e.spans:
+                    append('spans', a, b)
+
+            for ev in ann.events:
+                rows[id(ev)] = len(columns['events']['file'])
+                append('events', i, code(ev.event_type), rows[id(ev.trigger)],
+                       len(columns['event_arguments']['role']), len(ev.arguments))
+                for role, e in ev.arguments.items():
+                    append('event_arguments', code(role), rows[id(e)])
+
+            for r in ann.relations:
+                append('relations', i, code(r.relation), rows[id(r.arg1)], rows[id(r.arg2)])
+
+            for eq in ann.equivalences:
+                append('equivalences', i, len(columns['equivalence_items']['entity']), len(eq.items))
+                for e in eq.items:
+                    append('equivalence_items', rows[id(e)])
+
+            for attr in ann.attributes:
+                append('attributes', i, code(attr.tag), len(columns['attribute_items']['kind']), len(attr.items))
+                for item in attr.items:
+                    append('attribute_items', EVENT if isinstance(item, Event) else ENTITY, rows[id(item)])
+
+            for n in ann.normalizations:
+                append('normalizations', i, rows[id(n.entity)], code(n.ontology), n.ont_id)
+
+        columns['vocabulary']['value'] = list(vocabulary)
+
+        tables = {
+            table: {
+                column: values if (table, column) in STRING_COLUMNS else np.array(values, dtype=np.int64)
+                for column, values in table_columns.items()
+            }
+            for table, table_columns in columns.items()
+        }
+        return cls(tables, dataset.directory)
+
+    @classmethod
+    def from_arrays(cls, entities: Columns, relations: t.Optional[Columns] = None, *,
+                    texts: t.Optional[t.Mapping[t.Any, str]] = None, directory: _PathLike = '') -> 'ColumnarDataset':
+        """
+        Builds tables for many documents at once from columns of contiguous entities and of relations between them,
+        such as a dict of arrays or a DataFrame. Other columns, such as scores, are ignored.
+
+        :param entities: columns 'doc' (the document of each entity, which is named by `str(doc)`), 'start', 'end',
+        'label', and optionally 'mention'
+        :param relations: columns 'arg1' and 'arg2' (the positions of the arguments in `entities`) and 'label'
+        :param texts: dict of doc -> the text of the document, to take the mentions from if there is no 'mention'
+        column
+        :param directory: the directory the ann files are in, or will be written to
+        """
+        file_values, file_index = np.unique(np.asarray(entities['doc']), return_inverse=True)
+        start = np.asarray(entities['start'], dtype=np.int64)
+        end = np.asarray(entities['end'], dtype=np.int64)
+        # Codes are in the sorted order of the labels, so sorting by code sorts by label
+        labels, tag = np.unique(np.asarray(entities['label'], dtype=str), return_inverse=True)
+        vocabulary = Vocabulary(labels.tolist())
+
+        # Rows are in the order that BratFile sorts entities in, within each file
+        order = np.lexsort((tag, end, start, file_index))
+        if 'mention' in entities:
+            mentions = np.asarray(entities['mention'], dtype=str)[order].tolist()
+        elif texts is not None:
+            docs = file_values.tolist()
+            mentions = [texts[docs[f]][a:b] for f, a, b in zip(
+                file_index[order].tolist(), start[order].tolist(), end[order].tolist())]
+        else:
+            raise ValueError("entities must have a 'mention' column, or texts must be given")
+
+        size = len(order)
+        tables = {table: {column: ([] if (table, column) in STRING_COLUMNS else np.zeros(0, dtype=np.int64))
+                          for column in columns}
+                  for table, columns in SCHEMA.items()}
+        tables['entities'] = {
+            'file': file_index[order].astype(np.int64), 'tag': tag[order].astype(np.int64),
+            'start': start[order], 'end': end[order],
+            'span_offset': np.arange(size, dtype=np.int64), 'span_count': np.ones(size, dtype=np.int64),
+            'mention': mentions,
+        }
+        tables['spans'] = {'start': start[order], 'end': end[order]}
+
+        if relations is not None:
+            rows = np.empty(size, dtype=np.int64)
+            rows[order] = np.arange(size)
+            arg1 = rows[np.asarray(relations['arg1'], dtype=np.int64)]
+            arg2 = rows[np.asarray(relations['arg2'], dtype=np.int64)]
+            rel_file = tables['entities']['file'][arg1]
+            if not np.array_equal(rel_file, tables['entities']['file'][arg2]):
+                raise ValueError('relations must be between entities of the same document')
+            rel_labels, rel_codes = np.unique(np.asarray(relations['label'], dtype=str), return_inverse=True)
+            codes = np.array(vocabulary.codes(rel_labels.tolist()), dtype=np.int64)
+
+            rel_order = np.lexsort((arg2, arg1, rel_file))
+            tables['relations'] = {
+                'file': rel_file[rel_order], 'relation': codes[rel_codes[rel_order]],
+                'arg1': arg1[rel_order], 'arg2': arg2[rel_order],
+            }
+
+        directory = Path(directory)
+        names = [str(d) for d in file_values.tolist()]
+        tables['files'] = {
+            'name': names,
+            'ann_path': [str(directory / f'{name}.ann') for name in names],
+            'txt_path': [''] * len(names),
+        }
+        tables['vocabulary']['value'] = list(vocabulary)
+        return cls(tables, directory)
+
+    def save(self, path: _PathLike, format: t.Optional[str] = None):
+        """
+        Writes the tables to `path`.
+        :param path: a directory of Parquet files, one per table, or a .npz file
+        :param format: 'parquet' or 'npz'; by default, 'parquet' if pyarrow is installed, otherwise 'npz'
+        """
+        if format is None:
+            try:
+                import pyarrow  # noqa: F401
+                format = 'parquet'
+            except ImportError:
+                format = 'npz'
+
+        if format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            directory = Path(path)
+            directory.mkdir(parents=True, exist_ok=True)
+            for table, columns in self.tables.items():
+                arrays = {column: pa.array(values) for column, values in columns.items()}
+                pq.write_table(pa.table(arrays), str(directory / f'{table}.parquet'))
+            (directory / 'dataset.json').write_text(json.dumps({'directory': str(self.directory)}))
+        elif format == 'npz':
+            arrays = {'directory': _encode_strings([str(self.directory)])}
+            for table, columns in self.tables.items():
+                for column, values in columns.items():
+                    if (table, column) in STRING_COLUMNS:
+                        arrays[f'{table}.{column}'] = _encode_strings(values)
+                        arrays[f'{table}.{column}.length'] = np.array(len(values))
+                    else:
+                        arrays[f'{table}.{column}'] = values
+            with open(path, 'wb') as f:
+                np.savez(f, **arrays)
+        else:
+            raise ValueError("format must be 'parquet' or 'npz'")
+
+    @classmethod
+    def load(cls, path: _PathLike) -> 'ColumnarDataset':
+        """Reads tables written by `save`, as Parquet files if `path` is a directory or as a .npz file otherwise."""
+        path = Path(path)
+
+        if path.is_dir():
+            import pyarrow.parquet as pq
+
+            tables = {}
+            for table, columns in SCHEMA.items():
+                pa_table = pq.read_table(str(path / f'{table}.parquet'))
+                tables[table] = {
+                    column: pa_table.column(column).to_pylist() if (table, column) in STRING_COLUMNS
+                    else pa_table.column(column).to_numpy().astype(np.int64, copy=False)
+                    for column in columns
+                }
+            directory = json.loads((path / 'dataset.json').read_text())['directory']
+            return cls(tables, directory)
+
+        with np.load(str(path)) as npz:
+            tables = {
+                table: {
+                    column: _decode_strings(npz[f'{table}.{column}'], int(npz[f'{table}.{column}.length']))
+                    if (table, column) in STRING_COLUMNS else npz[f'{table}.{column}']
+                    for column in columns
+                }
+                for table, columns in SCHEMA.items()
+            }
+            directory = _decode_strings(npz['directory'], 1)[0]
+        return cls(tables, directory)
+
+    @cached_property
+    def _file_offsets(self) -> t.Dict[str, np.ndarray]:
+        """For each table with a file column, the first row of every file, followed by the number of rows."""
+        file_numbers = np.arange(len(self) + 1)
+        return {table: np.searchsorted(self.tables[table]['file'], file_numbers) for table in FILE_TABLES}
+
+    def rows(self, table: str, file: int) -> range:
+        """Returns the rows of a table that belong to the file at the given position."""
+        offsets = self._file_offsets[table]
+        return range(offsets[file], offsets[file + 1])
+
+    def file_columns(self, table: str, file: int, *columns: str) -> t.List[list]:
+        """Returns lists of the values of the given columns for the rows that belong to the file at a position."""
+        rows = self.rows(table, file)
+        return [self._slice(table, column, rows.start, rows.stop) for column in columns]
+
+    def _slice(self, table: str, column: str, start: int, stop: int) -> list:
+        values = self.tables[table][column][start:stop]
+        return values if isinstance(values, list) else values.tolist()
+
+    def ann_text(self, file: int) -> str:
+        """Creates the text of the ann file at the given position, the same as `str` of its BratFile would."""
+        values = self.vocabulary.values
+        lines = []
+
+        first_entity = self.rows('entities', file).start
+        tags, offsets, counts, mentions = self.file_columns(
+            'entities', file, 'tag', 'span_offset', 'span_count', 'mention')
+        span_start, span_end = (self._slice('spans', c, offsets[0], offsets[-1] + counts[-1]) if offsets else []
+                                for c in ('start', 'end'))
+        position = 0
+        for i, (tag, count, mention) in enumerate(zip(tags, counts, mentions), 1):
+            if count == 1:
+                spans = f'{span_start[position]} {span_end[position]}'
+            else:
+                spans = ';'.join(f'{a} {b}' for a, b in zip(span_start[position:position + count],
+                                                            span_end[position:position + count]))
+            position += count
+            lines.append(f'T{i}\t{values[tag]} {spans}\t{mention}\n')
+
+        first_event = self.rows('events', file).start
+        for i, (event_type, trigger, offset, count) in enumerate(zip(*self.file_columns(
+                'events', file, 'type', 'trigger', 'argument_offset', 'argument_count')), 1):
+            roles = self._slice('event_arguments', 'role', offset, offset + count)
+            args = self._slice('event_arguments', 'entity', offset, offset + count)
+            arguments = ''.join(f' {values[r]}:T{e - first_entity + 1}' for r, e in zip(roles, args))
+            lines.append(f'E{i}\t{values[event_type]}:T{trigger - first_entity + 1}{arguments}\n')
+
+        for i, (relation, arg1, arg2) in enumerate(zip(*self.file_columns(
+                'relations', file, 'relation', 'arg1', 'arg2')), 1):
+            lines.append(f'R{i}\t{values[relation]} Arg1:T{arg1 - first_entity + 1} Arg2:T{arg2 - first_entity + 1}\n')
+
+        for offset, count in zip(*self.file_columns('equivalences', file, 'item_offset', 'item_count')):
+            items = self._slice('equivalence_items', 'entity', offset, offset + count)
+            lines.append('*\tEquiv ' + ' '.join(f'T{e - first_entity + 1}' for e in items) + '\n')
+
+        for i, (tag, offset, count) in enumerate(zip(*self.file_columns(
+                'attributes', file, 'tag', 'item_offset', 'item_count')), 1):
+            kinds = self._slice('attribute_items', 'kind', offset, offset + count)
+            items = self._slice('attribute_items', 'item', offset, offset + count)
+            ids = ' '.join(f'E{item - first_event + 1}' if kind == EVENT else f'T{item - first_entity + 1}'
+                           for kind, item in zip(kinds, items))
+            lines.append(f'A{i}\t{values[tag]} {ids}\n')
+
+        all_mentions = self.tables['entities']['mention']
+        for i, (entity, ontology, ont_id) in enumerate(zip(*self.file_columns(
+                'normalizations', file, 'entity', 'ontology', 'ont_id')), 1):
+            lines.append(f'N{i}\tReference T{entity - first_entity + 1} {values[ontology]}:{ont_id}\t'
+                         f'{all_mentions[entity]}\n')
+
+        return ''.join(lines)
+
+    def write_ann_files(self, directory: t.Optional[_PathLike] = None):
+        """
+        Writes the ann file of every file in the tables, straight from the tables rather than through BratFiles.
+        :param directory: the directory to write the files to, by their names; defaults to `directory`
+        """
+        directory = Path(directory) if directory is not None else self.directory
+        created = set()
+        for file, name in enumerate(self.tables['files']['name']):
+            path = directory / f'{name}.ann'
+            if path.parent not in created:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                created.add(path.parent)
+            path.write_text(self.ann_text(file))
+
+    def to_dataset(self) -> BratDataset:
+        """Creates a BratDataset of ColumnarBratFiles, which are only filled in when their data is accessed."""
+        brat_files = [ColumnarBratFile(self, i) for i in range(len(self))]
+        return BratDataset(self.directory, brat_files, self.vocabulary)
+
+
+class ColumnarBratFile(BratFile):
+    """A BratFile whose data is created from a ColumnarDataset instead of by reading its ann file."""
+
+    def __init__(self, columns: ColumnarDataset, file: int):
+        files = columns.tables['files']
+        txt_path = files['txt_path'][file] or None
+        super().__init__(files['ann_path'][file], txt_path, columns.vocabulary)
+        self.name = files['name'][file]
+        self._columns = columns
+        self._file = file
+
+    @cached_property
+    def _data_dict(self) -> t.Dict[str, list]:
+        columns, file = self._columns, self._file
+        values = columns.vocabulary.values
+
+        def items(table, offset, count, *item_columns):
+            return [columns._slice(table, c, offset, offset + count) for c in item_columns]
+
+        first_entity = columns.rows('entities', file).start
+        entities = []
+        for tag, offset, count, mention in zip(*columns.file_columns(
+                'entities', file, 'tag', 'span_offset', 'span_count', 'mention')):
+            starts, ends = items('spans', offset, count, 'start', 'end')
+            entities.append(Entity(values[tag], list(zip(starts, ends)), mention))
+
+        first_event = columns.rows('events', file).start
+        events = []
+        for event_type, trigger, offset, count in zip(*columns.file_columns(
+                'events', file, 'type', 'trigger', 'argument_offset', 'argument_count')):
+            roles, args = items('event_arguments', offset, count, 'role', 'entity')
+            arguments = {values[role]: entities[e - first_entity] for role, e in zip(roles, args)}
+            events.append(Event(values[event_type], entities[trigger - first_entity], arguments))
+
+        relations = [
+            Relation(values[relation], entities[arg1 - first_entity], entities[arg2 - first_entity])
+            for relation, arg1, arg2 in zip(*columns.file_columns('relations', file, 'relation', 'arg1', 'arg2'))
+        ]
+
+        equivalences = []
+        for offset, count in zip(*columns.file_columns('equivalences', file, 'item_offset', 'item_count')):
+            eq_items, = items('equivalence_items', offset, count, 'entity')
+            equivalences.append(Equivalence([entities[e - first_entity] for e in eq_items]))
+
+        attributes = []
+        for tag, offset, count in zip(*columns.file_columns('attributes', file, 'tag', 'item_offset', 'item_count')):
+            kinds, attr_items = items('attribute_items', offset, count, 'kind', 'item')
+            attributes.append(Attribute(values[tag], [
+                events[i - first_event] if kind == EVENT else entities[i - first_entity]
+                for kind, i in zip(kinds, attr_items)
+            ]))
+
+        normalizations = [
+            Normalization(entities[e - first_entity], values[ontology], ont_id)
+            for e, ontology, ont_id in zip(*columns.file_columns(
+                'normalizations', file, 'entity', 'ontology', 'ont_id'))
+        ]
+
+        # The rows were written from sorted lists, so they are already in order
+        return {
+            'entities': entities,
+            'events': events,
+            'relations': relations,
+            'equivalences': equivalences,
+            'attributes': attributes,
+            'normalizations': normalizations,
+        }
+
+
+def export_dataset(dataset: BratDataset, path: _PathLike, format: t.Optional[str] = None):
+    """Writes a BratDataset to columnar files; see `ColumnarDataset.save`."""
+    ColumnarDataset.from_dataset(dataset).save(path, format)
+
+
+def load_dataset(path: _PathLike) -> BratDataset:
+    """Reads columnar files written by `export_dataset` as a BratDataset of lazily created BratFiles."""
+    return ColumnarDataset.load(path).to_dataset()
@@ -1,7 +1,10 @@
 import os
 import typing as t
+from operator import attrgetter
 from pathlib import Path
+from bratlib.data.discovery import find_brat_files
 from bratlib.data.file_types import BratFile
+from bratlib.data.vocabulary import Vocabulary
 
 _PathLike = t.Union[str, os.PathLike]
 
@@ -13,21 +16,62 @@ class BratDataset:
     :ivar directory: the pathlib.Path of the directory this BratDataset represents.
     :ivar brat_files: List[BratFile] of the BratFiles in that directory, or which this instance is otherwise meant to
     represent.
+    :ivar vocabulary: the Vocabulary shared by the BratFiles of this dataset; it is given to every BratFile
+    that doesn't already have one.
     """
 
-    def __init__(self, dir_path: _PathLike, brat_files: t.List[BratFile]):
+    def __init__(self, dir_path: _PathLike, brat_files: t.List[BratFile], vocabulary: t.Optional[Vocabulary] = None):
         self.directory = Path(dir_path)
         self.brat_files = brat_files
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+
+        for ann in brat_files:
+            if ann.vocabulary is None:
+                ann.vocabulary = self.vocabulary
 
     @classmethod
-    def from_directory(cls, dir_path: _PathLike):
+    def from_directory(cls, dir_path: _PathLike, vocabulary: t.Optional[Vocabulary] = None, *, recursive=False,
+                       include: t.Optional[t.Union[str, t.Iterable[str]]] = None,
+                       exclude: t.Optional[t.Union[str, t.Iterable[str]]] = None,
+                       max_workers: t.Optional[int] = None):
         """
         Automatically creates BratFiles for all the ann files in a given directory when creating the BratDataset.
+        If `recursive`, ann files in subdirectories are included as well, and are named by their path relative to
+        `dir_path`, such as "train/doc1". `include` and `exclude` are glob patterns for the relative paths of the ann
+        files; see `bratlib.data.discovery.discover`.
+        If `max_workers` is given, all the ann files are read and parsed up front, with up to that many reads in flight
+        at once; this is much faster on high-latency filesystems.
         """
         directory = Path(dir_path)
-        brat_files = [BratFile.from_ann_path(p) for p in directory.iterdir() if p.suffix == '.ann']
-        brat_files.sort()
-        return cls(directory, brat_files)
+        brat_files = find_brat_files(directory, recursive=recursive, include=include, exclude=exclude)
+        brat_files.sort(key=attrgetter('name'))
+        new = cls(directory, brat_files, vocabulary)
+
+        if max_workers is not None:
+            new.load(max_workers)
+
+        return new
+
+    @classmethod
+    def from_archive(cls, archive_path: _PathLike, vocabulary: t.Optional[Vocabulary] = None, **kwargs):
+        """
+        Creates a BratDataset of all the ann files in a tar or zip archive, without extracting it.
+        Keyword arguments are passed to `bratlib.data.archives.iter_archive`; to process an archive in one pass
+        without holding all of its BratFiles, use that function directly.
+        """
+        from bratlib.data.archives import iter_archive
+
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        brat_files = sorted(iter_archive(archive_path, vocabulary, **kwargs))
+        return cls(archive_path, brat_files, vocabulary)
+
+    def load(self, max_workers: int = 16):
+        """
+        Reads and parses every ann file that has not been read yet, with up to `max_workers` reads in flight
+        at once. Each file is parsed as soon as it has been read, while other reads are still in progress.
+        """
+        from bratlib.data import loading
+        loading.load_concurrently(self.brat_files, max_workers)
 
     def __iter__(self) -> t.Iterator[BratFile]:
         return iter(self.brat_files)
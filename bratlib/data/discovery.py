@@ -0,0 +1,91 @@
+"""
+Finding the ann files of a corpus, which may be spread over a tree of directories.
+Each directory is listed once with `os.scandir`, and ann files are paired with txt files from that same listing,
+so no further calls to the filesystem are made per file.
+"""
+
+import os
+import re
+import typing as t
+from fnmatch import translate
+from pathlib import Path
+
+from bratlib.data.file_types import BratFile
+
+_PathLike = t.Union[str, os.PathLike]
+_Patterns = t.Optional[t.Union[str, t.Iterable[str]]]
+
+
+def _compile(patterns: _Patterns) -> t.Optional[t.Pattern]:
+    """Combines glob patterns into one regular expression, or returns None if there are none."""
+    if patterns is None:
+        return None
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{translate(p)})' for p in patterns))
+
+
+def discover(root: _PathLike, *, recursive=False, include: _Patterns = None, exclude: _Patterns = None) \
+        -> t.Iterator[t.Tuple[str, Path, t.Optional[Path]]]:
+    """
+    Generates (name, ann path, txt path or None) for every ann file under a directory.
+    The name is the path of the ann file relative to `root`, with forward slashes and without the suffix,
+    so it is just the stem for files directly in `root`.
+
+    Glob patterns are matched against the relative path of each ann file, such as "train/doc1.ann";
+    as with `fnmatch`, "*" also matches "/". Directories whose relative path matches an exclude pattern are not
+    walked at all.
+
+    :param root: the directory to search
+    :param recursive: if subdirectories should be searched as well
+    :param include: glob pattern(s) that an ann file must match to be included, if any are given
+    :param exclude: glob pattern(s) of ann files and directories to leave out
+    """
+    root = Path(root)
+    include = _compile(include)
+    exclude = _compile(exclude)
+
+    stack = [(root, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        anns = []
+        txts = set()
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.ann'):
+                    anns.append(name)
+                elif name.endswith('.txt'):
+                    txts.add(name)
+                elif recursive and entry.is_dir():
+                    relative = prefix + name
+                    if exclude is None or not exclude.match(relative):
+                        stack.append((directory / name, relative + '/'))
+
+        for name in anns:
+            relative = prefix + name
+            if include is not None and not include.match(relative):
+                continue
+            if exclude is not None and exclude.match(relative):
+                continue
+            stem = name[:-4]
+            txt_name = stem + '.txt'
+            txt_path = directory / txt_name if txt_name in txts else None
+            yield prefix + stem, directory / name, txt_path
+
+
+def find_brat_files(root: _PathLike, **kwargs) -> t.List[BratFile]:
+    """
+    Creates a BratFile for every ann file found by `discover`, named by its path relative to `root`.
+    Keyword arguments are passed to `discover`.
+    """
+    brat_files = []
+    for name, ann_path, txt_path in discover(root, **kwargs):
+        ann = BratFile(ann_path, txt_path)
+        ann.name = name
+        brat_files.append(ann)
+    return brat_files
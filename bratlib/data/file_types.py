@@ -1,12 +1,19 @@
 import os
 import re
+import sys
 import typing as t
 from pathlib import Path
 
-from cached_property import cached_property
+try:
+    from functools import cached_property
+except ImportError:
+    # Python < 3.8; the backport also imports asyncio, so it is only used when necessary
+    from cached_property import cached_property
 
 from bratlib.data import _patterns, _utils
+from bratlib.data.adjacency import AdjacencyIndex
 from bratlib.data.annotation_types import AnnData, Attribute, Entity, Event, Equivalence, Normalization, Relation
+from bratlib.data.vocabulary import Vocabulary
 
 _PathLike = t.Union[str, os.PathLike]
 
@@ -33,12 +40,23 @@ class BratFile:
     two Entity objects one would find in `brat_file.entities`.
 
     Accessing the `txt_path` attribute will raise NoTxtError if the instance does not have a txt file.
+
+    `adjacency` is an AdjacencyIndex of the annotations that refer to each entity and event, created the first time
+    it is accessed.
+
+    Tags, relation and event types, argument roles, and ontology names are interned through `vocabulary` when the file
+    is read (or with `sys.intern` if it is None), so BratFiles sharing a Vocabulary share one instance of each.
+    The vocabulary is not pickled with a BratFile, since it can be much larger than the file; a BratFile sent to
+    another process interns with `sys.intern` instead.
     """
 
-    def __init__(self, ann_path: _PathLike, txt_path: _PathLike):
-        self.ann_path = Path(ann_path)
-        self._txt_path = Path(txt_path) if txt_path is not None else None
+    vocabulary: t.Optional[Vocabulary] = None
+
+    def __init__(self, ann_path: _PathLike, txt_path: _PathLike, vocabulary: t.Optional[Vocabulary] = None):
+        self.ann_path = ann_path if isinstance(ann_path, Path) else Path(ann_path)
+        self._txt_path = txt_path if isinstance(txt_path, Path) or txt_path is None else Path(txt_path)
         self.name = self.ann_path.stem
+        self.vocabulary = vocabulary
 
         self._mapping = {}
 
@@ -49,13 +67,16 @@ class BratFile:
             new_e = BratParseError(f'An annotation refers to {value}, though this does not appear in the .ann file')
             raise new_e from e
 
+    @staticmethod
+    def _find_txt(ann_path: Path) -> t.Optional[Path]:
+        possible_txt = ann_path.with_suffix('.txt')
+        return possible_txt if possible_txt.exists() else None
+
     @classmethod
     def from_ann_path(cls, ann_path: _PathLike):
         """Automatically pairs the ann file with a txt file if one by the same name exists in the directory"""
         ann_path = Path(ann_path)
-        possible_txt = Path(str(ann_path).rstrip('ann') + 'txt')
-        txt_path = possible_txt if possible_txt.exists() else None
-        return cls(ann_path, txt_path)
+        return cls(ann_path, cls._find_txt(ann_path))
 
     @classmethod
     def from_data(cls,
@@ -83,6 +104,11 @@ class BratFile:
     def __repr__(self):
         return f'<{self.__class__.__name__}: {self.name}>'
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['vocabulary'] = None
+        return state
+
     @_utils.return_not_implemented
     def __lt__(self, other):
         return self.name < other.name
@@ -99,11 +125,29 @@ class BratFile:
 
     @cached_property
     def _data_dict(self) -> t.Dict[str, t.List[AnnData]]:
-        text = self.ann_path.read_text()
+        return self._parse(self._read_text())
+
+    def _read_text(self) -> str:
+        """Reads the text of the ann file; subclasses whose text isn't at `ann_path` override this."""
+        return self.ann_path.read_text()
+
+    def load(self) -> 'BratFile':
+        """Reads and parses the ann file now if it has not been read yet, instead of when its data is first accessed."""
+        if not hasattr(self, '_entities'):
+            # The cached property parses the file the first time it is accessed
+            self._data_dict
+        return self
+
+    def _set_text(self, text: str):
+        """Parses text read from the ann file elsewhere and caches the result, so the file is not read again."""
+        self.__dict__['_data_dict'] = self._parse(text)
+
+    def _parse(self, text: str) -> t.Dict[str, t.List[AnnData]]:
         data_dict = {}
+        intern = self.vocabulary.intern if self.vocabulary is not None else sys.intern
 
         # Entities
-        ent_mapping = {match[1]: Entity._from_re(match) for match in _patterns.ent_pattern.finditer(text)}
+        ent_mapping = {match[1]: Entity._from_re(match, intern) for match in _patterns.ent_pattern.finditer(text)}
         self._mapping.update(ent_mapping)
         data_dict['entities'] = sorted(ent_mapping.values())
 
@@ -113,10 +157,13 @@ class BratFile:
         for m in _patterns.event_pattern.finditer(text):
             trigger = self._lookup_from_mapping(m[3])
             if m[4]:
-                items = {n[1].strip(): self._lookup_from_mapping(n[2]) for n in re.finditer(r'([^\t:]+):(T\d+)', m[4])}
+                items = {
+                    intern(n[1].strip()): self._lookup_from_mapping(n[2])
+                    for n in re.finditer(r'([^\t:]+):(T\d+)', m[4])
+                }
             else:
                 items = {}
-            new_event = Event(m[2], trigger, items)
+            new_event = Event(intern(m[2]), trigger, items)
             self._mapping[m[1]] = new_event
             events.append(new_event)
 
@@ -126,7 +173,7 @@ class BratFile:
         rels = []
 
         for match in _patterns.rel_pattern.finditer(text):
-            tag = match[1]
+            tag = intern(match[1])
             arg1 = self._lookup_from_mapping(match[2])
             arg2 = self._lookup_from_mapping(match[3])
             new_rel = Relation(tag, arg1, arg2)
@@ -147,18 +194,27 @@ class BratFile:
         attrs = []
 
         for match in _patterns.attrib_pattern.finditer(text):
-            tag = match[1]
+            tag = intern(match[1])
             data = [self._lookup_from_mapping(e[0]) for e in re.finditer(r'[ET]\d+', match[2])]
             attrs.append(Attribute(tag, data))
 
         data_dict['attributes'] = sorted(attrs)
 
         # Normalizations
-        data_dict['normalizations'] = sorted(Normalization(ent_mapping[m[1]], m[2], m[3])
+        data_dict['normalizations'] = sorted(Normalization(ent_mapping[m[1]], intern(m[2]), m[3])
                                              for m in _patterns.norm_pattern.finditer(text))
 
         return data_dict
 
+    def append_annotations(self, entities: t.Iterable[Entity] = (), relations: t.Iterable[Relation] = (),
+                           normalizations: t.Iterable[Normalization] = ()) -> t.List[str]:
+        """
+        Appends annotations to the ann file with the next free IDs, without rewriting or renumbering the annotations
+        already in it; see `bratlib.data.appending.append_annotations`. Returns the IDs of the new annotations.
+        """
+        from bratlib.data.appending import append_annotations
+        return append_annotations(self, entities, relations, normalizations)
+
     @property
     def entities(self) -> t.Iterable[Entity]:
         return self._data_dict['entities'] if not hasattr(self, '_entities') else self._entities
@@ -183,6 +239,10 @@ class BratFile:
     def normalizations(self) -> t.Iterable[Normalization]:
         return self._data_dict['normalizations'] if not hasattr(self, '_normalizations') else self._normalizations
 
+    @cached_property
+    def adjacency(self) -> AdjacencyIndex:
+        return AdjacencyIndex(self)
+
     def __str__(self):
         """
         This method creates a representation that can be written to file,
@@ -0,0 +1,65 @@
+"""
+Concurrent loading for filesystems where each file operation has a high latency, such as network filesystems.
+File reads are issued from a pool of threads, with at most `max_workers` requests in flight at a time,
+while the calling thread parses each ann file as soon as it has been read.
+"""
+
+import typing as t
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from bratlib.data.file_types import BratFile
+
+T = t.TypeVar('T')
+R = t.TypeVar('R')
+
+DEFAULT_WORKERS = 16
+
+
+def map_concurrently(function: t.Callable[[T], R], items: t.Iterable[T], max_workers=DEFAULT_WORKERS) \
+        -> t.Iterator[t.Tuple[T, R]]:
+    """
+    Calls `function` on every item from a pool of threads and generates (item, result) as the calls complete,
+    which may not be in the order of `items`. At most `max_workers` calls are in progress at once, and items are
+    only taken from `items` as earlier calls complete.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers) as executor:
+        pending = {executor.submit(function, item): item for item in islice(items, max_workers)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for new_item in islice(items, 1):
+                    pending[executor.submit(function, new_item)] = new_item
+                yield item, future.result()
+
+
+def _read_ann(ann: BratFile) -> str:
+    return ann.ann_path.read_text()
+
+
+def iter_loaded(brat_files: t.Iterable[BratFile], max_workers=DEFAULT_WORKERS) -> t.Iterator[BratFile]:
+    """
+    Reads the ann files of BratFiles concurrently and parses each one in the calling thread as soon as it has been
+    read, generating the BratFiles as they are ready. BratFiles that have already been read are generated first,
+    along with BratFile subclasses, which are loaded in the calling thread since their data may not be at `ann_path`.
+    """
+    unread = []
+    for ann in brat_files:
+        if '_data_dict' in ann.__dict__ or hasattr(ann, '_entities'):
+            yield ann
+        elif type(ann) is not BratFile:
+            yield ann.load()
+        else:
+            unread.append(ann)
+
+    for ann, text in map_concurrently(_read_ann, unread, max_workers):
+        ann._set_text(text)
+        yield ann
+
+
+def load_concurrently(brat_files: t.Iterable[BratFile], max_workers=DEFAULT_WORKERS) -> None:
+    """Reads and parses the ann files of all the given BratFiles; see `iter_loaded`."""
+    for _ in iter_loaded(brat_files, max_workers):
+        pass
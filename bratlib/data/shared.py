@@ -0,0 +1,152 @@
+"""
+Sharing a ColumnarDataset between processes through `multiprocessing.shared_memory` (Python 3.8 or later).
+The tables are copied once into one block of shared memory, and other processes attach to it with a small, picklable
+SharedDatasetHandle. Integer columns are read-only NumPy views of the block, so they are neither copied nor pickled;
+columns of strings are decoded once per process.
+
+This lets a pool of workers read the annotations of a dataset without each of them parsing the ann files again or
+receiving pickled BratFiles.
+"""
+
+import sys
+import typing as t
+
+import numpy as np
+
+from bratlib.data.columnar import SCHEMA, STRING_COLUMNS, ColumnarBratFile, ColumnarDataset, _encode_strings
+from bratlib.tools.iteration import parallel_map
+
+if t.TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+R = t.TypeVar('R')
+
+# Arrays start at multiples of this many bytes
+_ALIGNMENT = 8
+
+
+class SharedDatasetHandle(t.NamedTuple):
+    """
+    Everything a process needs to attach to a shared ColumnarDataset.
+
+    :ivar name: the name of the shared memory block
+    :ivar directory: the directory of the dataset
+    :ivar layout: (table, column, byte offset, number of bytes, number of strings or -1 for integer columns)
+    for every column
+    """
+    name: str
+    directory: str
+    layout: t.Tuple[t.Tuple[str, str, int, int, int], ...]
+
+
+class SharedColumnarDataset:
+    """
+    A ColumnarDataset copied into shared memory, which is freed when this instance is unlinked or, if it is used as a
+    context manager, on exit. Processes that have already attached keep their views until they exit.
+
+    :ivar handle: the SharedDatasetHandle to pass to `attach` in other processes
+    """
+
+    def __init__(self, columns: ColumnarDataset):
+        from multiprocessing.shared_memory import SharedMemory
+
+        arrays, layout, size = [], [], 0
+        for table, table_columns in SCHEMA.items():
+            for column in table_columns:
+                values = columns.tables[table][column]
+                if (table, column) in STRING_COLUMNS:
+                    array, count = _encode_strings(values), len(values)
+                else:
+                    array, count = np.ascontiguousarray(values, dtype=np.int64), -1
+                layout.append((table, column, size, array.nbytes, count))
+                arrays.append(array)
+                size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self._memory = SharedMemory(create=True, size=max(size, 1))
+        for (_, _, offset, nbytes, _), array in zip(layout, arrays):
+            target = np.ndarray((nbytes,), dtype=np.uint8, buffer=self._memory.buf, offset=offset)
+            target[:] = array.view(np.uint8)
+            del target
+
+        self.handle = SharedDatasetHandle(self._memory.name, str(columns.directory), tuple(layout))
+
+    def close(self):
+        """Closes this process's access to the shared memory without freeing it."""
+        self._memory.close()
+
+    def unlink(self):
+        """Closes and frees the shared memory."""
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self) -> 'SharedColumnarDataset':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+
+def share(columns: ColumnarDataset) -> SharedColumnarDataset:
+    """Copies a ColumnarDataset into shared memory; see SharedColumnarDataset."""
+    return SharedColumnarDataset(columns)
+
+
+def _open(name: str) -> 'SharedMemory':
+    from multiprocessing.shared_memory import SharedMemory
+
+    if sys.version_info >= (3, 13):
+        # Only the process that created the block should free it
+        return SharedMemory(name, track=False)
+    return SharedMemory(name)
+
+
+def attach(handle: SharedDatasetHandle) -> ColumnarDataset:
+    """
+    Creates a ColumnarDataset whose integer columns are read-only views of shared memory.
+    The shared memory stays mapped for as long as the ColumnarDataset exists.
+    """
+    memory = _open(handle.name)
+    tables = {table: {} for table in SCHEMA}
+
+    for table, column, offset, nbytes, count in handle.layout:
+        if count < 0:
+            array = np.ndarray((nbytes // 8,), dtype=np.int64, buffer=memory.buf, offset=offset)
+            array.flags.writeable = False
+            tables[table][column] = array
+        else:
+            data = bytes(memory.buf[offset:offset + nbytes])
+            tables[table][column] = data.decode().split('\n') if count else []
+
+    columns = ColumnarDataset(tables, handle.directory)
+    columns._shared_memory = memory
+    return columns
+
+
+_worker_columns: t.Optional[ColumnarDataset] = None
+
+
+def _attach_worker(handle: SharedDatasetHandle):
+    global _worker_columns
+    _worker_columns = attach(handle)
+
+
+def _call(task: tuple):
+    function, file, args = task
+    return function(ColumnarBratFile(_worker_columns, file), *args)
+
+
+def map_files(function: t.Callable[..., R], columns: ColumnarDataset, *args, jobs=1, chunksize=1) -> t.Iterator[R]:
+    """
+    Lazily calls `function(ann, *args)` for every BratFile of a ColumnarDataset, in order.
+    If `jobs` is greater than one, the calls are made in that many processes, which attach to a shared copy of
+    the tables that is freed once the iterator is exhausted or closed; only the position of each file is sent to
+    the workers, and `function` and `args` must be picklable.
+    """
+    if jobs is None or jobs <= 1:
+        for ann in columns.to_dataset():
+            yield function(ann, *args)
+        return
+
+    with share(columns) as shared:
+        tasks = ((function, i, args) for i in range(len(columns)))
+        yield from parallel_map(_call, tasks, jobs, _attach_worker, (shared.handle,), chunksize)
@@ -0,0 +1,138 @@
+"""
+Parsing ann files line by line, for files too large to comfortably read and parse all at once.
+Annotations are generated as their lines are read, and references to other annotations are resolved against the
+annotations read so far. A reference to an annotation that has not been read yet, such as a relation that appears
+before one of its entities, is handled according to a policy:
+
+- 'defer': hold the annotation and resolve it at the end of the file, raising BratParseError if it still can't be
+- 'error': raise BratParseError immediately
+- 'skip': leave the annotation out
+
+Only the annotations and the mapping of IDs to entities and events are kept in memory, never the text of the file.
+"""
+
+import re
+import sys
+import typing as t
+
+from bratlib.data import _patterns
+from bratlib.data.annotation_types import AnnData, Attribute, Entity, Equivalence, Event, Normalization, Relation
+from bratlib.data.file_types import BratFile, BratParseError, _PathLike
+from bratlib.data.vocabulary import Vocabulary
+
+POLICIES = ('defer', 'error', 'skip')
+
+_PATTERNS = {
+    'T': _patterns.ent_pattern,
+    'E': _patterns.event_pattern,
+    'R': _patterns.rel_pattern,
+    '*': _patterns.equiv_pattern,
+    'A': _patterns.attrib_pattern,
+    'N': _patterns.norm_pattern,
+}
+
+_ATTRIBUTES = {
+    Entity: 'entities',
+    Event: 'events',
+    Relation: 'relations',
+    Equivalence: 'equivalences',
+    Attribute: 'attributes',
+    Normalization: 'normalizations',
+}
+
+
+def _build(kind: str, m: t.Match, mapping: t.Dict[str, AnnData], intern: t.Callable[[str], str]) -> AnnData:
+    """Creates the annotation for a matched line; raises KeyError if it refers to an annotation not in `mapping`."""
+    if kind == 'T':
+        new = Entity._from_re(m, intern)
+        mapping[m[1]] = new
+    elif kind == 'E':
+        trigger = mapping[m[3]]
+        items = {
+            intern(n[1].strip()): mapping[n[2]] for n in re.finditer(r'([^\t:]+):(T\d+)', m[4])
+        } if m[4] else {}
+        new = Event(intern(m[2]), trigger, items)
+        mapping[m[1]] = new
+    elif kind == 'R':
+        new = Relation(intern(m[1]), mapping[m[2]], mapping[m[3]])
+    elif kind == '*':
+        new = Equivalence(sorted(mapping[e[0]] for e in re.finditer(r'T\d+', m[1])))
+    elif kind == 'A':
+        new = Attribute(intern(m[1]), [mapping[e[0]] for e in re.finditer(r'[ET]\d+', m[2])])
+    else:
+        new = Normalization(mapping[m[1]], intern(m[2]), m[3])
+    return new
+
+
+def _missing_error(error: KeyError) -> BratParseError:
+    value, = error.args
+    return BratParseError(f'An annotation refers to {value}, though this does not appear in the .ann file')
+
+
+def iter_annotations(ann_path: _PathLike, vocabulary: t.Optional[Vocabulary] = None, *,
+                     forward_references='defer', mapping: t.Optional[t.Dict[str, AnnData]] = None,
+                     encoding: t.Optional[str] = None) -> t.Iterator[AnnData]:
+    """
+    Generates the annotations of an ann file as they are read, one line at a time.
+    :param ann_path: path to the ann file
+    :param vocabulary: the Vocabulary to intern tags through, or None to use `sys.intern`
+    :param forward_references: 'defer', 'error', or 'skip'; see the module docstring
+    :param mapping: dict to add each entity and event to by ID, which is otherwise created and discarded
+    :param encoding: the encoding of the file, which defaults to the same as `Path.read_text`
+    """
+    if forward_references not in POLICIES:
+        raise ValueError("forward_references must be 'defer', 'error', or 'skip'")
+
+    intern = vocabulary.intern if vocabulary is not None else sys.intern
+    mapping = mapping if mapping is not None else {}
+    deferred = []
+
+    with open(ann_path, encoding=encoding) as f:
+        for line in f:
+            pattern = _PATTERNS.get(line[:1])
+            if pattern is None:
+                continue
+            if not line.endswith('\n'):
+                # Some patterns expect whitespace after the last ID
+                line += '\n'
+            m = pattern.match(line)
+            if m is None:
+                continue
+
+            try:
+                yield _build(line[0], m, mapping, intern)
+            except KeyError as e:
+                if forward_references == 'error':
+                    raise _missing_error(e) from e
+                if forward_references == 'defer':
+                    deferred.append((line[0], m))
+
+    # Deferred annotations can refer to each other, such as an attribute of a deferred event
+    while deferred:
+        remaining = []
+        for kind, m in deferred:
+            try:
+                yield _build(kind, m, mapping, intern)
+            except KeyError as e:
+                remaining.append((kind, m))
+                error = e
+        if len(remaining) == len(deferred):
+            raise _missing_error(error) from error
+        deferred = remaining
+
+
+def load_streaming(ann: BratFile, forward_references='defer', encoding: t.Optional[str] = None) -> None:
+    """
+    Parses the ann file of a BratFile line by line and caches the result, as if its data had been accessed.
+    This gives the same data as the usual parse for files without forward references, without reading the whole
+    file into memory first.
+    """
+    data_dict = {attribute: [] for attribute in _ATTRIBUTES.values()}
+    for annotation in iter_annotations(ann.ann_path, ann.vocabulary, forward_references=forward_references,
+                                       mapping=ann._mapping, encoding=encoding):
+        data_dict[_ATTRIBUTES[type(annotation)]].append(annotation)
+
+    for annotations in data_dict.values():
+        annotations.sort()
+    ann.__dict__['_data_dict'] = data_dict
+    ann.__dict__.pop('adjacency', None)
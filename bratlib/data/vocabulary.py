@@ -0,0 +1,63 @@
+import threading
+import typing as t
+
+
+class Vocabulary:
+    """
+    A Vocabulary maps strings such as tags and ontology names to one canonical instance and a unique integer code.
+    BratFiles that share a Vocabulary store every tag as the canonical instance, so equal tags are the same object,
+    and codes can be used wherever integers are more convenient than strings, such as in arrays.
+
+    :ivar values: List[str] of the values in the vocabulary, where each value's code is its position in the list
+    """
+
+    def __init__(self, values: t.Iterable[str] = ()):
+        self.values: t.List[str] = []
+        self._codes: t.Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value: str) -> str:
+        """Returns the canonical instance of a string, adding it to the vocabulary if it is not already present."""
+        try:
+            return self.values[self._codes[value]]
+        except KeyError:
+            with self._lock:
+                if value not in self._codes:
+                    # The value is added before its code, since readers look up codes without the lock
+                    self.values.append(value)
+                    self._codes[value] = len(self.values) - 1
+            return self.values[self._codes[value]]
+
+    def code(self, value: str) -> int:
+        """Returns the code of a string, adding it to the vocabulary if it is not already present."""
+        try:
+            return self._codes[value]
+        except KeyError:
+            self.intern(value)
+            return self._codes[value]
+
+    def codes(self, values: t.Iterable[str]) -> t.List[int]:
+        return [self.code(v) for v in values]
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._codes
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self.values)} values>'
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, state):
+        self.__init__(state)
@@ -0,0 +1,129 @@
+"""
+Conversion of entity annotations to token level BIO labels, such as for training sequence labelling models.
+Tokens are given as sorted, non-overlapping (start, end) character offsets, either directly or from a tokenizer that
+is called on the text of each document. Each entity span is mapped to the tokens it overlaps by bisecting the token
+offsets, so a document is converted in O(m log n) time for m entities and n tokens.
+"""
+
+import argparse
+import re
+import sys
+import typing as t
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+from bratlib.data import BratDataset, BratFile, Entity
+from bratlib.tools.iteration import parallel_map
+
+Span = t.Tuple[int, int]
+Tokenizer = t.Callable[[str], t.List[Span]]
+
+OUTSIDE = 'O'
+
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def tokenize(text: str) -> t.List[Span]:
+    """The default tokenizer, which splits text into runs of word characters and single punctuation characters."""
+    return [m.span() for m in _TOKEN_PATTERN.finditer(text)]
+
+
+def bio_labels(entities: t.Iterable[Entity], tokens: t.Sequence[Span]) -> t.List[str]:
+    """
+    Labels each token 'B-<tag>' if it is the first token of an entity, 'I-<tag>' if it is another token of an entity,
+    or 'O'. A token belongs to an entity if it overlaps any of the entity's spans, so all the tokens of a discontiguous
+    entity after the first are labelled 'I-<tag>'.
+
+    BIO labels cannot represent overlapping entities. Entities are labelled in order of their start offsets,
+    longest first, and an entity is left out if any of its tokens already belongs to another entity.
+
+    :param entities: the entities to label
+    :param tokens: sorted, non-overlapping (start, end) offsets of the tokens
+    :return: a label for each token
+    """
+    starts = list(map(itemgetter(0), tokens))
+    ends = list(map(itemgetter(1), tokens))
+    labels = [OUTSIDE] * len(tokens)
+
+    for ent in sorted(entities, key=lambda e: (e.spans[0][0], -e.spans[-1][-1])):
+        # The tokens overlapping a span are those that end after it starts and start before it ends
+        if len(ent.spans) == 1:
+            (start, end), = ent.spans
+            positions = range(bisect_right(ends, start), bisect_left(starts, end))
+        else:
+            positions = list(dict.fromkeys(
+                i for start, end in ent.spans for i in range(bisect_right(ends, start), bisect_left(starts, end))
+            ))
+        if not positions or any(labels[i] is not OUTSIDE for i in positions):
+            continue
+
+        labels[positions[0]] = 'B-' + ent.tag
+        inside = 'I-' + ent.tag
+        for i in positions[1:]:
+            labels[i] = inside
+
+    return labels
+
+
+class BioDocument(t.NamedTuple):
+    """The BIO labels of one document, with the text and offsets of each token."""
+    name: str
+    words: t.List[str]
+    tokens: t.List[Span]
+    labels: t.List[str]
+
+
+def convert_file(ann: BratFile, tokenizer: Tokenizer = tokenize, tokens: t.Optional[t.Sequence[Span]] = None) \
+        -> BioDocument:
+    """
+    Creates the BioDocument for a BratFile, which must have a txt file.
+    :param ann: the BratFile to convert
+    :param tokenizer: a function that takes the text of a document and returns its token offsets
+    :param tokens: token offsets to use instead of calling `tokenizer`
+    """
+    text = ann.txt_path.read_text()
+    tokens = list(tokens) if tokens is not None else tokenizer(text)
+    return BioDocument(ann.name, [text[s:e] for s, e in tokens], tokens, bio_labels(ann.entities, tokens))
+
+
+def _convert_task(task: t.Tuple[BratFile, Tokenizer]) -> BioDocument:
+    return convert_file(*task)
+
+
+def iter_bio(brat_files: t.Iterable[BratFile], tokenizer: Tokenizer = tokenize, *, jobs=1, chunksize=64) \
+        -> t.Iterator[BioDocument]:
+    """
+    Lazily converts BratFiles to BioDocuments, in order. If `jobs` is greater than one, documents are read and
+    converted in that many processes, `chunksize` at a time, in which case `tokenizer` must be picklable,
+    such as a function defined at the top level of a module.
+    """
+    return parallel_map(_convert_task, ((ann, tokenizer) for ann in brat_files), jobs, chunksize=chunksize)
+
+
+def write_conll(documents: t.Iterable[BioDocument], file: t.TextIO) -> None:
+    """Writes one 'word<tab>label' line per token, with a blank line after each document."""
+    for doc in documents:
+        for word, label in zip(doc.words, doc.labels):
+            file.write(f'{word}\t{label}\n')
+        file.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Converts the entities of a dataset to BIO labels')
+    parser.add_argument('directory', help='Directory containing the ann and txt files')
+    parser.add_argument('-o', '--output', help='File to write to (defaults to standard output)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    dataset = BratDataset.from_directory(args.directory)
+    documents = iter_bio((ann for ann in dataset if ann._txt_path is not None), jobs=args.jobs)
+
+    if args.output is None:
+        write_conll(documents, sys.stdout)
+    else:
+        with open(args.output, 'w') as f:
+            write_conll(documents, f)
+
+
+if __name__ == '__main__':
+    main()
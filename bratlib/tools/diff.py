@@ -0,0 +1,199 @@
+"""
+Differences between two versions of a dataset, such as before and after a round of annotation.
+Files present in both versions are first compared by their contents, and only the files that differ are
+parsed. Their annotations are then compared as sets of keys, so a diff takes about as long as reading both versions
+when few files have changed.
+
+Changes are generated as dicts that can be written as JSON lines:
+
+- {"file": name, "change": "added" | "removed" | "modified"} for each file that differs
+- {"file": name, "change": "added" | "removed", "type": type, "annotation": {...}} for each annotation of a
+  modified file that was added or removed
+- {"file": name, "change": "retagged", "type": type, "old_label": label, "new_label": label, "annotation": {...}}
+  for each annotation of a modified file that only differs in its label, such as an entity's tag
+
+where `type` is 'entity', 'event', 'relation', 'equivalence', 'attribute', or 'normalization'.
+Annotations are described by their contents rather than their IDs, since IDs are not kept by bratlib.
+"""
+
+import argparse
+import json
+import sys
+import typing as t
+
+from bratlib.data import AnnData, BratDataset, BratFile, Entity, Event
+from bratlib.data.loading import map_concurrently
+
+Change = t.Dict[str, t.Any]
+
+
+def _entity_key(ent: Entity) -> tuple:
+    return ent.tag, tuple(map(tuple, ent.spans)), ent.mention
+
+
+def _describe_entity(ent: Entity) -> dict:
+    return {'tag': ent.tag, 'spans': [list(s) for s in ent.spans], 'mention': ent.mention}
+
+
+def _item_key(item: AnnData) -> tuple:
+    if isinstance(item, Event):
+        return ('event', item.event_type, _entity_key(item.trigger))
+    return ('entity',) + _entity_key(item)
+
+
+def _describe_item(item: AnnData) -> dict:
+    if isinstance(item, Event):
+        return {'type': item.event_type, 'trigger': _describe_entity(item.trigger)}
+    return _describe_entity(item)
+
+
+class _AnnotationType(t.NamedTuple):
+    """How to compare the annotations of one type: their label, the rest of their key, and their description."""
+    attribute: str
+    label: t.Callable[[t.Any], t.Optional[str]]
+    rest: t.Callable[[t.Any], t.Hashable]
+    describe: t.Callable[[t.Any], dict]
+
+
+ANNOTATION_TYPES = {
+    'entity': _AnnotationType(
+        'entities',
+        lambda e: e.tag,
+        lambda e: _entity_key(e)[1:],
+        _describe_entity,
+    ),
+    'event': _AnnotationType(
+        'events',
+        lambda ev: ev.event_type,
+        lambda ev: (_entity_key(ev.trigger), tuple(sorted((r, _entity_key(e)) for r, e in ev.arguments.items()))),
+        lambda ev: {
+            'type': ev.event_type,
+            'trigger': _describe_entity(ev.trigger),
+            'arguments': {r: _describe_entity(e) for r, e in ev.arguments.items()},
+        },
+    ),
+    'relation': _AnnotationType(
+        'relations',
+        lambda r: r.relation,
+        lambda r: (_entity_key(r.arg1), _entity_key(r.arg2)),
+        lambda r: {'relation': r.relation, 'arg1': _describe_entity(r.arg1), 'arg2': _describe_entity(r.arg2)},
+    ),
+    'equivalence': _AnnotationType(
+        'equivalences',
+        lambda eq: None,
+        lambda eq: tuple(sorted(_entity_key(e) for e in eq.items)),
+        lambda eq: {'items': [_describe_entity(e) for e in eq.items]},
+    ),
+    'attribute': _AnnotationType(
+        'attributes',
+        lambda a: a.tag,
+        lambda a: tuple(sorted(_item_key(i) for i in a.items)),
+        lambda a: {'tag': a.tag, 'items': [_describe_item(i) for i in a.items]},
+    ),
+    'normalization': _AnnotationType(
+        'normalizations',
+        lambda n: n.ont_id,
+        lambda n: (_entity_key(n.entity), n.ontology),
+        lambda n: {'entity': _describe_entity(n.entity), 'ontology': n.ontology, 'ont_id': n.ont_id},
+    ),
+}
+
+
+def diff_annotations(old: BratFile, new: BratFile) -> t.Iterator[Change]:
+    """Generates the annotation level changes between two versions of a file; see the module docstring."""
+    for type_name, ann_type in ANNOTATION_TYPES.items():
+        old_keys = {(ann_type.label(a), ann_type.rest(a)): a for a in getattr(old, ann_type.attribute)}
+        new_keys = {(ann_type.label(a), ann_type.rest(a)): a for a in getattr(new, ann_type.attribute)}
+
+        removed, added = {}, {}
+        for keys, other, grouped in ((old_keys, new_keys, removed), (new_keys, old_keys, added)):
+            for label, rest in sorted(keys.keys() - other.keys(), key=repr):
+                grouped.setdefault(rest, []).append((label, keys[label, rest]))
+
+        for rest in sorted(removed.keys() & added.keys(), key=repr):
+            # Pair up annotations that only differ in their labels
+            while removed[rest] and added[rest]:
+                (old_label, _), (new_label, annotation) = removed[rest].pop(0), added[rest].pop(0)
+                yield {
+                    'file': new.name, 'change': 'retagged', 'type': type_name,
+                    'old_label': old_label, 'new_label': new_label, 'annotation': ann_type.describe(annotation),
+                }
+
+        for change, grouped in (('removed', removed), ('added', added)):
+            for annotations in grouped.values():
+                for _, annotation in annotations:
+                    yield {'file': new.name, 'change': change, 'type': type_name,
+                           'annotation': ann_type.describe(annotation)}
+
+
+def _compare_contents(pair: t.Tuple[BratFile, BratFile]) -> t.Optional[t.Tuple[bytes, bytes]]:
+    """Reads both versions of a file, and returns their contents if they differ."""
+    old, new = pair
+    old_data, new_data = old.ann_path.read_bytes(), new.ann_path.read_bytes()
+    # Both are already in memory, so comparing them is cheaper than hashing them
+    if old_data == new_data:
+        return None
+    return old_data, new_data
+
+
+def _use_contents(ann: BratFile, data: bytes):
+    if '_data_dict' not in ann.__dict__:
+        ann._set_text(data.decode())
+
+
+def diff_datasets(old: BratDataset, new: BratDataset, *, max_workers=1) -> t.Iterator[Change]:
+    """
+    Generates the changes between two versions of a dataset; see the module docstring. Files are matched by name.
+    :param old: the earlier version
+    :param new: the later version
+    :param max_workers: the number of threads to read and compare files in; if more than one, modified files are
+    generated in the order in which they are read rather than by name
+    """
+    old_files = {a.name: a for a in old}
+    new_files = {a.name: a for a in new}
+
+    for name in sorted(old_files.keys() - new_files.keys()):
+        yield {'file': name, 'change': 'removed'}
+    for name in sorted(new_files.keys() - old_files.keys()):
+        yield {'file': name, 'change': 'added'}
+
+    pairs = ((old_files[name], new_files[name]) for name in sorted(old_files.keys() & new_files.keys()))
+    for (old_ann, new_ann), contents in map_concurrently(_compare_contents, pairs, max_workers):
+        if contents is None:
+            continue
+
+        _use_contents(old_ann, contents[0])
+        _use_contents(new_ann, contents[1])
+
+        changes = diff_annotations(old_ann, new_ann)
+        first = next(changes, None)
+        if first is None:
+            # Only the order of the lines or the IDs changed
+            continue
+
+        yield {'file': new_ann.name, 'change': 'modified'}
+        yield first
+        yield from changes
+
+
+def write_changes(changes: t.Iterable[Change], file: t.TextIO) -> None:
+    """Writes each change as a line of JSON."""
+    for change in changes:
+        file.write(json.dumps(change) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lists the changes between two versions of a dataset as JSON lines')
+    parser.add_argument('old_directory', help='Directory of the earlier version')
+    parser.add_argument('new_directory', help='Directory of the later version')
+    parser.add_argument('-r', '--recursive', action='store_true', help='include ann files in subdirectories')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of threads to read files with')
+    args = parser.parse_args()
+
+    old = BratDataset.from_directory(args.old_directory, recursive=args.recursive)
+    new = BratDataset.from_directory(args.new_directory, recursive=args.recursive)
+    write_changes(diff_datasets(old, new, max_workers=args.workers), sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ import typing as t
 from functools import reduce
 from operator import and_, attrgetter
 
-from bratlib.data import BratDataset
+from bratlib.data import BratDataset, BratFile
 
 
 def zip_datasets(*datasets: BratDataset) -> t.Iterable[t.Tuple[BratDataset, ...]]:
@@ -11,6 +11,54 @@ def zip_datasets(*datasets: BratDataset) -> t.Iterable[t.Tuple[BratDataset, ...]
     terms of the BratFile instances they contain. For all BratFile names that appear in all BratDatasets passed
     to this function, each iteration will yield the BratFiles with that name from all datasets.
     """
+    if any(iter(ds) is ds for ds in datasets):
+        # At least one of the datasets can only be iterated once
+        yield from zip_streams(*datasets)
+        return
+
     matching_anns = reduce(and_, ({a.name for a in ds} for ds in datasets))
     iterators = [filter(lambda a: a.name in matching_anns, sorted(ds, key=attrgetter('name'))) for ds in datasets]
     yield from zip(*iterators)
+
+
+def zip_streams(*streams: t.Iterable[BratFile]) -> t.Iterator[t.Tuple[BratFile, ...]]:
+    """
+    Like `zip_datasets`, but makes only one pass over each iterable of BratFiles, such as those generated while
+    reading an archive. BratFiles are taken from each iterable in turn and held until the BratFiles with the same name
+    have been found in all the others; the tuples are generated in the order in which they are completed.
+    """
+    iterators = [iter(s) for s in streams]
+    waiting = [{} for _ in streams]
+    active = list(range(len(streams)))
+
+    while active:
+        for i in list(active):
+            try:
+                ann = next(iterators[i])
+            except StopIteration:
+                active.remove(i)
+                continue
+
+            waiting[i][ann.name] = ann
+            if all(ann.name in w for w in waiting):
+                yield tuple(w.pop(ann.name) for w in waiting)
+
+
+def parallel_map(function: t.Callable, iterable: t.Iterable, jobs: int = 1,
+                 initializer: t.Optional[t.Callable] = None, initargs: tuple = (), chunksize: int = 1) -> t.Iterator:
+    """
+    Lazily maps `function` over `iterable`, in order. If `jobs` is greater than one, the calls are distributed over
+    that many worker processes, in which case `function` and the items must be picklable; `initializer` is called
+    with `initargs` once in each worker, which can be used to share large read-only state with every call.
+    Items are sent to the workers `chunksize` at a time; larger chunks have less overhead for many small items.
+    """
+    if jobs is None or jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(function, iterable)
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(jobs, initializer, initargs) as pool:
+        yield from pool.imap(function, iterable, chunksize)
@@ -0,0 +1,202 @@
+"""
+Analysis of overlapping entities, such as nested entities that a flat sequence labeller can't represent.
+Each pair of entities that share at least one character is one of:
+
+- 'duplicate': both cover exactly the same characters
+- 'nested': one covers all the characters of the other, the outer entity, and more
+- 'crossing': each covers characters that the other doesn't
+
+Discontiguous entities cover only the characters of their fragments, so an entity that falls in the gap between two
+fragments of another does not overlap it. Pairs are found with a sweep line over the fragments of each document, sorted
+by start, so a document of n fragments with k overlapping pairs is analyzed in O(n log n + k) time rather than
+by comparing every pair of entities.
+"""
+
+import argparse
+import heapq
+import json
+import re
+import sys
+import typing as t
+from collections import Counter
+
+from bratlib.data import BratDataset, BratFile, Entity, _patterns
+from bratlib.tools.iteration import parallel_map
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+Span = t.Tuple[int, int]
+
+_offset_separator = re.compile('[ ;]')
+
+KINDS = ('duplicate', 'nested', 'crossing')
+
+
+class Overlap(t.NamedTuple):
+    """
+    A pair of overlapping entities. For 'nested' overlaps, `first` is the outer entity and `second` the inner one;
+    otherwise they are in the order of the BratFile's entities.
+    """
+    kind: str
+    first: Entity
+    second: Entity
+
+
+def _coverage(spans: t.Iterable[Span]) -> t.List[Span]:
+    """The characters covered by some spans, as sorted, disjoint, non-empty spans."""
+    merged = []
+    for start, end in sorted(spans):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _contains(outer: t.List[Span], inner: t.List[Span]) -> bool:
+    """If every span of `inner` is within a span of `outer`; both are sorted and disjoint."""
+    i = 0
+    for start, end in inner:
+        while i < len(outer) and outer[i][1] < end:
+            i += 1
+        if i == len(outer) or outer[i][0] > start:
+            return False
+    return True
+
+
+def _sweep(coverage: t.List[t.List[Span]]) -> t.Iterator[t.Tuple[str, int, int]]:
+    """
+    Generates (kind, first, second) for each overlapping pair of the given coverages, by index; see `Overlap` for the
+    order of the indexes.
+    """
+    fragments = sorted((start, end, i) for i, spans in enumerate(coverage) for start, end in spans)
+
+    active = []  # heap of (end, index) of the fragments that started before the current one
+    seen = set()
+    for start, end, i in fragments:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, j in active:
+            # Every fragment still in the heap ends after this one starts
+            a, b = (j, i) if j < i else (i, j)
+            if a == b or (a, b) in seen:
+                continue
+            seen.add((a, b))
+            if coverage[a] == coverage[b]:
+                yield 'duplicate', a, b
+            elif _contains(coverage[a], coverage[b]):
+                yield 'nested', a, b
+            elif _contains(coverage[b], coverage[a]):
+                yield 'nested', b, a
+            else:
+                yield 'crossing', a, b
+        heapq.heappush(active, (end, i))
+
+
+def iter_overlaps(ann: BratFile) -> t.Iterator[Overlap]:
+    """Generates an Overlap for each pair of entities of a BratFile that share at least one character."""
+    entities = list(ann.entities)
+    for kind, a, b in _sweep([_coverage(e.spans) for e in entities]):
+        yield Overlap(kind, entities[a], entities[b])
+
+
+def _tags_and_coverage(ann: BratFile) -> t.Tuple[t.List[str], t.List[t.List[Span]]]:
+    """
+    The tag and coverage of each entity of a BratFile. If the file is a plain BratFile that has not been read yet, only
+    the entity lines of its ann file are parsed, without creating the rest of the BratFile; subclasses may not read
+    their data from `ann_path`, so their entities are always used.
+    """
+    if type(ann) is not BratFile or hasattr(ann, '_entities') or '_data_dict' in ann.__dict__:
+        entities = ann.entities
+        return [e.tag for e in entities], [_coverage(e.spans) for e in entities]
+
+    tags, coverage = [], []
+    for match in _patterns.ent_pattern.finditer(ann.ann_path.read_text()):
+        offsets = list(map(int, _offset_separator.split(match[3])))
+        tags.append(match[2])
+        if len(offsets) == 2 and offsets[0] < offsets[1]:
+            coverage.append([(offsets[0], offsets[1])])
+        else:
+            coverage.append(_coverage(zip(offsets[::2], offsets[1::2])))
+    return tags, coverage
+
+
+def count_file(ann: BratFile) -> t.Counter[t.Tuple[str, str, str]]:
+    """
+    Counts the overlapping pairs of entities of a BratFile by (kind, first tag, second tag), where the first tag is
+    that of the outer entity for nested pairs; for other kinds, the tags are sorted.
+    """
+    tags, coverage = _tags_and_coverage(ann)
+    counts = Counter()
+    for kind, a, b in _sweep(coverage):
+        first, second = tags[a], tags[b]
+        if kind != 'nested' and second < first:
+            first, second = second, first
+        counts[kind, first, second] += 1
+    return counts
+
+
+def count_dataset(dataset: t.Iterable[BratFile], *, jobs=1, chunksize=64) -> t.Counter[t.Tuple[str, str, str]]:
+    """Counts the overlapping pairs of entities of every BratFile; see `count_file`."""
+    total = Counter()
+    for counts in parallel_map(count_file, dataset, jobs, chunksize=chunksize):
+        total += counts
+    return total
+
+
+def _overlaps_task(ann: BratFile) -> t.Tuple[str, t.List[Overlap]]:
+    return ann.name, list(iter_overlaps(ann))
+
+
+def iter_dataset_overlaps(dataset: t.Iterable[BratFile], *, jobs=1, chunksize=64) \
+        -> t.Iterator[t.Tuple[str, Overlap]]:
+    """Generates (file name, Overlap) for every overlapping pair of entities, one file at a time, in order."""
+    for name, overlaps in parallel_map(_overlaps_task, dataset, jobs, chunksize=chunksize):
+        for overlap in overlaps:
+            yield name, overlap
+
+
+def to_dataframe(counts: t.Mapping[t.Tuple[str, str, str], int]) -> 'pd.DataFrame':
+    """Creates a DataFrame of ('kind', 'first', 'second') -> 'count', sorted by kind and then by tags."""
+    import pandas as pd
+
+    keys = sorted(counts, key=lambda k: (KINDS.index(k[0]), k[1], k[2]))
+    return pd.DataFrame(
+        [counts[k] for k in keys],
+        index=pd.MultiIndex.from_tuples(keys, names=['kind', 'first', 'second']) if keys
+        else pd.MultiIndex.from_arrays([[], [], []], names=['kind', 'first', 'second']),
+        columns=['count']
+    )
+
+
+def _describe(ent: Entity) -> dict:
+    return {'tag': ent.tag, 'spans': [list(s) for s in ent.spans], 'mention': ent.mention}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Counts duplicate, nested, and crossing entities by tag pair')
+    parser.add_argument('directory', help='Directory containing the ann files')
+    parser.add_argument('-r', '--recursive', action='store_true', help='include ann files in subdirectories')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='write each overlapping pair as a line of JSON instead of counting them')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes to use (defaults to 1)')
+    args = parser.parse_args()
+
+    dataset = BratDataset.from_directory(args.directory, recursive=args.recursive)
+
+    if args.list:
+        for name, overlap in iter_dataset_overlaps(dataset, jobs=args.jobs):
+            sys.stdout.write(json.dumps({
+                'file': name, 'kind': overlap.kind,
+                'first': _describe(overlap.first), 'second': _describe(overlap.second),
+            }) + '\n')
+    else:
+        print(to_dataframe(count_dataset(dataset, jobs=args.jobs)).to_csv())
+
+
+if __name__ == '__main__':
+    main()
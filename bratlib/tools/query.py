@@ -0,0 +1,206 @@
+"""
+Query index for the entities of a BratDataset.
+A DatasetIndex answers questions such as "all entities of a tag in some files", "every file containing a tag",
+or "all entities overlapping a range of offsets in a file" without scanning every BratFile. It can be saved to
+and loaded from disk, and updated one file at a time when files change.
+"""
+
+import json
+import os
+import typing as t
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from bratlib.data import BratDataset, BratFile, Entity
+
+_PathLike = t.Union[str, os.PathLike]
+
+_FORMAT_VERSION = 1
+
+# (st_mtime_ns, st_size) of an ann file, or None for BratFiles that don't represent a file
+_Stamp = t.Optional[t.Tuple[int, int]]
+
+
+def _stamp(ann: BratFile) -> _Stamp:
+    try:
+        stat = ann.ann_path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _FileIndex:
+    """
+    The entities of one file, with an interval index over the fragments of their spans.
+    Fragments are sorted by start offset; any fragment starting at or before `start - max_length`
+    must also end at or before `start`, which bounds the fragments that need to be checked for a query.
+    """
+
+    def __init__(self, entities: t.List[Entity], stamp: _Stamp):
+        self.entities = entities
+        self.stamp = stamp
+
+        fragments = sorted((a, b, i) for i, e in enumerate(entities) for a, b in e.spans)
+        self.starts = [f[0] for f in fragments]
+        self.ends = [f[1] for f in fragments]
+        self.positions = [f[2] for f in fragments]
+        self.max_length = max((b - a for a, b, _ in fragments), default=0)
+
+    def overlapping(self, start: int, end: int) -> t.List[int]:
+        """Returns the positions of the entities with any fragment that overlaps the span (start, end)."""
+        low = bisect_right(self.starts, start - self.max_length)
+        high = bisect_left(self.starts, end)
+        found = {self.positions[i] for i in range(low, high) if self.ends[i] > start}
+        return sorted(found)
+
+
+class DatasetIndex:
+    """
+    An inverted index of tag -> file name -> entities and a per-file interval index over entity spans.
+    Files are identified by `BratFile.name`. The Entities returned by queries are those of the BratFiles
+    the index was built from, or equivalent new instances if the index was loaded from disk.
+    """
+
+    def __init__(self):
+        self._files: t.Dict[str, _FileIndex] = {}
+        self._postings: t.Dict[str, t.Dict[str, t.List[int]]] = {}
+        self._names: t.List[str] = []
+
+    @classmethod
+    def from_dataset(cls, dataset: t.Iterable[BratFile]) -> 'DatasetIndex':
+        new = cls()
+        for ann in dataset:
+            new.update(ann)
+        return new
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, name: str):
+        return name in self._files
+
+    @property
+    def names(self) -> t.List[str]:
+        """The sorted names of the indexed files."""
+        return list(self._names)
+
+    @property
+    def tags(self) -> t.List[str]:
+        return sorted(self._postings)
+
+    def _add(self, name: str, file_index: _FileIndex):
+        if name in self._files:
+            self.remove(name)
+        self._files[name] = file_index
+        self._names.insert(bisect_left(self._names, name), name)
+        for i, e in enumerate(file_index.entities):
+            self._postings.setdefault(e.tag, {}).setdefault(name, []).append(i)
+
+    def update(self, ann: BratFile):
+        """Indexes a BratFile, replacing any file already indexed under the same name."""
+        self._add(ann.name, _FileIndex(list(ann.entities), _stamp(ann)))
+
+    def remove(self, name: str):
+        """Removes a file from the index."""
+        file_index = self._files.pop(name)
+        del self._names[bisect_left(self._names, name)]
+        for tag in {e.tag for e in file_index.entities}:
+            files = self._postings[tag]
+            del files[name]
+            if not files:
+                del self._postings[tag]
+
+    def refresh(self, dataset: BratDataset) -> t.List[str]:
+        """
+        Brings the index up to date with a dataset. Files whose ann file has changed since they were indexed are
+        read again, files that are new to the dataset are added, and files no longer in it are removed.
+        Returns the names of the files that were added, updated, or removed.
+        """
+        changed = []
+        present = set()
+
+        for ann in dataset:
+            present.add(ann.name)
+            current = self._files.get(ann.name)
+            if current is not None and current.stamp == _stamp(ann):
+                continue
+            if current is not None and '_data_dict' in ann.__dict__:
+                # Don't reuse a cached parse of the old contents
+                fresh = BratFile(ann.ann_path, ann._txt_path)
+                fresh.name = ann.name
+                ann = fresh
+            self.update(ann)
+            changed.append(ann.name)
+
+        for name in [n for n in self._names if n not in present]:
+            self.remove(name)
+            changed.append(name)
+
+        return changed
+
+    def names_between(self, first: str, last: str) -> t.List[str]:
+        """Returns the indexed file names from `first` to `last`, inclusive, in sorted order."""
+        return self._names[bisect_left(self._names, first):bisect_right(self._names, last)]
+
+    def files_with_tag(self, tag: str) -> t.List[str]:
+        """Returns the sorted names of the files that contain at least one entity of the given tag."""
+        return sorted(self._postings.get(tag, {}))
+
+    def count(self, tag: str) -> int:
+        """Returns the number of entities of the given tag in the whole dataset."""
+        return sum(len(p) for p in self._postings.get(tag, {}).values())
+
+    def entities_with_tag(self, tag: str, files: t.Optional[t.Iterable[str]] = None) \
+            -> t.Iterator[t.Tuple[str, Entity]]:
+        """
+        Generates (file name, Entity) for every entity of the given tag, in order of file name.
+        :param tag: the tag to search for
+        :param files: if given, only these files are searched
+        """
+        postings = self._postings.get(tag, {})
+        names = sorted(postings) if files is None else sorted(n for n in set(files) if n in postings)
+        for name in names:
+            entities = self._files[name].entities
+            for i in postings[name]:
+                yield name, entities[i]
+
+    def entities(self, name: str) -> t.List[Entity]:
+        """Returns the indexed entities of a file."""
+        return list(self._files[name].entities)
+
+    def overlapping(self, name: str, start: int, end: int, tag: t.Optional[str] = None) -> t.List[Entity]:
+        """
+        Returns the entities in a file with a span that overlaps the character offsets from `start` to `end`,
+        optionally only those of the given tag.
+        """
+        file_index = self._files[name]
+        found = (file_index.entities[i] for i in file_index.overlapping(start, end))
+        if tag is None:
+            return list(found)
+        return [e for e in found if e.tag == tag]
+
+    def save(self, path: _PathLike):
+        """Writes the index to a JSON file."""
+        files = {
+            name: {
+                'stamp': f.stamp,
+                'entities': [[e.tag, e.spans, e.mention] for e in f.entities],
+            }
+            for name, f in self._files.items()
+        }
+        with open(path, 'w') as f:
+            json.dump({'version': _FORMAT_VERSION, 'files': files}, f)
+
+    @classmethod
+    def load(cls, path: _PathLike) -> 'DatasetIndex':
+        """Reads an index written by `save`."""
+        data = json.loads(Path(path).read_text())
+        if data.get('version') != _FORMAT_VERSION:
+            raise ValueError(f'{path} is not a DatasetIndex file of a supported version')
+
+        new = cls()
+        for name, f in data['files'].items():
+            entities = [Entity(tag, [tuple(s) for s in spans], mention) for tag, spans, mention in f['entities']]
+            stamp = tuple(f['stamp']) if f['stamp'] is not None else None
+            new._add(name, _FileIndex(entities, stamp))
+        return new
@@ -1,10 +1,12 @@
 import argparse
 import re
-
-import pandas as pd
+import typing as t
 
 from bratlib.data import BratDataset, BratFile, Entity
 
+if t.TYPE_CHECKING:
+    import pandas as pd
+
 
 def _validate_entity(ent: Entity, text: str) -> bool:
     if len(ent.spans) == 1:
@@ -15,12 +17,14 @@ def _validate_entity(ent: Entity, text: str) -> bool:
         return bool(re.fullmatch(mention, ent.mention))
 
 
-def validate_bratfile_entities(ann: BratFile) -> pd.DataFrame:
+def validate_bratfile_entities(ann: BratFile) -> 'pd.DataFrame':
     """
     Validates that the mentions given for each entity align with the given character spans.
     For non-contiguous spans, the number of whitespace characters between subspans in the brat file don't count.
     Returns a DataFrame of bd.Entity -> bool.
     """
+    import pandas as pd
+
     text = ann.txt_path.read_text()
     df = pd.DataFrame.from_dict(
         {e: _validate_entity(e, text) for e in ann.entities},
@@ -30,7 +34,7 @@ def validate_bratfile_entities(ann: BratFile) -> pd.DataFrame:
     return df
 
 
-def validate_bratdataset_entities(data: BratDataset, *, invalid_only=True, index_by_path=False) -> pd.DataFrame:
+def validate_bratdataset_entities(data: BratDataset, *, invalid_only=True, index_by_path=False) -> 'pd.DataFrame':
     """
     Validates that mentions align with the given spans for a whole dataset.
     Returns a DataFrame of (bd.Entity, str) -> bool, where the str is the stem of the file name
@@ -42,6 +46,8 @@ def validate_bratdataset_entities(data: BratDataset, *, invalid_only=True, index
     :param index_by_path: If the resulting DataFrame should index using a pathlib.Path object instead of
     the stem of the file name.
     """
+    import pandas as pd
+
     outer_df = pd.DataFrame()
     for ann in data:
         df = validate_bratfile_entities(ann)
@@ -9,13 +9,22 @@ setup(
     description='Data facilitation for BRAT annotations',
     author='Steele Farnsworth',
     install_requires=[
-        'cached-property',
+        'cached-property; python_version < "3.8"',
+        'numpy',
         'pandas'
     ],
+    entry_points={
+        'console_scripts': [
+            'bratlib=bratlib.cli:main'
+        ]
+    },
     tests_require=['pytest'],
     extras_require={
         ':python_version == "3.6"': [
             'dataclasses'
         ],
+        'parquet': [
+            'pyarrow'
+        ],
     }
 )
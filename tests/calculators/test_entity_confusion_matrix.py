@@ -42,3 +42,17 @@ with_none_expected = pd.DataFrame([
 def test_entity_confusion_matrix(expected, use_none):
     actual = count_file(gold, system, include_none=use_none)
     pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_names=False)
+
+
+def test_inner_spans():
+    # Entities that only differ in their inner spans are counted separately, though they are looked up by their bounds
+    gold_file = bd.BratFile.from_data(entities=[
+        bd.Entity('A', [(1, 2), (4, 5)], ''),
+        bd.Entity('A', [(1, 5)], ''),
+        bd.Entity('B', [(7, 8)], ''),
+    ])
+    system_file = bd.BratFile.from_data(entities=[bd.Entity('B', [(7, 8)], ''), bd.Entity('B', [(9, 10)], '')])
+    actual = count_file(gold_file, system_file, include_none=True)
+    assert actual.loc['A', 'NONE'] == 2
+    assert actual.loc['B', 'B'] == 1
+    assert actual.loc['NONE', 'B'] == 1
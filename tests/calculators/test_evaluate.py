@@ -0,0 +1,84 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import (
+    _indexes, entity_agreement, entity_confusion_matrix, evaluate, normalization_agreement, relation_agreement,
+    relation_confusion_matrix
+)
+
+gold_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5;5 6\tipsum
+T3\tC 8 9\tdolor
+R1\tR Arg1:T1 Arg2:T2
+R2\tS Arg1:T3 Arg2:T1
+N1\tReference T1 C:1\tlorem
+"""
+
+system_doc = """T1\tA 1 3\tlorem
+T2\tB 3 6\tipsum
+T3\tD 8 9\tdolor
+R1\tR Arg1:T1 Arg2:T2
+R2\tR Arg1:T3 Arg2:T1
+N1\tReference T2 C:1\tipsum
+"""
+
+
+@pytest.fixture
+def datasets(write_directories):
+    gold, system = write_directories(gold_doc, system_doc, agrees=lambda i: i == 0)
+    return bd.BratDataset.from_directory(gold), bd.BratDataset.from_directory(system)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_evaluate_matches_calculators(datasets, jobs):
+    gold, system = datasets
+    results = evaluate.evaluate(gold, system, jobs=jobs)
+
+    assert results['entity_strict'] == entity_agreement.count_dataset(gold, system, 'strict')
+    assert results['entity_lenient'] == entity_agreement.count_dataset(gold, system, 'lenient')
+    assert results['entity_confusion'] == entity_confusion_matrix.tabulate_dataset(gold, system)
+    assert results['relation'] == relation_agreement.count_dataset(gold, system)
+    assert results['relation_confusion'] == relation_confusion_matrix.tabulate_dataset(gold, system)
+    assert results['normalization'] == normalization_agreement.count_dataset(gold, system)
+
+
+def test_evaluate_releases_files(datasets):
+    gold, system = datasets
+    loaded = gold.brat_files[0]
+    loaded.entities
+
+    results = evaluate.evaluate(gold, system, ['entity_strict', 'relation'])
+    assert list(results) == ['entity_strict', 'relation']
+    assert '_data_dict' in loaded.__dict__, 'Files that were already loaded should be kept'
+    assert all('_data_dict' not in a.__dict__ for a in gold.brat_files[1:] + system.brat_files)
+
+    assert 'A,' in evaluate.report(results['entity_strict'])
+
+    # Files evaluated in worker processes are parsed here first if they are to be kept
+    assert evaluate.evaluate(gold, system, ['entity_strict'], jobs=2, release=False) == {
+        'entity_strict': results['entity_strict']
+    }
+    assert all('_data_dict' in a.__dict__ for a in gold.brat_files + system.brat_files)
+
+    with pytest.raises(ValueError):
+        evaluate.evaluate(gold, system, ['entity_strict', 'spam'])
+
+
+def test_indexes_are_shared(datasets, monkeypatch):
+    built = []
+
+    def counting(cls):
+        from_bratfile = cls.from_bratfile.__func__
+
+        def wrapper(cls, ann):
+            built.append((cls, ann))
+            return from_bratfile(cls, ann)
+        return classmethod(wrapper)
+
+    for cls in (_indexes.EntityIndex, _indexes.SpanIndex, _indexes.RelationIndex):
+        monkeypatch.setattr(cls, 'from_bratfile', counting(cls))
+
+    gold, system = datasets
+    evaluate.evaluate(gold, system)
+    # One entity, span, and relation index for each gold and system file, whichever metrics use them
+    assert len(built) == len(set(built)) == 6 * len(gold.brat_files)
@@ -0,0 +1,59 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import normalization_agreement
+from bratlib.calculators.results import AgreementCounts, Counts
+
+
+def _file(name, normalizations):
+    ann = bd.BratFile.from_data(
+        entities=sorted({n.entity for n in normalizations}),
+        normalizations=normalizations,
+    )
+    ann.name = name
+    return ann
+
+
+@pytest.fixture
+def files():
+    a = bd.Entity('A', [(0, 5)], 'aspirin')
+    b = bd.Entity('B', [(6, 10)], 'pain')
+    b_as_a = bd.Entity('A', [(6, 10)], 'pain')
+    gold = _file('1', [
+        bd.Normalization(a, 'UMLS', 'C1'),
+        bd.Normalization(a, 'MeSH', 'D1'),
+        bd.Normalization(b, 'UMLS', 'C2'),
+    ])
+    system = _file('1', [
+        bd.Normalization(a, 'UMLS', 'C1'),        # tp for UMLS
+        bd.Normalization(a, 'MeSH', 'D2'),        # fp and fn for MeSH
+        bd.Normalization(b_as_a, 'UMLS', 'C2'),   # tp for UMLS, unless tags are compared
+        bd.Normalization(b_as_a, 'UMLS', 'C3'),   # fp for UMLS
+    ])
+    return gold, system
+
+
+def test_count_ann_file(files):
+    gold, system = files
+
+    expected = AgreementCounts({'UMLS': Counts(2, 1, 0, 0), 'MeSH': Counts(0, 1, 0, 1)})
+    assert normalization_agreement.count_ann_file(gold, system) == expected
+
+    expected = AgreementCounts({
+        'UMLS/A': Counts(1, 2, 0, 0),
+        'UMLS/B': Counts(0, 0, 0, 1),
+        'MeSH/A': Counts(0, 1, 0, 1),
+    })
+    assert normalization_agreement.count_ann_file(gold, system, by_tag=True) == expected
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_count_dataset(files, jobs):
+    gold, system = files
+    other_gold = _file('2', [bd.Normalization(bd.Entity('A', [(0, 1)], ''), 'UMLS', 'C9')])
+    other_system = _file('2', [])
+
+    counts = normalization_agreement.count_dataset(
+        bd.BratDataset('gold', [gold, other_gold]), bd.BratDataset('system', [system, other_system]), jobs=jobs
+    )
+    assert counts == AgreementCounts({'UMLS': Counts(2, 1, 0, 1), 'MeSH': Counts(0, 1, 0, 1)})
@@ -0,0 +1,114 @@
+import random
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement, overlap_agreement
+from bratlib.calculators.results import AgreementCounts, Counts
+
+
+def test_overlap_ratios():
+    gold = np.array([[0, 10], [5, 5]])
+    system = np.array([[5, 15], [0, 10], [20, 30], [5, 5]])
+    expected = [
+        [5 / 15, 1, 0, 0],
+        [0, 0, 0, 1],
+    ]
+    np.testing.assert_allclose(overlap_agreement.overlap_ratios(gold, system), expected)
+
+
+def test_greedy_and_optimal():
+    gold = bd.BratFile.from_data(entities=[
+        bd.Entity('A', [(0, 10)], ''),
+        bd.Entity('A', [(10, 20)], ''),
+        bd.Entity('B', [(0, 4)], ''),  # fn for B
+    ])
+    system = bd.BratFile.from_data(entities=[
+        bd.Entity('A', [(2, 12)], ''),  # 8 / 12 with the first, 2 / 18 with the second
+        bd.Entity('A', [(0, 6)], ''),   # 6 / 10 with the first
+        bd.Entity('C', [(0, 4)], ''),   # fp for C
+    ])
+
+    greedy = overlap_agreement.count_ann_file(gold, system, 0.1, 'greedy')
+    assert greedy == AgreementCounts({'A': Counts(1, 1, 0, 1), 'B': Counts(0, 0, 0, 1), 'C': Counts(0, 1, 0, 0)})
+
+    optimal = overlap_agreement.count_ann_file(gold, system, 0.1, 'optimal')
+    assert optimal['A'] == Counts(2, 0, 0, 0)
+
+    curve = overlap_agreement.count_curve_ann_file(gold, system, [0.1, 0.6, 0.7], 'optimal')
+    assert [c['A'].tp for c in curve.values()] == [2, 1, 0]
+
+    assert entity_agreement.count_ann_file(gold, system, 'overlap', threshold=0.1) == greedy
+
+    with pytest.raises(ValueError):
+        overlap_agreement.count_ann_file(gold, system, 1.5)
+    with pytest.raises(ValueError):
+        overlap_agreement.count_ann_file(gold, system, 0.5, 'best')
+
+
+def _random_entities(rng, n):
+    entities = []
+    for _ in range(n):
+        start = rng.randrange(50)
+        entities.append(bd.Entity(rng.choice('AB'), [(start, start + rng.randrange(1, 10))], ''))
+    return entities
+
+
+def _brute_force(gold, system, threshold):
+    """Returns the greedy and the largest number of matches for each tag."""
+    greedy, optimal = {}, {}
+    for tag in 'AB':
+        g = sorted({tuple(e.spans[0]) for e in gold if e.tag == tag})
+        s = sorted({tuple(e.spans[0]) for e in system if e.tag == tag})
+        ratios = overlap_agreement.overlap_ratios(np.array(g).reshape(-1, 2), np.array(s).reshape(-1, 2))
+        pairs = [(i, j) for i in range(len(g)) for j in range(len(s)) if ratios[i, j] >= threshold and ratios[i, j]]
+
+        used_gold, used_system = set(), set()
+        for i, j in sorted(pairs, key=lambda p: (-ratios[p], p)):
+            if i not in used_gold and j not in used_system:
+                used_gold.add(i)
+                used_system.add(j)
+        greedy[tag] = len(used_gold)
+
+        pair_set = set(pairs)
+        small, large, swap = (g, s, False) if len(g) <= len(s) else (s, g, True)
+        optimal[tag] = max(
+            (sum(((j, i) if swap else (i, j)) in pair_set for i, j in zip(range(len(small)), p))
+             for p in permutations(range(len(large)), len(small))),
+            default=0
+        )
+    return greedy, optimal
+
+
+def test_curve_matches_brute_force():
+    rng = random.Random(0)
+    thresholds = [0.0, 0.25, 0.5, 0.75, 1.0]
+    for _ in range(30):
+        gold = bd.BratFile.from_data(entities=_random_entities(rng, rng.randrange(7)))
+        system = bd.BratFile.from_data(entities=_random_entities(rng, rng.randrange(7)))
+        greedy_curve = overlap_agreement.count_curve_ann_file(gold, system, thresholds, 'greedy')
+        optimal_curve = overlap_agreement.count_curve_ann_file(gold, system, thresholds, 'optimal')
+
+        for threshold in thresholds:
+            greedy, optimal = _brute_force(gold.entities, system.entities, threshold)
+            for tag in 'AB':
+                assert greedy_curve[threshold].get(tag, Counts()).tp == greedy[tag]
+                assert optimal_curve[threshold].get(tag, Counts()).tp == optimal[tag]
+
+
+def test_full_overlap_matches_strict():
+    rng = random.Random(1)
+    gold = [bd.BratFile.from_data(entities=_random_entities(rng, 20)) for _ in range(3)]
+    system = [bd.BratFile.from_data(entities=_random_entities(rng, 20)) for _ in range(3)]
+    for i, (g, s) in enumerate(zip(gold, system)):
+        g.name = s.name = str(i)
+
+    strict = entity_agreement.count_dataset(gold, system)
+    assert overlap_agreement.count_dataset(gold, system, 1.0) == strict
+
+    curve = overlap_agreement.count_curve_dataset(gold, system, [0.5, 1.0], 'optimal')
+    assert curve[1.0] == strict
+    assert list(curve.to_dataframe().index) == [0.5, 1.0]
+    assert curve.to_dataframe().loc[0.5, 'tp'] >= curve.to_dataframe().loc[1.0, 'tp']
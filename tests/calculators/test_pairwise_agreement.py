@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement
+from bratlib.calculators.pairwise_agreement import agreement_matrix, count_pairwise, measure_pairwise
+
+
+def _dataset(name, *files):
+    brat_files = []
+    for file_name, entities in files:
+        ann = bd.BratFile.from_data(entities=entities)
+        ann.name = file_name
+        brat_files.append(ann)
+    return bd.BratDataset(name, brat_files)
+
+
+@pytest.fixture
+def datasets():
+    a = _dataset(
+        'a',
+        ('doc1', [bd.Entity('A', [(1, 2)], ''), bd.Entity('B', [(3, 6)], ''), bd.Entity('C', [(9, 10)], '')]),
+        ('doc2', [bd.Entity('A', [(1, 4)], '')]),
+    )
+    b = _dataset(
+        'b',
+        ('doc1', [bd.Entity('A', [(1, 2)], ''), bd.Entity('B', [(4, 7)], '')]),
+        ('doc2', [bd.Entity('A', [(1, 4)], ''), bd.Entity('A', [(2, 3)], '')]),
+    )
+    c = _dataset(
+        'c',
+        ('doc1', [bd.Entity('C', [(9, 10)], ''), bd.Entity('B', [(3, 6)], '')]),
+        ('doc3', [bd.Entity('A', [(1, 4)], '')]),
+    )
+    return [a, b, c]
+
+
+@pytest.mark.parametrize('mode', ['strict', 'lenient'])
+def test_measure_pairwise(datasets, mode):
+    """Test that every pair has the same counts as comparing that pair with entity_agreement."""
+    actual = measure_pairwise(datasets, mode)
+    assert len(actual) == 6
+
+    for gold in datasets:
+        for system in datasets:
+            if gold is system:
+                continue
+            expected = entity_agreement.measure_dataset(gold, system, mode)
+            pd.testing.assert_frame_equal(
+                expected, actual[gold.directory.name, system.directory.name], check_dtype=False
+            )
+
+
+def test_measure_pairwise_jobs(datasets):
+    serial = measure_pairwise(datasets, 'lenient')
+    parallel = measure_pairwise(datasets, 'lenient', jobs=2)
+    assert serial.keys() == parallel.keys()
+    for pair, df in serial.items():
+        pd.testing.assert_frame_equal(df, parallel[pair])
+
+
+def test_agreement_matrix(datasets):
+    matrix = agreement_matrix(count_pairwise(datasets, names=['x', 'y', 'z']))
+    assert list(matrix.index) == list(matrix.columns) == ['x', 'y', 'z']
+    assert matrix.loc['x', 'x'] == 1.0
+    # doc1: one of three strict matches against two; doc2: one match against two
+    assert matrix.loc['x', 'y'] == pytest.approx(2 * 2 / (2 * 2 + 2 + 2))
+    assert matrix.loc['x', 'y'] == matrix.loc['y', 'x']
@@ -50,3 +50,15 @@ without_none_expected = pd.DataFrame([
 def test_relation_confusion_matrix(expected, use_none):
     actual = count_file(gold, system, include_none=use_none)
     pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_names=False)
+
+
+def test_discontiguous_arguments():
+    b = bd.Entity('B', [(10, 12)], 'b')
+    gold_a, system_a = bd.Entity('A', [(0, 3), (5, 8)], 'a'), bd.Entity('A', [(0, 8)], 'a')
+    gold_doc = bd.BratFile.from_data(entities=[gold_a, b], relations=[bd.Relation('R', gold_a, b)])
+    system_doc = bd.BratFile.from_data(entities=[system_a, b], relations=[bd.Relation('R', system_a, b)])
+
+    # The arguments have the same outer span, but not the same spans, so the relations don't match
+    actual = count_file(gold_doc, system_doc, include_none=True)
+    assert actual.loc['R', 'R'] == 0
+    assert actual.loc['R', 'NONE'] == actual.loc['NONE', 'R'] == 1
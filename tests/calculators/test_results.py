@@ -0,0 +1,120 @@
+import json
+
+import pandas as pd
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement, entity_confusion_matrix
+from bratlib.calculators.results import AgreementCounts, AgreementCurve, ConfusionMatrix, Counts, SparseConfusionMatrix
+
+
+def test_agreement_counts_add():
+    a = AgreementCounts.from_tally({'A': 1}, {'A': 2, 'B': 1}, {})
+    b = AgreementCounts.from_tally({'B': 3}, {}, {'C': 4})
+
+    expected = AgreementCounts({'A': Counts(1, 2, 0, 0), 'B': Counts(3, 1, 0, 0), 'C': Counts(0, 0, 0, 4)})
+    assert a + b == expected
+    assert a['B'] == Counts(0, 1, 0, 0), 'Adding should not modify the operands'
+
+    a += b
+    assert a == expected
+    assert a.total() == Counts(4, 3, 0, 4)
+    assert a.total().f1 == pytest.approx(8 / 15)
+
+
+def test_agreement_counts_to_dataframe():
+    counts = AgreementCounts.from_tally({'B': 1}, {'A': 2}, {'B': 3})
+    expected = pd.DataFrame(
+        [
+            ['A', 0, 2, 0, 0],
+            ['B', 1, 0, 0, 3],
+        ],
+        columns=['tag', 'tp', 'fp', 'tn', 'fn'],
+    ).set_index('tag')
+    pd.testing.assert_frame_equal(expected, counts.to_dataframe())
+
+
+def test_confusion_matrix_add():
+    a = ConfusionMatrix.from_pairs(['A', 'B'], {('A', 'A'): 1, ('A', 'B'): 2})
+    b = ConfusionMatrix.from_pairs(['C', 'A'], {('C', 'A'): 3, ('A', 'A'): 1})
+
+    total = a + b
+    assert total.labels == ['A', 'B', 'C']
+    assert total.matrix == [[2, 2, 0], [0, 0, 0], [3, 0, 0]]
+    assert total['C', 'A'] == 3
+    assert a.matrix == [[1, 2], [0, 0]], 'Adding should not modify the operands'
+
+    a += ConfusionMatrix.from_pairs(['B'], {('B', 'B'): 1})
+    assert a.matrix == [[1, 2], [0, 1]]
+
+
+def test_confusion_matrix_to_dataframe():
+    matrix = ConfusionMatrix.from_pairs(['B', 'A'], {('B', 'A'): 1})
+    expected = pd.DataFrame([[0, 0], [1, 0]], index=['A', 'B'], columns=['A', 'B'])
+    pd.testing.assert_frame_equal(expected, matrix.to_dataframe(), check_names=False)
+
+
+def test_sparse_confusion_matrix():
+    a = SparseConfusionMatrix.from_pairs(['A', 'B'], {('A', 'A'): 1, ('A', 'B'): 2})
+    b = SparseConfusionMatrix.from_pairs(['C', 'A'], {('C', 'A'): 3, ('A', 'A'): 1})
+
+    total = a + b
+    assert total.labels == {'A', 'B', 'C'}
+    assert total['C', 'A'] == 3
+    assert total['B', 'C'] == 0
+    assert len(total.counts) == 3, 'Only pairs that occur should be stored'
+    assert a['A', 'A'] == 1, 'Adding should not modify the operands'
+
+    dense = ConfusionMatrix.from_pairs(['A', 'B'], {('A', 'A'): 1, ('A', 'B'): 2}) + \
+        ConfusionMatrix.from_pairs(['C', 'A'], {('C', 'A'): 3, ('A', 'A'): 1})
+    assert total.to_dense() == dense
+    pd.testing.assert_frame_equal(dense.to_dataframe(), total.to_dataframe())
+
+    assert total.top_confusions(1) == [(('C', 'A'), 3)]
+    assert total.top_confusions(None, include_diagonal=True) == [(('C', 'A'), 3), (('A', 'A'), 2), (('A', 'B'), 2)]
+    assert total.confusions_dataframe(2).to_dict()['count'] == {('C', 'A'): 3, ('A', 'B'): 2}
+    assert total.to_coo() == (['A', 'B', 'C'], [0, 0, 2], [0, 1, 0], [2, 2, 3])
+
+
+def test_to_dict_round_trip():
+    counts = AgreementCounts.from_tally({'B': 1}, {'A': 2}, {'B': 3})
+    assert counts.to_dict() == {'A': [0, 2, 0, 0], 'B': [1, 0, 0, 3]}
+
+    curve = AgreementCurve({0.5: counts, 0.25: AgreementCounts()})
+    dense = ConfusionMatrix.from_pairs(['B', 'A'], {('B', 'A'): 1})
+    sparse = SparseConfusionMatrix.from_pairs(['C', 'A'], {('C', 'A'): 3})
+
+    for result in (counts, curve, dense, sparse):
+        data = json.loads(json.dumps(result.to_dict()))
+        assert type(result).from_dict(data) == result
+
+
+@pytest.fixture
+def datasets():
+    gold, system = [], []
+    for name, gold_ents, system_ents in [
+        ('a', [bd.Entity('A', [(1, 2)], ''), bd.Entity('B', [(3, 4)], '')], [bd.Entity('A', [(1, 2)], '')]),
+        ('b', [bd.Entity('C', [(1, 2)], '')], [bd.Entity('A', [(1, 2)], ''), bd.Entity('C', [(5, 6)], '')]),
+    ]:
+        for dataset, entities in ((gold, gold_ents), (system, system_ents)):
+            ann = bd.BratFile.from_data(entities=entities)
+            ann.name = name
+            dataset.append(ann)
+    return bd.BratDataset('gold', gold), bd.BratDataset('system', system)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_dataset_results_match_dataframes(datasets, jobs):
+    """Test that the results of a dataset have the same counts as the DataFrame API."""
+    gold, system = datasets
+
+    counts = entity_agreement.count_dataset(gold, system, 'lenient', jobs=jobs)
+    expected = entity_agreement.measure_dataset(gold, system, 'lenient')
+    pd.testing.assert_frame_equal(expected, counts.to_dataframe(), check_dtype=False)
+
+    matrix = entity_confusion_matrix.tabulate_dataset(gold, system, jobs=jobs)
+    expected = entity_confusion_matrix.count_dataset(gold, system)
+    pd.testing.assert_frame_equal(expected, matrix.to_dataframe(), check_dtype=False, check_names=False)
+
+    sparse = entity_confusion_matrix.tabulate_dataset(gold, system, sparse=True, jobs=jobs)
+    assert sparse.to_dense() == matrix
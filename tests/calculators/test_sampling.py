@@ -0,0 +1,92 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement, sampling
+
+gold_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5\tipsum
+T3\tC 8 9\tdolor
+"""
+
+system_doc = """T1\tA 1 2\tlorem
+T2\tB 3 6\tipsum
+T3\tD 8 9\tdolor
+"""
+
+
+@pytest.fixture
+def datasets(write_directories):
+    gold, system = write_directories(gold_doc, system_doc, 40, name='{:02}', agrees=lambda i: i % 4 == 0)
+    return bd.BratDataset.from_directory(gold), bd.BratDataset.from_directory(system)
+
+
+def test_whole_dataset(datasets):
+    gold, system = datasets
+    estimate = sampling.estimate_dataset(gold, system, size=1000)
+    total = entity_agreement.count_dataset(gold, system).total()
+
+    assert (estimate.sampled, estimate.population) == (40, 40)
+    assert estimate.scores == {'precision': total.precision, 'recall': total.recall, 'f1': total.f1}
+    for metric, (lower, upper) in estimate.bounds.items():
+        assert lower <= estimate.scores[metric] <= upper
+
+
+def test_unsampled_files_not_parsed(datasets):
+    gold, system = datasets
+    estimate = sampling.estimate_dataset(gold, system, size=10, seed=1)
+    parsed_gold = {ann.name for ann in gold if '_data_dict' in ann.__dict__}
+    parsed_system = {ann.name for ann in system if '_data_dict' in ann.__dict__}
+
+    assert estimate.sampled == 10
+    assert len(parsed_gold) == 10
+    assert parsed_gold == parsed_system
+
+
+def test_seed(datasets):
+    gold, system = datasets
+    first = sampling.estimate_dataset(gold, system, size=10, seed=3)
+    assert sampling.estimate_dataset(gold, system, size=10, seed=3) == first
+
+
+def test_target_width(datasets):
+    gold, _ = datasets
+    # Identical datasets have the same score in every resample
+    estimate = sampling.estimate_dataset(gold, gold, target_width=0.01, batch_size=5)
+    assert estimate.sampled == 5
+    assert estimate.bounds['f1'] == (1.0, 1.0)
+
+    estimate = sampling.estimate_dataset(*datasets, target_width=0.0, batch_size=5, size=25)
+    assert estimate.sampled == 25
+
+
+def test_strata(datasets):
+    gold, system = datasets
+    seen = []
+
+    def stratum(ann: bd.BratFile) -> int:
+        return int(ann.name) % 4 == 0
+
+    def count(g, s):
+        seen.append(stratum(g))
+        return entity_agreement.count_ann_file(g, s)
+
+    estimate = sampling.estimate_dataset(gold, system, count, size=8, strata=stratum)
+    assert estimate.sampled == 8
+    assert sorted(seen) == [False] * 6 + [True] * 2
+
+
+def test_allocate():
+    assert sampling._allocate([30, 10], 8) == [6, 2]
+    assert sampling._allocate([5, 5, 5], 4) == [2, 1, 1]
+    assert sampling._allocate([3, 1], 10) == [3, 1]
+
+
+def test_requires_size_or_width(datasets):
+    with pytest.raises(ValueError):
+        sampling.estimate_dataset(*datasets)
+
+
+def test_empty(tmp_path):
+    empty = bd.BratDataset.from_directory(tmp_path)
+    estimate = sampling.estimate_dataset(empty, empty, target_width=0.1)
+    assert (estimate.sampled, estimate.population) == (0, 0)
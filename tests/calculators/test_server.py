@@ -0,0 +1,147 @@
+import json
+import socket
+import tarfile
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import evaluate, server
+from bratlib.calculators.results import result_to_json
+
+gold_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5\tipsum
+T3\tC 8 9\tdolor
+R1\tR Arg1:T1 Arg2:T2
+N1\tReference T1 C:1\tlorem
+"""
+
+system_doc = """T1\tA 1 3\tlorem
+T2\tB 3 5\tipsum
+T3\tD 8 9\tdolor
+R1\tR Arg1:T1 Arg2:T2
+N1\tReference T2 C:1\tipsum
+"""
+
+
+@pytest.fixture
+def directories(write_directories):
+    return write_directories(gold_doc, system_doc, agrees=lambda i: i == 0)
+
+
+@pytest.fixture
+def evaluation_server(directories):
+    gold, _ = directories
+    return server.EvaluationServer({'gold': bd.BratDataset.from_directory(gold)}, max_concurrent=1, max_queued=0)
+
+
+def expected_results(gold, system, metrics=tuple(evaluate.METRICS)):
+    results = evaluate.evaluate(bd.BratDataset.from_directory(gold), bd.BratDataset.from_directory(system), metrics)
+    return result_to_json(results)
+
+
+def test_score_directory(directories, evaluation_server):
+    gold, system = directories
+    response = evaluation_server.score({'system': str(system)})
+    assert response['gold'] == 'gold'
+    assert response['files'] == 3
+    assert response['results'] == expected_results(gold, system)
+    assert set(response['timing']) == {'queued', 'parse', 'score'}
+
+    # The gold files are not changed by scoring, so a second submission gets the same results
+    assert evaluation_server.score({'system': str(system)})['results'] == response['results']
+
+
+def test_resident_gold_indexes(directories):
+    gold, system = directories
+    resident = server.ResidentGold(bd.BratDataset.from_directory(gold))
+    indexes = resident.files['0']
+    assert indexes.entities._groups is not None
+
+    pair = resident.pair(next(iter(bd.BratDataset.from_directory(system))))
+    assert pair.gold_entities is indexes.entities
+    assert pair.gold_relations is indexes.relations
+    assert resident.pair(bd.BratFile.from_data()) is None
+
+
+def test_score_archive(directories, evaluation_server, tmp_path):
+    gold, system = directories
+    archive = tmp_path / 'system.tar.gz'
+    with tarfile.open(archive, 'w:gz') as tar:
+        for path in sorted(system.iterdir()):
+            tar.add(path, arcname=path.name)
+
+    response = evaluation_server.score({'system': str(archive), 'metrics': ['entity_strict']})
+    assert response['results'] == expected_results(gold, system, ['entity_strict'])
+
+
+def test_request_errors(directories, evaluation_server):
+    _, system = directories
+    cases = [
+        ({'gold': 'other', 'system': str(system)}, 404),
+        ({'system': str(system / 'missing')}, 404),
+        ({'system': str(system), 'metrics': ['unknown']}, 400),
+        ({}, 400),
+    ]
+    for request, status in cases:
+        with pytest.raises(server.RequestError) as e:
+            evaluation_server.score(request)
+        assert e.value.status == status
+
+
+def test_queue_limit(directories, evaluation_server):
+    _, system = directories
+    # Hold the only slot, as if another submission were being scored
+    evaluation_server._running += 1
+    try:
+        with pytest.raises(server.RequestError) as e:
+            evaluation_server.score({'system': str(system)})
+        assert e.value.status == 503
+    finally:
+        evaluation_server._running -= 1
+
+
+def _serve(httpd):
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_http(directories, evaluation_server):
+    gold, system = directories
+    with server.make_server(evaluation_server, port=0) as httpd:
+        _serve(httpd)
+        url = f'http://127.0.0.1:{httpd.server_address[1]}'
+        try:
+            with urllib.request.urlopen(f'{url}/status') as response:
+                assert json.load(response) == {'gold': {'gold': 3}, 'running': 0, 'waiting': 0}
+
+            body = json.dumps({'system': str(system)}).encode()
+            with urllib.request.urlopen(urllib.request.Request(f'{url}/score', body)) as response:
+                assert json.load(response)['results'] == expected_results(gold, system)
+
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(urllib.request.Request(f'{url}/score', b'not json'))
+            assert e.value.code == 400
+        finally:
+            httpd.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not available')
+def test_unix_socket(evaluation_server, tmp_path):
+    socket_path = str(tmp_path / 'server.sock')
+    with server.make_server(evaluation_server, socket_path=socket_path) as httpd:
+        _serve(httpd)
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+                client.sendall(b'GET /status HTTP/1.0\r\n\r\n')
+                response = b''.join(iter(lambda: client.recv(4096), b''))
+        finally:
+            httpd.shutdown()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.0 200')
+    assert json.loads(body)['gold'] == {'gold': 3}
@@ -0,0 +1,72 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement, evaluate, sharding
+
+gold_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5\tipsum
+T3\tC 8 9\tdolor
+R1\tR Arg1:T1 Arg2:T2
+"""
+
+system_doc = """T1\tA 1 3\tlorem
+T2\tB 3 5\tipsum
+T3\tD 8 9\tdolor
+R1\tR Arg1:T1 Arg2:T2
+"""
+
+
+@pytest.fixture
+def directories(write_directories):
+    return write_directories(gold_doc, system_doc, 20, name='doc{}', agrees=lambda i: i % 3 == 0)
+
+
+def test_shard_of():
+    names = [f'doc{i}' for i in range(100)]
+    shards = [sharding.shard_of(name, 4) for name in names]
+    assert shards == [sharding.shard_of(name, 4) for name in names]
+    assert set(shards) == {0, 1, 2, 3}
+
+
+def test_shards_in_processes(directories, tmp_path):
+    gold, system = directories
+    count = 3
+    processes = [
+        subprocess.Popen([
+            sys.executable, '-m', 'bratlib', 'shard', 'run', 'entity-agreement', str(gold), str(system),
+            '-i', str(i), '-n', str(count), '-o', str(tmp_path / f'part{i}.json'), '-O', 'mode=lenient'
+        ])
+        for i in range(count)
+    ]
+    assert [p.wait() for p in processes] == [0] * count
+
+    partials = [json.loads((tmp_path / f'part{i}.json').read_text()) for i in range(count)]
+    assert sum(p['files'] for p in partials) == 20
+
+    expected = entity_agreement.count_dataset(bd.BratDataset.from_directory(gold),
+                                              bd.BratDataset.from_directory(system), 'lenient')
+    assert sharding.merge_partials(partials) == expected
+
+    with pytest.raises(ValueError):
+        sharding.merge_partials(partials[1:])
+    with pytest.raises(ValueError):
+        sharding.merge_partials(partials + partials[:1])
+
+
+def test_merge_evaluate(directories):
+    gold, system = [bd.BratDataset.from_directory(d) for d in directories]
+    partials = [sharding.run_shard('evaluate', gold, system, i, 4) for i in range(4)]
+    partials = [json.loads(json.dumps(p)) for p in partials]
+    assert sharding.merge_partials(partials) == evaluate.evaluate(gold, system)
+
+
+def test_mismatched_partials(directories):
+    gold, system = [bd.BratDataset.from_directory(d) for d in directories]
+    strict = sharding.run_shard('entity-agreement', gold, system, 0, 2)
+    lenient = sharding.run_shard('entity-agreement', gold, system, 1, 2, mode='lenient')
+    with pytest.raises(ValueError):
+        sharding.merge_partials([strict, lenient])
@@ -0,0 +1,25 @@
+import typing as t
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def write_directories(tmp_path):
+    """
+    Writes a gold and a system directory of `count` ann files named by formatting `name` with each number, and
+    returns their paths. Every gold file contains `gold_doc`; each system file contains `system_doc`, or `gold_doc`
+    if `agrees` is true of its number.
+    """
+
+    def write(gold_doc: str, system_doc: str, count=3, *, name='{}',
+              agrees: t.Callable[[int], bool] = lambda i: False) -> t.Tuple[Path, Path]:
+        gold, system = tmp_path / 'gold', tmp_path / 'system'
+        gold.mkdir()
+        system.mkdir()
+        for i in range(count):
+            (gold / f'{name.format(i)}.ann').write_text(gold_doc)
+            (system / f'{name.format(i)}.ann').write_text(gold_doc if agrees(i) else system_doc)
+        return gold, system
+
+    return write
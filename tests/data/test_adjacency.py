@@ -0,0 +1,61 @@
+from bratlib import data as bd
+
+ann_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5\tipsum
+T3\tA 1 2\tlorem
+T4\tC 8 9\tdolor
+E1\tEV:T4 Theme:T1 Cause:T2
+R1\tR Arg1:T1 Arg2:T2
+R2\tS Arg1:T2 Arg2:T1
+R3\tR Arg1:T1 Arg2:T4
+*\tEquiv T1 T2
+A1\tNegated T2
+A2\tSpeculated E1
+N1\tReference T1 C:1\tlorem
+"""
+
+
+def test_adjacency(tmp_path):
+    path = tmp_path / 'doc.ann'
+    path.write_text(ann_doc)
+    ann = bd.BratFile.from_ann_path(path)
+    ann.entities
+    t1, t2, t3, t4 = (ann._mapping[f'T{i}'] for i in range(1, 5))
+    event, = ann.events
+    adjacency = ann.adjacency
+
+    assert adjacency.relations_from(t1) == [r for r in ann.relations if r.arg1 is t1]
+    assert len(adjacency.relations_from(t1)) == 2
+    assert adjacency.relations_to(t1) == [r for r in ann.relations if r.arg2 is t1]
+    assert adjacency.events_triggered_by(t4) == [event]
+    assert adjacency.event_arguments(t1) == [('Theme', event)]
+    assert adjacency.event_arguments(t2) == [('Cause', event)]
+    assert adjacency.equivalences_of(t1) == list(ann.equivalences)
+    assert [a.tag for a in adjacency.attributes_of(t2)] == ['Negated']
+    assert [a.tag for a in adjacency.attributes_of(event)] == ['Speculated']
+    assert [n.ont_id for n in adjacency.normalizations_of(t1)] == ['1']
+
+    # T3 is equal to T1, but is a separate annotation that nothing refers to
+    assert t3 == t1
+    assert adjacency.relations_from(t3) == []
+    assert adjacency.normalizations_of(t3) == []
+    assert ann.adjacency is adjacency
+
+
+def test_adjacency_after_append(tmp_path):
+    path = tmp_path / 'doc.ann'
+    path.write_text(ann_doc)
+    ann = bd.BratFile.from_ann_path(path)
+    ann.entities
+    t4 = ann._mapping['T4']
+    assert ann.adjacency.relations_from(t4) == []
+
+    ann.append_annotations(relations=[bd.Relation('S', t4, ann._mapping['T2'])])
+    assert [r.relation for r in ann.adjacency.relations_from(t4)] == ['S']
+
+
+def test_adjacency_from_data():
+    a, b = bd.Entity('A', [(0, 1)], 'x'), bd.Entity('B', [(2, 3)], 'y')
+    rel = bd.Relation('R', a, b)
+    ann = bd.BratFile.from_data(entities=[a, b], relations=[rel])
+    assert ann.adjacency.relations_to(b) == [rel]
@@ -0,0 +1,82 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.data.appending import next_ids
+
+sample_doc = """T1\tA 1 2\tlorem
+T4\tB 3 5;5 6\tipsum
+R2\tC Arg1:T1 Arg2:T4
+A1\tF T1
+N3\tReference T1 C:1\tlorem"""
+
+
+@pytest.fixture
+def ann_path(tmp_path):
+    path = tmp_path / 'a.ann'
+    path.write_text(sample_doc)
+    return path
+
+
+def test_next_ids():
+    assert next_ids(sample_doc) == {'T': 5, 'R': 3, 'N': 4}
+    assert next_ids('') == {'T': 1, 'R': 1, 'N': 1}
+
+
+@pytest.mark.parametrize('loaded', [False, True])
+def test_append_annotations(ann_path, loaded):
+    ann = bd.BratFile(ann_path, None, bd.Vocabulary())
+    if loaded:
+        existing = ann.entities[0]
+    else:
+        existing = bd.Entity('A', [(1, 2)], 'lorem')
+
+    new = bd.Entity('D', [(0, 1)], 'x')
+    ids = ann.append_annotations(
+        entities=[new],
+        relations=[bd.Relation('E', new, existing)],
+        normalizations=[bd.Normalization(new, 'C', '2')],
+    )
+    assert ids == ['T5', 'R3', 'N4']
+
+    text = ann_path.read_text()
+    assert text.startswith(sample_doc + '\n')
+    assert text.endswith('T5\tD 0 1\tx\nR3\tE Arg1:T5 Arg2:T1\nN4\tReference T5 C:2\tx\n')
+
+    reparsed = bd.BratFile(ann_path, None)
+    for attr in ['entities', 'relations', 'normalizations', 'attributes']:
+        assert getattr(ann, attr) == getattr(reparsed, attr)
+
+    if loaded:
+        assert ann.relations[0].arg2 is existing
+        assert ann.entities[0].tag is ann.vocabulary.intern('D')
+
+    assert ann.append_annotations(entities=[bd.Entity('A', [(9, 10)], 'y')]) == ['T6']
+
+
+def test_append_unknown_entity(ann_path):
+    ann = bd.BratFile(ann_path, None)
+    missing = bd.Entity('Z', [(0, 1)], 'x')
+    with pytest.raises(ValueError):
+        ann.append_annotations(relations=[bd.Relation('E', missing, missing)])
+    assert ann_path.read_text() == sample_doc
+
+    with pytest.raises(ValueError):
+        bd.BratFile.from_data().append_annotations(entities=[missing])
+
+
+def test_append_to_columnar_file(ann_path, tmp_path):
+    pytest.importorskip('numpy')
+    from bratlib.data.columnar import ColumnarDataset, export_dataset, load_dataset
+
+    export_dataset(bd.BratDataset.from_directory(ann_path.parent), tmp_path / 'columns')
+    ann, = load_dataset(tmp_path / 'columns')
+    a, b = ann.entities
+    assert ann.append_annotations(relations=[bd.Relation('R', b, a)]) == ['R3']
+    assert ann_path.read_text().endswith('\nR3\tR Arg1:T4 Arg2:T1\n')
+    assert any(r.relation == 'R' and r.arg1 is b and r.arg2 is a for r in ann.relations)
+
+    # Files of a ColumnarDataset that has no ann files can't be appended to
+    entities = {'doc': [0], 'start': [0], 'end': [1], 'label': ['A'], 'mention': ['x']}
+    unwritten, = ColumnarDataset.from_arrays(entities, directory=tmp_path / 'nowhere').to_dataset()
+    with pytest.raises(ValueError):
+        unwritten.append_annotations(relations=[bd.Relation('R', *unwritten.entities * 2)])
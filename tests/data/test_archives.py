@@ -0,0 +1,103 @@
+import tarfile
+import zipfile
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement
+from bratlib.data.archives import ArchiveBratFile, iter_archive
+
+
+def _write_corpus(directory, offset=0):
+    directory.mkdir()
+    for i in range(5):
+        (directory / f'doc{i}.ann').write_text(
+            f'T1\tA {i} {i + 2}\tab\nT2\tB 5 {7 + offset}\tcd\nR1\tC Arg1:T1 Arg2:T2\n'
+        )
+        if i != 3:
+            (directory / f'doc{i}.txt').write_text(f'text {i}')
+    return directory
+
+
+def _archive(directory, archive_path):
+    if archive_path.suffix == '.zip':
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            for p in sorted(directory.iterdir()):
+                archive.write(p, f'corpus/{p.name}')
+    else:
+        with tarfile.open(archive_path, 'w:gz') as archive:
+            archive.add(directory, arcname='corpus')
+    return archive_path
+
+
+@pytest.fixture(params=['data.tar.gz', 'data.zip'])
+def archive_name(request):
+    return request.param
+
+
+def test_from_archive(tmp_path, archive_name):
+    directory = _write_corpus(tmp_path / 'gold')
+    archive_path = _archive(directory, tmp_path / archive_name)
+
+    expected = bd.BratDataset.from_directory(directory)
+    actual = bd.BratDataset.from_archive(archive_path)
+
+    # Names are member paths without the suffix, like the names of recursive directory datasets
+    assert [a.name for a in actual] == [f'corpus/{a.name}' for a in expected]
+    for a, b in zip(actual, expected):
+        assert isinstance(a, ArchiveBratFile)
+        assert a.entities == b.entities
+        assert a.relations == b.relations
+        assert str(a) == str(b)
+        assert (a._txt_path is None) == (b._txt_path is None)
+    assert actual.brat_files[0].entities[0].tag is actual.brat_files[1].entities[0].tag
+
+
+def test_iter_archive_read_txt(tmp_path, archive_name):
+    archive_path = _archive(_write_corpus(tmp_path / 'gold'), tmp_path / archive_name)
+    texts = {a.name: a.txt_text for a in iter_archive(archive_path, read_txt=True)}
+    assert texts == {
+        'corpus/doc0': 'text 0', 'corpus/doc1': 'text 1', 'corpus/doc2': 'text 2', 'corpus/doc3': None,
+        'corpus/doc4': 'text 4',
+    }
+
+
+def test_one_pass_evaluation(tmp_path, archive_name):
+    gold_directory = _write_corpus(tmp_path / 'gold')
+    system_directory = _write_corpus(tmp_path / 'system', offset=1)
+    gold_archive = _archive(gold_directory, tmp_path / f'gold_{archive_name}')
+    system_archive = _archive(system_directory, tmp_path / f'system_{archive_name}')
+
+    expected = entity_agreement.count_dataset(
+        bd.BratDataset.from_directory(gold_directory), bd.BratDataset.from_directory(system_directory)
+    )
+    actual = entity_agreement.count_dataset(iter_archive(gold_archive), iter_archive(system_archive))
+    assert actual == expected
+
+
+def test_same_stem_in_two_directories(tmp_path):
+    archive_path = tmp_path / 'data.zip'
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr('a/doc.ann', 'T1\tA 0 1\tx\n')
+        archive.writestr('b/doc.ann', 'T1\tB 0 1\tx\n')
+    assert sorted(a.name for a in iter_archive(archive_path)) == ['a/doc', 'b/doc']
+
+
+def test_reload_after_release(tmp_path, archive_name):
+    from bratlib.calculators import evaluate
+
+    archive_path = _archive(_write_corpus(tmp_path / 'gold'), tmp_path / archive_name)
+    dataset = bd.BratDataset.from_archive(archive_path, parse=False)
+    expected = [a.entities for a in bd.BratDataset.from_archive(archive_path)]
+
+    # The files are released after they are evaluated, and are read from the archive again when they are accessed
+    evaluate.evaluate(dataset, dataset, ['entity_strict'])
+    assert all('_data_dict' not in a.__dict__ for a in dataset)
+    assert [a.entities for a in dataset] == expected
+
+
+def test_load_dataset(tmp_path, archive_name):
+    archive_path = _archive(_write_corpus(tmp_path / 'gold'), tmp_path / archive_name)
+    dataset = bd.BratDataset.from_archive(archive_path, parse=False)
+    dataset.load()
+    assert all('_data_dict' in a.__dict__ for a in dataset)
@@ -0,0 +1,108 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.data.columnar import ColumnarBratFile, ColumnarDataset, export_dataset, load_dataset
+
+sample_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5;5 6\tipsum
+T3\tC 8 9\tdolor
+E1\tA:T1 Org1:T1 Org2:T2
+E2\tEggs:T1 Spam:T2
+R1\tC Arg1:T1 Arg2:T2
+R2\tD Arg1:T3 Arg2:T1
+*\tEquiv T1 T2
+A1\tF E1
+A2\tG T3
+N1\tReference T1 C:1\tlorem
+"""
+
+DATA_ATTRIBUTES = ['entities', 'events', 'relations', 'equivalences', 'attributes', 'normalizations']
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    (directory / 'a.ann').write_text(sample_doc)
+    (directory / 'a.txt').write_text('text')
+    (directory / 'b.ann').write_text('')
+    (directory / 'c.ann').write_text(sample_doc.replace('lorem', 'sit'))
+    return bd.BratDataset.from_directory(directory)
+
+
+@pytest.mark.parametrize('file_format', ['npz', 'parquet'])
+def test_round_trip(dataset, tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+
+    path = tmp_path / f'export.{file_format}'
+    export_dataset(dataset, path, file_format)
+    loaded = load_dataset(path)
+
+    assert loaded.directory == dataset.directory
+    assert [a.name for a in loaded] == [a.name for a in dataset]
+    for expected, actual in zip(dataset, loaded):
+        assert isinstance(actual, ColumnarBratFile)
+        for attr in DATA_ATTRIBUTES:
+            assert getattr(actual, attr) == getattr(expected, attr)
+        assert str(actual) == str(expected)
+
+    a = loaded.brat_files[0]
+    assert a.txt_path == dataset.brat_files[0].txt_path
+    assert a.relations[0].arg1 is a.entities[0], 'Annotations should refer to the same objects'
+    assert a.attributes[0].items[0] is a.events[0]
+    assert a.entities[0].tag is loaded.brat_files[2].entities[0].tag
+
+
+def test_codes(dataset):
+    columns = ColumnarDataset.from_dataset(dataset)
+    tags = columns.tables['entities']['tag']
+    assert [columns.vocabulary[code] for code in tags[:3]] == ['A', 'B', 'C']
+    assert list(columns.rows('entities', 0)) == [0, 1, 2]
+    assert list(columns.rows('entities', 1)) == []
+    assert list(columns.rows('entities', 2)) == [3, 4, 5]
+
+
+def test_ann_text(dataset):
+    columns = ColumnarDataset.from_dataset(dataset)
+    for i, ann in enumerate(dataset):
+        assert columns.ann_text(i) == str(ann)
+
+
+def test_from_arrays(tmp_path):
+    texts = {7: 'lorem ipsum dolor', 3: 'sit amet'}
+    entities = {
+        'doc': [7, 3, 7, 7],
+        'start': [6, 0, 0, 0],
+        'end': [11, 3, 5, 5],
+        'label': ['B', 'A', 'C', 'A'],
+        'score': [0.5, 0.9, 0.8, 0.7],
+    }
+    relations = {'arg1': [0, 2], 'arg2': [3, 0], 'label': ['R', 'S']}
+    columns = ColumnarDataset.from_arrays(entities, relations, texts=texts, directory=tmp_path)
+
+    a, c, b = bd.Entity('A', [(0, 5)], 'lorem'), bd.Entity('C', [(0, 5)], 'lorem'), bd.Entity('B', [(6, 11)], 'ipsum')
+    expected = {
+        '3': bd.BratFile.from_data(entities=[bd.Entity('A', [(0, 3)], 'sit')]),
+        '7': bd.BratFile.from_data(entities=[a, c, b], relations=[bd.Relation('S', c, b), bd.Relation('R', b, a)]),
+    }
+
+    dataset = columns.to_dataset()
+    assert [ann.name for ann in dataset] == ['3', '7']
+    for ann in dataset:
+        for attr in DATA_ATTRIBUTES:
+            assert getattr(ann, attr) == getattr(expected[ann.name], attr)
+
+    columns.write_ann_files()
+    written = bd.BratDataset.from_directory(tmp_path)
+    for ann in written:
+        assert ann.ann_path.read_text() == str(expected[ann.name])
+        assert ann.relations == expected[ann.name].relations
+
+
+def test_from_arrays_errors():
+    entities = {'doc': [0, 1], 'start': [0, 0], 'end': [1, 1], 'label': ['A', 'A']}
+    with pytest.raises(ValueError):
+        ColumnarDataset.from_arrays(entities)
+    with pytest.raises(ValueError):
+        ColumnarDataset.from_arrays(dict(entities, mention=['a', 'b']), {'arg1': [0], 'arg2': [1], 'label': ['R']})
@@ -1,4 +1,5 @@
 import pathlib
+import pickle
 
 import pytest
 
@@ -95,3 +96,42 @@ def test_brat_parse_error(tmp_path):
 
     with pytest.raises(bd.BratParseError):
         bd.BratFile.from_ann_path(ann_path).entities
+
+
+def test_vocabulary(tmp_path):
+    (tmp_path / 'a.ann').write_text(sample_doc)
+    (tmp_path / 'b.ann').write_text(sample_doc)
+    dataset = bd.BratDataset.from_directory(tmp_path)
+    a, b = dataset
+
+    assert a.entities[0].tag is b.entities[0].tag
+    assert a.relations[0].relation is b.relations[0].relation
+    assert a.normalizations[0].ontology is b.normalizations[0].ontology
+
+    vocabulary = dataset.vocabulary
+    assert a.vocabulary is b.vocabulary is vocabulary
+    assert {'A', 'B', 'C', 'Eggs', 'Spam', 'Org1', 'F'} <= set(vocabulary)
+    code = vocabulary.code('B')
+    assert vocabulary[code] == 'B'
+    assert vocabulary.codes(['A', 'B']) == [vocabulary.code('A'), code]
+    assert len(vocabulary) == len(set(vocabulary))
+
+
+def test_pickle_without_vocabulary(tmp_path):
+    (tmp_path / 'a.ann').write_text(sample_doc)
+    dataset = bd.BratDataset.from_directory(tmp_path, bd.Vocabulary(f'label{i}' for i in range(5000)))
+    ann, = dataset
+
+    data = pickle.dumps(ann)
+    assert len(data) < 1000
+    copy = pickle.loads(data)
+    assert copy.vocabulary is None
+    assert ann.vocabulary is dataset.vocabulary
+    assert copy.entities == ann.entities
+
+
+def test_find_txt_suffix(tmp_path):
+    # Stems ending in the letters of "ann" keep them
+    (tmp_path / 'ann.ann').write_text('')
+    (tmp_path / 'ann.txt').write_text('')
+    assert bd.BratFile.from_ann_path(tmp_path / 'ann.ann').txt_path == tmp_path / 'ann.txt'
@@ -0,0 +1,49 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.data.discovery import discover
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    paths = ['a.ann', 'a.txt', 'b.ann', 'train/c.ann', 'train/c.txt', 'train/deep/d.ann', 'test/e.ann', 'test/e.txt',
+             'tmp/f.ann', 'notes.txt']
+    for p in paths:
+        path = tmp_path / p
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('T1\tA 0 1\tx\n' if p.endswith('.ann') else 'x')
+    return tmp_path
+
+
+def test_discover_flat(corpus):
+    found = sorted(discover(corpus))
+    assert found == [('a', corpus / 'a.ann', corpus / 'a.txt'), ('b', corpus / 'b.ann', None)]
+
+
+def test_discover_recursive(corpus):
+    found = {name: txt for name, ann, txt in discover(corpus, recursive=True)}
+    assert found == {
+        'a': corpus / 'a.txt',
+        'b': None,
+        'train/c': corpus / 'train' / 'c.txt',
+        'train/deep/d': None,
+        'test/e': corpus / 'test' / 'e.txt',
+        'tmp/f': None,
+    }
+
+
+@pytest.mark.parametrize('include, exclude, expected', [
+    ('train/*', None, ['train/c', 'train/deep/d']),
+    (['train/*', 'test/*'], 'train/deep/*', ['test/e', 'train/c']),
+    (None, ['tmp', '[ab].ann'], ['test/e', 'train/c', 'train/deep/d']),
+])
+def test_discover_patterns(corpus, include, expected, exclude):
+    found = sorted(name for name, _, _ in discover(corpus, recursive=True, include=include, exclude=exclude))
+    assert found == expected
+
+
+def test_from_directory_recursive(corpus):
+    dataset = bd.BratDataset.from_directory(corpus, recursive=True, exclude='tmp')
+    assert [a.name for a in dataset] == ['a', 'b', 'test/e', 'train/c', 'train/deep/d']
+    assert dataset.brat_files[3].txt_path == corpus / 'train' / 'c.txt'
+    assert all(len(a.entities) == 1 for a in dataset)
@@ -0,0 +1,89 @@
+import pathlib
+import threading
+import time
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.data.loading import iter_loaded, map_concurrently
+
+LATENCY = 0.02
+
+
+class SlowFilesystem:
+    """Adds latency to reading files and checking if they exist, and records how many calls overlap."""
+
+    def __init__(self, monkeypatch):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        for name in ('read_text', 'exists'):
+            monkeypatch.setattr(pathlib.Path, name, self._slow(getattr(pathlib.Path, name)))
+
+    def _slow(self, method):
+        def wrapper(path, *args, **kwargs):
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                time.sleep(LATENCY)
+                return method(path, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+        return wrapper
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for i in range(20):
+        (tmp_path / f'{i:02}.ann').write_text(f'T1\tA {i} {i + 1}\tx\nT2\tB 0 1\ty\nR1\tC Arg1:T1 Arg2:T2\n')
+        if i % 2:
+            (tmp_path / f'{i:02}.txt').write_text('text')
+    return tmp_path
+
+
+def test_from_directory_concurrently(directory, monkeypatch):
+    expected = bd.BratDataset.from_directory(directory)
+    expected.load()
+
+    filesystem = SlowFilesystem(monkeypatch)
+    actual = bd.BratDataset.from_directory(directory, max_workers=4)
+    assert 1 < filesystem.max_in_flight <= 4
+
+    # Everything has been read already, so this doesn't touch the filesystem
+    filesystem.max_in_flight = 0
+    assert [a.name for a in actual] == [a.name for a in expected]
+    for a, b in zip(actual, expected):
+        assert a.entities == b.entities
+        assert a.relations == b.relations
+        assert a._txt_path == b._txt_path
+    assert filesystem.max_in_flight == 0
+
+
+def test_iter_loaded_overlaps_reads(directory, monkeypatch):
+    dataset = bd.BratDataset.from_directory(directory)
+    filesystem = SlowFilesystem(monkeypatch)
+
+    loaded = list(iter_loaded(dataset, max_workers=10))
+
+    assert sorted(loaded) == dataset.brat_files
+    assert 1 < filesystem.max_in_flight <= 10
+
+
+def test_map_concurrently_limits_in_flight():
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'max': 0}
+
+    def work(x):
+        with lock:
+            state['in_flight'] += 1
+            state['max'] = max(state['max'], state['in_flight'])
+        time.sleep(0.005)
+        with lock:
+            state['in_flight'] -= 1
+        return x * 2
+
+    results = dict(map_concurrently(work, range(30), max_workers=3))
+    assert results == {x: x * 2 for x in range(30)}
+    assert state['max'] <= 3
@@ -0,0 +1,65 @@
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+from bratlib import data as bd
+from bratlib.data.columnar import ColumnarDataset
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 8), reason='requires multiprocessing.shared_memory')
+
+sample_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5;5 6\tipsum
+T3\tC 8 9\tdolor
+E1\tA:T1 Org1:T1 Org2:T2
+R1\tC Arg1:T1 Arg2:T2
+*\tEquiv T1 T2
+A1\tF E1
+N1\tReference T1 C:1\tlorem
+"""
+
+DATA_ATTRIBUTES = ['entities', 'events', 'relations', 'equivalences', 'attributes', 'normalizations']
+
+
+@pytest.fixture
+def columns(tmp_path):
+    (tmp_path / 'a.ann').write_text(sample_doc)
+    (tmp_path / 'a.txt').write_text('text')
+    (tmp_path / 'b.ann').write_text('')
+    (tmp_path / 'c.ann').write_text(sample_doc.replace('lorem', 'sit'))
+    return ColumnarDataset.from_dataset(bd.BratDataset.from_directory(tmp_path))
+
+
+def _summary(ann):
+    return ann.name, [getattr(ann, a) for a in DATA_ATTRIBUTES]
+
+
+def test_attach(columns):
+    from bratlib.data import shared
+
+    with shared.share(columns) as published:
+        assert len(pickle.dumps(published.handle)) < 2000
+
+        attached = shared.attach(published.handle)
+        for table, table_columns in columns.tables.items():
+            for column, values in table_columns.items():
+                if isinstance(values, list):
+                    assert attached.tables[table][column] == values
+                else:
+                    np.testing.assert_array_equal(attached.tables[table][column], values)
+
+        starts = attached.tables['entities']['start']
+        with pytest.raises(ValueError):
+            starts[0] = 100
+
+        expected = [_summary(a) for a in columns.to_dataset()]
+        assert [_summary(a) for a in attached.to_dataset()] == expected
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_map_files(columns, jobs):
+    from bratlib.data import shared
+
+    expected = [_summary(a) for a in columns.to_dataset()]
+    assert list(shared.map_files(_summary, columns, jobs=jobs)) == expected
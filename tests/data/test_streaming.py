@@ -0,0 +1,70 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.data.streaming import iter_annotations, load_streaming
+
+sample_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5;5 6\tipsum
+T3\tC 8 9\tdolor
+E1\tA:T1 Org1:T1 Org2:T2
+E2\tEggs:T1 Spam:T2
+R1\tC Arg1:T1 Arg2:T2
+R2\tD Arg1:T3 Arg2:T1
+*\tEquiv T1 T2
+A1\tF E1
+A2\tG T3
+N1\tReference T1 C:1\tlorem"""
+
+# The relation, event, and attribute each refer to annotations on later lines
+forward_doc = """T1\tA 1 2\tlorem
+R1\tC Arg1:T1 Arg2:T2
+A1\tF E1
+E1\tA:T2
+T2\tB 3 4\tipsum
+"""
+
+DATA_ATTRIBUTES = ['entities', 'events', 'relations', 'equivalences', 'attributes', 'normalizations']
+
+
+def test_load_streaming(tmp_path):
+    path = tmp_path / 'a.ann'
+    path.write_text(sample_doc)
+
+    expected = bd.BratFile(path, None)
+    actual = bd.BratFile(path, None, bd.Vocabulary())
+    load_streaming(actual)
+
+    for attr in DATA_ATTRIBUTES:
+        assert getattr(actual, attr) == getattr(expected, attr)
+    assert actual.relations[0].arg1 is actual.entities[0]
+    assert actual._mapping.keys() == expected._mapping.keys()
+    assert actual.entities[0].tag is actual.vocabulary.intern('A')
+
+
+def test_forward_references(tmp_path):
+    path = tmp_path / 'a.ann'
+    path.write_text(forward_doc)
+
+    deferred = list(iter_annotations(path))
+    assert [type(a) for a in deferred] == [bd.Entity, bd.Entity, bd.Relation, bd.Event, bd.Attribute]
+    assert deferred[4].items[0] is deferred[3]
+
+    ann = bd.BratFile(path, None)
+    load_streaming(ann)
+    expected = bd.BratFile(path, None)
+    for attr in ['entities', 'events', 'relations']:
+        assert getattr(ann, attr) == getattr(expected, attr)
+    assert ann.attributes == [bd.Attribute('F', ann.events)]
+
+    skipped = list(iter_annotations(path, forward_references='skip'))
+    assert [type(a) for a in skipped] == [bd.Entity, bd.Entity]
+
+    with pytest.raises(bd.BratParseError):
+        list(iter_annotations(path, forward_references='error'))
+
+    path.write_text('T1\tA 1 2\tlorem\nR1\tC Arg1:T1 Arg2:T9\n')
+    with pytest.raises(bd.BratParseError):
+        list(iter_annotations(path))
+
+    with pytest.raises(ValueError):
+        list(iter_annotations(path, forward_references='ignore'))
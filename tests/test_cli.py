@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from bratlib import cli
+from bratlib import data as bd
+from bratlib.calculators import entity_agreement, relation_confusion_matrix
+
+gold_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5\tipsum
+R1\tR Arg1:T1 Arg2:T2
+"""
+
+system_doc = """T1\tA 1 2\tlorem
+T2\tC 3 5\tipsum
+R1\tR Arg1:T1 Arg2:T2
+"""
+
+
+@pytest.fixture
+def directories(write_directories):
+    return write_directories(gold_doc, system_doc)
+
+
+def test_subcommand(directories, capsys):
+    gold, system = directories
+    assert cli.main(['entity-agreement', str(gold), str(system), '-d', '2']) == 0
+    output = capsys.readouterr().out
+    assert output.startswith('tag,')
+    assert '(micro),0.50,0.50,0.50' in output
+
+
+def test_batch_jsonl(directories, tmp_path, monkeypatch):
+    gold, system = directories
+    manifest = tmp_path / 'manifest.jsonl'
+    jobs = [
+        {'calculator': 'entity-agreement', 'gold': str(gold), 'system': str(system)},
+        {'calculator': 'entity-agreement', 'gold': str(gold), 'system': str(system), 'options': {'mode': 'lenient'}},
+        {'calculator': 'relation-confusion-matrix', 'gold': str(gold), 'system': str(system)},
+        {'calculator': 'nonexistent', 'gold': str(gold), 'system': str(system)},
+    ]
+    manifest.write_text(''.join(json.dumps(job) + '\n' for job in jobs))
+
+    loaded = []
+    from_directory = bd.BratDataset.from_directory.__func__
+
+    def counting(cls, *args, **kwargs):
+        loaded.append(args[0])
+        return from_directory(cls, *args, **kwargs)
+
+    monkeypatch.setattr(bd.BratDataset, 'from_directory', classmethod(counting))
+
+    output = tmp_path / 'results.jsonl'
+    assert cli.main(['batch', str(manifest), '-o', str(output)]) == 1
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+
+    # Each dataset is loaded once and shared between jobs
+    assert len(loaded) == 2
+    assert [r['job'] for r in results] == [0, 1, 2, 3]
+
+    expected = entity_agreement.count_dataset(bd.BratDataset.from_directory(gold),
+                                              bd.BratDataset.from_directory(system))
+    assert results[0]['result']['counts'] == {tag: [c.tp, c.fp, c.tn, c.fn] for tag, c in expected.items()}
+    assert results[0]['result']['micro']['f1'] == pytest.approx(0.5)
+    assert results[1]['options'] == {'mode': 'lenient'}
+    matrix = relation_confusion_matrix.tabulate_dataset(bd.BratDataset.from_directory(gold),
+                                                        bd.BratDataset.from_directory(system))
+    assert results[2]['result'] == {'labels': matrix.labels, 'matrix': matrix.matrix}
+    assert results[3]['error'] == "ValueError: unknown calculator 'nonexistent'"
+
+
+def test_read_csv_manifest(tmp_path):
+    manifest = tmp_path / 'manifest.csv'
+    manifest.write_text('calculator,gold,system,threshold,assignment,by_tag\n'
+                        'overlap-agreement,g,s,0.25,optimal,\n'
+                        'normalization-agreement,g,s,,,true\n')
+    assert list(cli.read_manifest(manifest)) == [
+        cli.Job('overlap-agreement', 'g', 's', {'threshold': 0.25, 'assignment': 'optimal'}),
+        cli.Job('normalization-agreement', 'g', 's', {'by_tag': True}),
+    ]
+
+
+def test_dataset_cache_limit(directories):
+    gold, system = directories
+    cache = cli._DatasetCache(1)
+    first = cache[str(gold)]
+    assert cache[str(gold)] is first
+    cache[str(system)]
+    assert cache[str(gold)] is not first
+
+
+def test_batch_keeps_evaluated_datasets_parsed(directories, tmp_path, monkeypatch):
+    gold, system = directories
+    manifest = tmp_path / 'manifest.jsonl'
+    manifest.write_text(json.dumps({'calculator': 'evaluate', 'gold': str(gold), 'system': str(system)}) + '\n')
+    job, = cli.read_manifest(manifest)
+    assert job.options == {}
+    assert cli.Job('evaluate', str(gold), str(system)).options is None
+
+    loaded = []
+    from_directory = bd.BratDataset.from_directory.__func__
+
+    def recording(cls, *args, **kwargs):
+        dataset = from_directory(cls, *args, **kwargs)
+        loaded.append(dataset)
+        return dataset
+
+    monkeypatch.setattr(bd.BratDataset, 'from_directory', classmethod(recording))
+
+    records = list(cli.run_jobs([job, cli.Job('evaluate', str(gold), str(system), {'metrics': ['relation']})]))
+    assert all('result' in r for r in records)
+    assert records[1]['options'] == {'metrics': ['relation']}
+    # The datasets are kept parsed for later jobs rather than released after each evaluation
+    assert len(loaded) == 2
+    assert all('_data_dict' in ann.__dict__ for dataset in loaded for ann in dataset)
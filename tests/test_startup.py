@@ -0,0 +1,53 @@
+"""
+Regression tests for import time. The command line tools are run once per invocation,
+so importing them should not pull in pandas or other heavy dependencies before any work is done.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+# Generous enough for a slow CI machine, but well below the cost of importing pandas
+MAX_IMPORT_SECONDS = 0.5
+
+MODULES = [
+    'bratlib.cli',
+    'bratlib.data',
+    'bratlib.calculators.entity_agreement',
+    'bratlib.calculators.entity_confusion_matrix',
+    'bratlib.calculators.evaluate',
+    'bratlib.calculators.normalization_agreement',
+    'bratlib.calculators.overlap_agreement',
+    'bratlib.calculators.pairwise_agreement',
+    'bratlib.calculators.registry',
+    'bratlib.calculators.relation_agreement',
+    'bratlib.calculators.relation_confusion_matrix',
+    'bratlib.calculators.sampling',
+    'bratlib.calculators.server',
+    'bratlib.calculators.sharding',
+    'bratlib.tools.bio',
+    'bratlib.tools.diff',
+    'bratlib.tools.overlaps',
+    'bratlib.tools.validation',
+]
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(sorted(m for m in ('pandas', 'numpy') if m in sys.modules))
+"""
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_time(module):
+    output = subprocess.run(
+        [sys.executable, '-c', _SCRIPT.format(module=module)],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True
+    ).stdout.splitlines()
+
+    elapsed, heavy_modules = float(output[0]), output[1]
+    assert heavy_modules == '[]'
+    assert elapsed < MAX_IMPORT_SECONDS
@@ -0,0 +1,45 @@
+import pytest
+
+from bratlib import data as bd
+from bratlib.tools import bio
+
+TEXT = 'Take 2 tablets of aspirin, twice daily.'
+
+
+def test_tokenize():
+    tokens = bio.tokenize(TEXT)
+    assert [TEXT[s:e] for s, e in tokens] == ['Take', '2', 'tablets', 'of', 'aspirin', ',', 'twice', 'daily', '.']
+
+
+def test_bio_labels():
+    tokens = bio.tokenize(TEXT)
+    entities = [
+        bd.Entity('Drug', [(18, 25)], 'aspirin'),
+        bd.Entity('Dose', [(5, 14)], '2 tablets'),
+        bd.Entity('Frequency', [(27, 32), (33, 38)], 'twice daily'),  # discontiguous
+        bd.Entity('Unit', [(7, 11)], 'tabl'),  # partial overlap with Dose, left out
+        bd.Entity('Route', [(0, 2)], 'Ta'),  # part of a token
+    ]
+    assert bio.bio_labels(entities, tokens) == [
+        'B-Route', 'B-Dose', 'I-Dose', 'O', 'B-Drug', 'O', 'B-Frequency', 'I-Frequency', 'O'
+    ]
+    assert bio.bio_labels([], tokens) == ['O'] * len(tokens)
+    assert bio.bio_labels(entities, []) == []
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_iter_bio(tmp_path, jobs):
+    for i in range(5):
+        (tmp_path / f'{i}.ann').write_text('T1\tDrug 18 25\taspirin\n')
+        (tmp_path / f'{i}.txt').write_text(TEXT)
+    dataset = bd.BratDataset.from_directory(tmp_path)
+
+    documents = list(bio.iter_bio(dataset, jobs=jobs, chunksize=2))
+    assert [d.name for d in documents] == [str(i) for i in range(5)]
+    for doc in documents:
+        assert doc.words[4] == 'aspirin'
+        assert doc.labels == ['O'] * 4 + ['B-Drug'] + ['O'] * 4
+
+    # Token offsets can be given instead of a tokenizer
+    doc = bio.convert_file(dataset.brat_files[0], tokens=[(0, 17), (18, 25), (25, 39)])
+    assert doc.labels == ['O', 'B-Drug', 'O']
@@ -0,0 +1,72 @@
+import io
+import json
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.tools.diff import diff_datasets, write_changes
+
+old_doc = """T1\tA 1 2\tlorem
+T2\tB 3 5;5 6\tipsum
+T3\tC 8 9\tdolor
+R1\tC Arg1:T1 Arg2:T2
+N1\tReference T1 C:1\tlorem
+"""
+
+new_doc = """T1\tA 1 2\tlorem
+T2\tD 3 5;5 6\tipsum
+T3\tC 10 12\tamet
+R1\tC Arg1:T1 Arg2:T2
+N1\tReference T1 C:2\tlorem
+"""
+
+
+@pytest.fixture
+def versions(tmp_path):
+    old, new = tmp_path / 'old', tmp_path / 'new'
+    old.mkdir()
+    new.mkdir()
+    for directory, doc in ((old, old_doc), (new, new_doc)):
+        (directory / 'same.ann').write_text(old_doc)
+        (directory / 'changed.ann').write_text(doc)
+    # Same annotations in a different order, with different IDs
+    (new / 'reordered.ann').write_text('T7\tB 3 5;5 6\tipsum\nT8\tA 1 2\tlorem\n')
+    (old / 'reordered.ann').write_text('T1\tA 1 2\tlorem\nT2\tB 3 5;5 6\tipsum\n')
+    (old / 'gone.ann').write_text('')
+    (new / 'new.ann').write_text('')
+    return bd.BratDataset.from_directory(old), bd.BratDataset.from_directory(new)
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_diff_datasets(versions, max_workers):
+    old, new = versions
+    changes = list(diff_datasets(old, new, max_workers=max_workers))
+
+    ipsum = {'tag': 'D', 'spans': [[3, 5], [5, 6]], 'mention': 'ipsum'}
+    lorem = {'tag': 'A', 'spans': [[1, 2]], 'mention': 'lorem'}
+    assert changes[:3] == [
+        {'file': 'gone', 'change': 'removed'},
+        {'file': 'new', 'change': 'added'},
+        {'file': 'changed', 'change': 'modified'},
+    ]
+    rest = changes[3:]
+    assert {'file': 'changed', 'change': 'retagged', 'type': 'entity', 'old_label': 'B', 'new_label': 'D',
+            'annotation': ipsum} in rest
+    assert {'file': 'changed', 'change': 'removed', 'type': 'entity',
+            'annotation': {'tag': 'C', 'spans': [[8, 9]], 'mention': 'dolor'}} in rest
+    assert {'file': 'changed', 'change': 'added', 'type': 'entity',
+            'annotation': {'tag': 'C', 'spans': [[10, 12]], 'mention': 'amet'}} in rest
+    # The relation's second argument was retagged, so the relation is a different one
+    assert {'file': 'changed', 'change': 'added', 'type': 'relation',
+            'annotation': {'relation': 'C', 'arg1': lorem, 'arg2': ipsum}} in rest
+    assert {'file': 'changed', 'change': 'retagged', 'type': 'normalization', 'old_label': '1', 'new_label': '2',
+            'annotation': {'entity': lorem, 'ontology': 'C', 'ont_id': '2'}} in rest
+    assert len(rest) == 6
+
+    # Identical files are never parsed
+    same = next(a for a in new if a.name == 'same')
+    assert '_data_dict' not in same.__dict__
+
+    output = io.StringIO()
+    write_changes(changes, output)
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == changes
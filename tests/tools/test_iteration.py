@@ -2,7 +2,7 @@ import pytest
 from random import shuffle
 from types import SimpleNamespace
 
-from bratlib.tools.iteration import zip_datasets
+from bratlib.tools.iteration import zip_datasets, zip_streams
 
 
 def test_zip_datasets():
@@ -46,3 +46,18 @@ def test_zip_datasets():
 
     with pytest.raises(StopIteration):
         next(data_zip)
+
+
+def test_zip_streams():
+    stream_a = (SimpleNamespace(name=n, source='a') for n in ['x', 'y', 'z', '1'])
+    stream_b = (SimpleNamespace(name=n, source='b') for n in ['2', 'z', 'x'])
+
+    pairs = list(zip_streams(stream_a, stream_b))
+    assert sorted((a.name, a.source, b.name, b.source) for a, b in pairs) == [
+        ('x', 'a', 'x', 'b'),
+        ('z', 'a', 'z', 'b'),
+    ]
+
+    # zip_datasets uses zip_streams for iterators
+    stream_a = iter([SimpleNamespace(name='x'), SimpleNamespace(name='y')])
+    assert [a.name for a, b in zip_datasets(stream_a, [SimpleNamespace(name='y')])] == ['y']
@@ -0,0 +1,114 @@
+import itertools
+import random
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.tools import overlaps
+
+sample_doc = """T1\tA 0 10\tlorem ipsu
+T2\tB 2 5\trem
+T3\tB 2 5\trem
+T4\tC 8 12\tsuxx
+T5\tD 0 3;9 12\tlorxxx
+T6\tE 4 8\tm ip
+T7\tF 20 25\tdolor
+"""
+
+
+@pytest.fixture
+def ann(tmp_path):
+    path = tmp_path / 'doc.ann'
+    path.write_text(sample_doc)
+    return bd.BratFile.from_ann_path(path)
+
+
+def test_iter_overlaps(ann):
+    assert overlaps.count_file(ann) == {
+        ('nested', 'A', 'B'): 2,
+        ('duplicate', 'B', 'B'): 1,
+        ('crossing', 'A', 'C'): 1,
+        ('crossing', 'A', 'D'): 1,
+        ('nested', 'A', 'E'): 1,
+        ('crossing', 'B', 'D'): 2,
+        ('crossing', 'B', 'E'): 2,
+        ('crossing', 'C', 'D'): 1,
+        # E falls in the gap of D, and F overlaps nothing
+    }
+    nested = [o for o in overlaps.iter_overlaps(ann) if o.kind == 'nested']
+    assert all(o.first.tag == 'A' for o in nested)
+
+
+def test_gap_of_discontiguous_entity():
+    outer = bd.Entity('A', [(0, 3), (10, 12)], 'x')
+    in_gap = bd.Entity('B', [(4, 8)], 'y')
+    nested = bd.Entity('C', [(0, 2), (11, 12)], 'z')
+    ann = bd.BratFile.from_data(entities=sorted([outer, in_gap, nested]))
+    assert list(overlaps.iter_overlaps(ann)) == [overlaps.Overlap('nested', outer, nested)]
+
+
+def _brute_force(entities):
+    """Classifies every pair by comparing sets of characters."""
+    found = []
+    chars = [set().union(*(range(a, b) for a, b in e.spans)) for e in entities]
+    for i, j in itertools.combinations(range(len(entities)), 2):
+        if not chars[i] & chars[j]:
+            continue
+        if chars[i] == chars[j]:
+            found.append(('duplicate', i, j))
+        elif chars[i] > chars[j]:
+            found.append(('nested', i, j))
+        elif chars[j] > chars[i]:
+            found.append(('nested', j, i))
+        else:
+            found.append(('crossing', i, j))
+    return sorted(found)
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(50):
+        entities = []
+        for _ in range(rng.randint(0, 25)):
+            starts = sorted(rng.sample(range(60), rng.choice([2, 2, 4])))
+            spans = list(zip(starts[::2], starts[1::2]))
+            entities.append(bd.Entity(rng.choice('AB'), spans, 'x'))
+        entities.sort()
+        ann = bd.BratFile.from_data(entities=entities)
+
+        positions = {id(e): i for i, e in enumerate(entities)}
+        found = sorted((o.kind, positions[id(o.first)], positions[id(o.second)])
+                       for o in overlaps.iter_overlaps(ann))
+        assert found == _brute_force(entities)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_dataset(ann, jobs):
+    dataset = [ann, ann]
+    counts = overlaps.count_dataset(dataset, jobs=jobs)
+    assert counts == overlaps.count_file(ann) + overlaps.count_file(ann)
+
+    listed = list(overlaps.iter_dataset_overlaps(dataset, jobs=jobs))
+    assert len(listed) == 22
+    assert {name for name, _ in listed} == {'doc'}
+
+    df = overlaps.to_dataframe(counts)
+    assert df.loc[('nested', 'A', 'B'), 'count'] == 4
+    assert list(df.index.get_level_values('kind').unique()) == ['duplicate', 'nested', 'crossing']
+
+
+def test_columnar_dataset(tmp_path):
+    pytest.importorskip('numpy')
+    from bratlib.data.columnar import ColumnarDataset
+
+    entities = {
+        'doc': [0, 0, 0, 1],
+        'start': [0, 2, 2, 0],
+        'end': [10, 5, 5, 4],
+        'label': ['A', 'B', 'B', 'A'],
+        'mention': ['lorem ipsu', 'rem', 'rem', 'lore'],
+    }
+    dataset = ColumnarDataset.from_arrays(entities, directory=tmp_path).to_dataset()
+    # The files only exist in the columns, so their entities must be used rather than the ann paths
+    assert not any(ann.ann_path.exists() for ann in dataset)
+    assert overlaps.count_dataset(dataset) == {('nested', 'A', 'B'): 2, ('duplicate', 'B', 'B'): 1}
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from bratlib import data as bd
+from bratlib.tools.query import DatasetIndex
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    (tmp_path / 'a.ann').write_text(
+        'T1\tDrug 0 5\taspirin\n'
+        'T2\tDose 10 15;20 25\tten mg\n'
+        'T3\tDrug 30 40\tibuprofen\n'
+    )
+    (tmp_path / 'b.ann').write_text('T1\tDose 0 5\tfive\n')
+    (tmp_path / 'c.ann').write_text('T1\tDrug 100 110\ttylenol\n')
+    return bd.BratDataset.from_directory(tmp_path)
+
+
+def _tags_and_spans(entities):
+    return [(e.tag, e.spans) for e in entities]
+
+
+def test_entities_with_tag(dataset):
+    index = DatasetIndex.from_dataset(dataset)
+
+    assert [(name, e.mention) for name, e in index.entities_with_tag('Drug')] == [
+        ('a', 'aspirin'), ('a', 'ibuprofen'), ('c', 'tylenol')
+    ]
+    assert [name for name, _ in index.entities_with_tag('Drug', files=index.names_between('b', 'c'))] == ['c']
+    assert index.files_with_tag('Dose') == ['a', 'b']
+    assert index.count('Drug') == 3
+    assert list(index.entities_with_tag('Nothing')) == []
+
+
+def test_overlapping(dataset):
+    index = DatasetIndex.from_dataset(dataset)
+
+    assert _tags_and_spans(index.overlapping('a', 4, 12)) == [('Drug', [(0, 5)]), ('Dose', [(10, 15), (20, 25)])]
+    # The gap between the fragments of a discontiguous entity does not overlap it
+    assert index.overlapping('a', 16, 19) == []
+    assert _tags_and_spans(index.overlapping('a', 0, 100, tag='Dose')) == [('Dose', [(10, 15), (20, 25)])]
+    # Spans are end-exclusive
+    assert index.overlapping('a', 5, 10) == []
+
+
+def test_save_load(dataset, tmp_path):
+    index = DatasetIndex.from_dataset(dataset)
+    index_path = tmp_path / 'index.json'
+    index.save(index_path)
+
+    loaded = DatasetIndex.load(index_path)
+    assert loaded.names == index.names
+    assert loaded.tags == index.tags
+    assert list(loaded.entities_with_tag('Dose')) == list(index.entities_with_tag('Dose'))
+    assert loaded.overlapping('a', 16, 30) == index.overlapping('a', 16, 30)
+
+
+def test_refresh(dataset, tmp_path):
+    index = DatasetIndex.from_dataset(dataset)
+    assert index.refresh(dataset) == []
+
+    b_path = tmp_path / 'b.ann'
+    b_path.write_text('T1\tDrug 0 5\tfive\nT2\tRoute 6 9\tsix\n')
+    stat = b_path.stat()
+    os.utime(b_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    (tmp_path / 'c.ann').unlink()
+    (tmp_path / 'd.ann').write_text('T1\tRoute 1 2\tx\n')
+
+    changed = index.refresh(bd.BratDataset.from_directory(tmp_path))
+    assert sorted(changed) == ['b', 'c', 'd']
+    assert index.names == ['a', 'b', 'd']
+    assert index.files_with_tag('Dose') == ['a']
+    assert index.files_with_tag('Route') == ['b', 'd']
+    assert 'c' not in index